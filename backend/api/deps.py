@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from storage.database import init_db
+from storage.database import init_db_once
 
 
 def ensure_database() -> None:
-    init_db()
+    # No-op once the lifespan hook has created the schema
+    init_db_once()
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, Field, ValidationError
 
 from backend.api.deps import ensure_database
 from backend.core.schemas import Input
-from storage.database import enqueue_analysis_job
+from storage.database import canonical_json, enqueue_analysis_job, enqueue_analysis_jobs_async
 
 router = APIRouter()
 
@@ -30,6 +31,59 @@ class AnalysisResponse(BaseModel):
     estimated_time_seconds: int = Field(default=45)
 
 
+class BatchAnalysisResponse(BaseModel):
+    analysis_ids: List[str]
+    status: str = Field(default="queued")
+
+
+def _jsonable(model: BaseModel) -> Dict[str, Any]:
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")
+    return json.loads(model.json())
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    # Only the new piece is searched for newlines, so a long line costs
+    # linear time however many pieces it arrives in.
+    buffer = bytearray()
+    async for piece in request.stream():
+        start = 0
+        end = piece.find(b"\n")
+        while end != -1:
+            buffer += piece[start:end]
+            yield bytes(buffer)
+            buffer.clear()
+            start = end + 1
+            end = piece.find(b"\n", start)
+        buffer += piece[start:]
+    yield bytes(buffer)
+
+
+async def _batch_jobs(request: Request) -> AsyncIterator[Dict[str, Any]]:
+    # Validates one NDJSON line at a time; only the encoded job row is kept.
+    line_number = 0
+    async for line in _ndjson_lines(request):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            if hasattr(AnalysisRequest, "model_validate_json"):
+                payload = AnalysisRequest.model_validate_json(line)
+            else:
+                payload = AnalysisRequest.parse_raw(line)
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=422,
+                detail={"line": line_number, "errors": json.loads(exc.json())},
+            ) from exc
+        # Canonical encoding, so resubmitted jobs fingerprint identically
+        yield {
+            "subject_id": payload.subject_id,
+            "documents": canonical_json([_jsonable(document) for document in payload.documents]),
+            "options": _jsonable(payload.options) if payload.options else None,
+        }
+
+
 @router.post("/analysis", response_model=AnalysisResponse, status_code=202)
 def create_analysis_job(
     payload: AnalysisRequest,
@@ -37,7 +91,22 @@ def create_analysis_job(
 ) -> AnalysisResponse:
     analysis_id = enqueue_analysis_job(
         payload.subject_id,
-        [document.dict() for document in payload.documents],
-        payload.options.dict() if payload.options else None,
+        [_jsonable(document) for document in payload.documents],
+        _jsonable(payload.options) if payload.options else None,
     )
     return AnalysisResponse(analysis_id=analysis_id)
+
+
+@router.post("/analysis/batch", response_model=BatchAnalysisResponse, status_code=202)
+async def create_analysis_jobs(
+    request: Request,
+    _: None = Depends(ensure_database),
+) -> BatchAnalysisResponse:
+    """
+    Enqueues one job per line of an NDJSON body, each line shaped like the
+    POST /analysis payload. The body is parsed while it streams into a single
+    COPY, and a malformed line rejects the whole batch. Jobs identical to one
+    already queued, running or completed return that job's id.
+    """
+    analysis_ids = await enqueue_analysis_jobs_async(_batch_jobs(request))
+    return BatchAnalysisResponse(analysis_ids=analysis_ids)
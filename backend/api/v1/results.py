@@ -1,24 +1,134 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
 
-from storage.database import fetch_job
+from backend.config import load_settings
+from backend.core.schemas import Report
+from backend.storage.files import load_report
+from storage.database import fetch_job_status_async, fetch_report_json_async
 
 router = APIRouter()
 
+# Completed reports never change, so clients and caches may keep them.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
-def _normalize_report(job: Dict[str, Any]) -> Dict[str, Any]:
-    report = job.get("report")
-    if report is None:
-        raise HTTPException(status_code=404, detail="Report not available yet")
-    return report
+# Top-level report keys that ?sections= may select
+REPORT_SECTIONS = tuple(getattr(Report, "model_fields", None) or Report.__fields__)
+
+
+class _ReportCache:
+    """
+    LRU of serialized completed reports, bounded by total body size.
+    Used from the event loop only, so it needs no lock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+
+    def get(self, analysis_id: str) -> Optional[bytes]:
+        body = self._entries.get(analysis_id)
+        if body is not None:
+            self._entries.move_to_end(analysis_id)
+        return body
+
+    def put(self, analysis_id: str, body: bytes) -> None:
+        if len(body) > self.max_bytes or analysis_id in self._entries:
+            return
+        self._entries[analysis_id] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+_report_cache = _ReportCache(load_settings().report_cache_bytes)
+
+
+def _etag(analysis_id: str, sections: Optional[List[str]] = None) -> str:
+    # A completed report is immutable, so its id identifies the content;
+    # only completed reports are sent with one.
+    if sections is None:
+        return f'"report-{analysis_id}"'
+    return f'"report-{analysis_id}-{"+".join(sections)}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == etag or tag == "W/" + etag for tag in tags)
+
+
+def _report_response(etag: str, body: bytes) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+def _parse_sections(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    wanted = sorted({name.strip() for name in value.split(",") if name.strip()})
+    unknown = [name for name in wanted if name not in REPORT_SECTIONS]
+    if unknown or not wanted:
+        raise HTTPException(
+            status_code=422,
+            detail={"unknown_sections": unknown, "sections": list(REPORT_SECTIONS)},
+        )
+    return wanted
+
+
+def _stored_sections(analysis_id: str, sections: List[str]) -> Optional[Dict[str, Any]]:
+    try:
+        return load_report(analysis_id, sections)
+    except FileNotFoundError:
+        return None
+
+
+def _cache_key(analysis_id: str, sections: Optional[List[str]]) -> str:
+    return analysis_id if sections is None else f"{analysis_id}?{','.join(sections)}"
+
+
+async def _report_sections(analysis_id: str, sections: List[str], etag: str) -> Response:
+    # The worker's binary report file decodes only the requested sections;
+    # jobs without one (e.g. cloned duplicates) fall back to the stored JSON.
+    key = _cache_key(analysis_id, sections)
+    body = _report_cache.get(key)
+    if body is not None:
+        return _report_response(etag, body)
+
+    payload = await asyncio.to_thread(_stored_sections, analysis_id, sections)
+    completed = payload is not None
+    if payload is None:
+        job = await fetch_report_json_async(analysis_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Analysis job not found")
+        if job["report"] is None:
+            raise HTTPException(status_code=404, detail="Report not available yet")
+        report = json.loads(job["report"])
+        payload = {name: report[name] for name in sections if name in report}
+        completed = job["status"] == "completed"
+
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if not completed:
+        return Response(content=body, media_type="application/json")
+    _report_cache.put(key, body)
+    return _report_response(etag, body)
 
 
 @router.get("/analysis/{analysis_id}")
-def get_analysis_status(analysis_id: str) -> Dict[str, Any]:
-    job = fetch_job(analysis_id)
+async def get_analysis_status(analysis_id: str) -> Dict[str, Any]:
+    job = await fetch_job_status_async(analysis_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Analysis job not found")
     return {
@@ -28,8 +138,38 @@ def get_analysis_status(analysis_id: str) -> Dict[str, Any]:
 
 
 @router.get("/reports/{analysis_id}")
-def get_report(analysis_id: str) -> Dict[str, Any]:
-    job = fetch_job(analysis_id)
+async def get_report(
+    analysis_id: str,
+    sections: Optional[str] = Query(
+        default=None, description="Comma-separated top-level report keys to return."
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    wanted = _parse_sections(sections)
+    etag = _etag(analysis_id, wanted)
+    # Only a completed, hence unchanging, report was ever sent with this
+    # ETag, so a match needs no lookup; unknown ids get their 404 from a
+    # request without one.
+    if _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        )
+    if wanted is not None:
+        return await _report_sections(analysis_id, wanted, etag)
+
+    body = _report_cache.get(analysis_id)
+    if body is not None:
+        return _report_response(etag, body)
+
+    job = await fetch_report_json_async(analysis_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Analysis job not found")
-    return _normalize_report(job)
+    if job["report"] is None:
+        raise HTTPException(status_code=404, detail="Report not available yet")
+
+    body = job["report"].encode("utf-8")
+    if job["status"] != "completed":
+        return Response(content=body, media_type="application/json")
+    _report_cache.put(analysis_id, body)
+    return _report_response(etag, body)
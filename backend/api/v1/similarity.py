@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from storage.vectors import DEFAULT_NPROBE, search_chunks, similar_subjects
+
+router = APIRouter()
+
+
+class ChunkSearchRequest(BaseModel):
+    vector: List[float]
+    k: int = 10
+    nprobe: int = DEFAULT_NPROBE
+
+
+# Plain defs: index reads touch memory-mapped files, so they run in the threadpool.
+@router.get("/subjects/{subject_id}/similar")
+def get_similar_subjects(
+    subject_id: str,
+    k: int = Query(10, ge=1, le=1000),
+    nprobe: int = Query(DEFAULT_NPROBE, ge=1),
+) -> Dict[str, Any]:
+    matches = similar_subjects(subject_id, k, nprobe)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="No indexed report for subject")
+    return {"subject_id": subject_id, "matches": matches}
+
+
+@router.post("/vectors/chunks/search")
+def search_chunk_vectors(request: ChunkSearchRequest) -> Dict[str, Any]:
+    try:
+        matches = search_chunks(request.vector, min(max(request.k, 1), 1000), request.nprobe)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return {"matches": matches}
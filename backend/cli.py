@@ -2,19 +2,64 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
+import tempfile
+from collections import OrderedDict
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
 
-from backend.core.pipeline import run_pipeline
+from backend.core.ingestion.json_stream import iter_json_documents
 
+# backend.core.pipeline (pydantic, NumPy) and the process pool are imported
+# only once there is work, so --help and argument errors return at once.
 
-def _load_documents(path: Path) -> Iterable[dict]:
-    payload = json.loads(path.read_text(encoding="utf-8"))
-    if isinstance(payload, dict) and "documents" in payload:
-        return payload["documents"]
-    if isinstance(payload, list):
-        return payload
-    raise ValueError("Input JSON must be a list of documents or an object with a 'documents' key.")
+# Spool files kept open at once while sharding; others are reopened on demand.
+MAX_OPEN_SPOOLS = 64
+
+
+def _load_documents(path: str) -> Iterator[dict]:
+    """
+    Streams documents from a JSON array, a {"documents": [...]} object or
+    NDJSON; "-" reads stdin.
+    """
+    if path == "-":
+        yield from iter_json_documents(sys.stdin)
+        return
+    with open(path, encoding="utf-8") as handle:
+        yield from iter_json_documents(handle)
+
+
+def _spool_shards(documents: Iterable[dict], field: str, directory: Path) -> Dict[str, Path]:
+    # One pass over the input, appending each document to its shard's NDJSON
+    # file, so only one shard at a time is later held in memory.
+    spools: Dict[str, Path] = {}
+    handles: "OrderedDict[str, TextIO]" = OrderedDict()
+    try:
+        for document in documents:
+            key = str(document.get(field) or "unknown")
+            handle = handles.pop(key, None)
+            if handle is None:
+                path = spools.setdefault(key, directory / f"{len(spools)}.ndjson")
+                handle = open(path, "a", encoding="utf-8")
+                if len(handles) >= MAX_OPEN_SPOOLS:
+                    handles.popitem(last=False)[1].close()
+            handles[key] = handle
+            handle.write(json.dumps(document))
+            handle.write("\n")
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return spools
+
+
+def _read_spool(path: Path) -> Iterator[dict]:
+    # Opened only when run_pipeline_many reaches this subject.
+    try:
+        with open(path, encoding="utf-8") as handle:
+            yield from iter_json_documents(handle)
+    finally:
+        path.unlink()
 
 
 def _model_to_dict(model: Any) -> dict:
@@ -23,17 +68,116 @@ def _model_to_dict(model: Any) -> dict:
     return model.dict(by_alias=True)
 
 
+def _serve_job(line: str, number: int, workers: int, executor: Optional[Any]) -> dict:
+    # A job is {"subject_id": ..., "documents": [...]} or
+    # {"subject_id": ..., "path": ...}; a bare line is taken as a path.
+    from backend.core.pipeline import run_pipeline
+
+    job = json.loads(line) if line.startswith("{") else {"path": line}
+    if "documents" in job:
+        documents: Iterable[dict] = job["documents"]
+        subject_id = job.get("subject_id") or f"job-{number}"
+    else:
+        documents = _load_documents(job["path"])
+        subject_id = job.get("subject_id") or Path(job["path"]).stem
+    report = run_pipeline(str(subject_id), documents, workers=workers, executor=executor)
+    return _model_to_dict(report)
+
+
+def _serve(jobs: TextIO, workers: int, executor: Optional[Any]) -> None:
+    """
+    Runs one job per input line and prints one report per line, so a batch
+    of inputs pays interpreter startup, imports, the worker pool and the
+    feature cache once. A failed job prints {"error": ...} and the loop
+    continues.
+    """
+    for number, line in enumerate(jobs, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            output = _serve_job(line, number, workers, executor)
+        except Exception as exc:  # noqa: BLE001
+            output = {"line": number, "error": f"{type(exc).__name__}: {exc}"}
+        print(json.dumps(output), flush=True)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run Cortex Atlas pipeline on a JSON file.")
-    parser.add_argument("path", type=Path, help="Path to a JSON file containing documents.")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        help="JSON array, {\"documents\": [...]} object or NDJSON file; '-' reads stdin. "
+        "With --serve, the job stream (default stdin).",
+    )
     parser.add_argument("--pretty", action="store_true", help="Pretty-print the JSON output.")
+    parser.add_argument(
+        "--subject-id",
+        default=None,
+        help="Subject identifier for the report (defaults to the input file name).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for chunking and feature extraction.",
+    )
+    parser.add_argument(
+        "--shard-by",
+        default=None,
+        metavar="FIELD",
+        help="Produce one report per distinct value of this document field "
+        "(e.g. author_id), printed one per line; all subjects are analysed "
+        "in one batch.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep running and analyse one job per input line: a JSON object "
+        "{\"subject_id\", \"documents\"} or {\"subject_id\", \"path\"}, or a bare "
+        "file path. Prints one report per line.",
+    )
     args = parser.parse_args()
-
-    documents = _load_documents(args.path)
-    report = run_pipeline(documents)
-    payload = _model_to_dict(report)
+    if args.serve and args.shard_by is not None:
+        parser.error("--serve and --shard-by cannot be combined")
+    if args.path is None and not args.serve:
+        parser.error("the following arguments are required: path")
     indent = 2 if args.pretty else None
-    print(json.dumps(payload, indent=indent))
+
+    from backend.core.pipeline import run_pipeline, run_pipeline_many
+
+    with ExitStack() as stack:
+        executor = None
+        if args.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers))
+
+        if args.serve:
+            if args.path in (None, "-"):
+                _serve(sys.stdin, args.workers, executor)
+            else:
+                _serve(stack.enter_context(open(args.path, encoding="utf-8")), args.workers, executor)
+            return
+
+        documents = _load_documents(args.path)
+        if args.shard_by is None:
+            subject_id = args.subject_id or ("stdin" if args.path == "-" else Path(args.path).stem)
+            report = run_pipeline(subject_id, documents, workers=args.workers, executor=executor)
+            print(json.dumps(_model_to_dict(report), indent=indent))
+            return
+
+        directory = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="cortex-atlas-")))
+        spools = _spool_shards(documents, args.shard_by, directory)
+        # Feature extraction is batched across subjects; reports stream out
+        # as each batch completes.
+        reports = run_pipeline_many(
+            {subject_id: _read_spool(path) for subject_id, path in spools.items()},
+            workers=args.workers,
+            executor=executor,
+        )
+        for report in reports:
+            print(json.dumps(_model_to_dict(report), indent=indent), flush=True)
 
 
 if __name__ == "__main__":
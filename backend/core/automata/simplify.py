@@ -1 +1,210 @@
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 
+from backend.core.automata.transitions import TransitionCounts
+
+# Earlier blocks kept per dominant successor for comparison; bounds a
+# round at O(transitions).
+CANDIDATES_PER_GROUP = 8
+
+MAX_ROUNDS = 16
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = np.arange(size, dtype=np.int64)
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return int(item)
+
+    def union(self, keep: int, merged: int) -> None:
+        self.parent[self.find(merged)] = self.find(keep)
+
+    def roots(self) -> np.ndarray:
+        # Vectorized path halving until every entry points at its root
+        parent = self.parent
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                return parent
+            parent[:] = grand
+
+
+def _rows(
+    sources: np.ndarray, targets: np.ndarray, counts: np.ndarray, size: int
+) -> List[Dict[int, int]]:
+    # Outgoing counts per block as {target block: count}
+    rows: List[Dict[int, int]] = [{} for _ in range(size)]
+    for a, b, count in zip(sources.tolist(), targets.tolist(), counts.tolist()):
+        rows[a][b] = count
+    return rows
+
+
+def _compatible(
+    row_a: Dict[int, int], visits_a: int, row_b: Dict[int, int], visits_b: int, bound: float
+) -> bool:
+    """
+    Alergia's Hoeffding test on every successor and on stopping (visits
+    without an outgoing transition).
+    """
+    if not visits_a or not visits_b:
+        return True
+    limit = bound * (1 / math.sqrt(visits_a) + 1 / math.sqrt(visits_b))
+    for target in row_a.keys() | row_b.keys():
+        if abs(row_a.get(target, 0) / visits_a - row_b.get(target, 0) / visits_b) > limit:
+            return False
+    stop_a = visits_a - sum(row_a.values())
+    stop_b = visits_b - sum(row_b.values())
+    return abs(stop_a / visits_a - stop_b / visits_b) <= limit
+
+
+def _similarity(row_a: Dict[int, int], row_b: Dict[int, int]) -> float:
+    # Overlap of the two successor distributions, in [0, 1]
+    total_a = sum(row_a.values()) or 1
+    total_b = sum(row_b.values()) or 1
+    return sum(
+        min(count / total_a, row_b[target] / total_b)
+        for target, count in row_a.items()
+        if target in row_b
+    )
+
+
+class _Blocks:
+    """
+    Transition counts aggregated over the current union-find blocks.
+    """
+
+    def __init__(self, counts: TransitionCounts, sets: _UnionFind) -> None:
+        size = len(counts.states)
+        roots = sets.roots()
+        self.visits = np.bincount(roots, weights=counts.state_counts, minlength=size)
+        keys, inverse = np.unique(
+            roots[counts.sources] * size + roots[counts.targets], return_inverse=True
+        )
+        weights = np.bincount(inverse.reshape(-1), weights=counts.counts, minlength=len(keys))
+        sources, targets = np.divmod(keys, max(size, 1))
+        self.rows = _rows(sources, targets, weights.astype(np.int64), size)
+        # Live blocks, most visited first
+        live = np.unique(roots)
+        self.order = live[np.argsort(-self.visits[live], kind="stable")].tolist()
+
+    def dominant(self, block: int) -> int:
+        row = self.rows[block]
+        return max(row, key=row.get) if row else -1
+
+    def near_dominant(self, block: int, slack: float) -> List[int]:
+        # Successors (-1 for stopping) within slack counts of the most likely
+        row = self.rows[block]
+        top = max(row.values(), default=0)
+        near = sorted(target for target, count in row.items() if count >= top - slack)
+        return near + [-1] if top <= slack else near
+
+
+def _merge_round(counts: TransitionCounts, sets: _UnionFind, bound: float) -> int:
+    blocks = _Blocks(counts, sets)
+    groups: Dict[int, List[int]] = {}
+    merged = 0
+    for block in blocks.order:
+        # Blocks are grouped by most likely successor. Earlier blocks have
+        # at least as many visits, so the Hoeffding limit of a compatible
+        # one is at most 2 * bound / sqrt(visits), and its most likely
+        # successor is within twice that of this block's own.
+        visits = int(blocks.visits[block])
+        slack = 4 * bound * math.sqrt(visits)
+        candidates = [
+            other
+            for target in blocks.near_dominant(block, slack)
+            for other in groups.get(target, ())
+        ]
+        for other in candidates:
+            if _compatible(
+                blocks.rows[other],
+                int(blocks.visits[other]),
+                blocks.rows[block],
+                visits,
+                bound,
+            ):
+                sets.union(other, block)
+                merged += 1
+                break
+        else:
+            group = groups.setdefault(blocks.dominant(block), [])
+            if len(group) < CANDIDATES_PER_GROUP:
+                group.append(block)
+    return merged
+
+
+def _enforce_budget(counts: TransitionCounts, sets: _UnionFind, max_states: int) -> None:
+    # Folds the least visited blocks into the kept block whose successor
+    # distribution overlaps most (the most visited one if none overlaps).
+    blocks = _Blocks(counts, sets)
+    if len(blocks.order) <= max_states:
+        return
+    kept = blocks.order[: max(max_states, 1)]
+    by_target: Dict[int, List[int]] = {}
+    for block in kept:
+        for target in blocks.rows[block]:
+            by_target.setdefault(target, []).append(block)
+    for block in blocks.order[len(kept):]:
+        row = blocks.rows[block]
+        candidates = {other for target in row for other in by_target.get(target, ())}
+        best = max(
+            sorted(candidates),
+            key=lambda other: _similarity(row, blocks.rows[other]),
+            default=kept[0],
+        )
+        sets.union(best, block)
+
+
+def merge_states(
+    counts: TransitionCounts,
+    alpha: Optional[float] = 0.05,
+    max_states: Optional[int] = None,
+) -> Tuple[TransitionCounts, np.ndarray]:
+    """
+    Merges states whose outgoing distributions are statistically
+    indistinguishable (Alergia's Hoeffding test at significance alpha),
+    repeating until no merge applies, since merging successors can make
+    their predecessors compatible. Then, if more than max_states remain,
+    the least visited are folded into their most similar kept state.
+    alpha=None skips the statistical pass.
+
+    Returns the merged counts and, for each original state index, the
+    index of the state it was merged into. A merged state keeps the name
+    of its first-appearing member and states stay in first-appearance
+    order.
+    """
+    size = len(counts.states)
+    sets = _UnionFind(size)
+    if size and alpha is not None:
+        bound = math.sqrt(0.5 * math.log(2 / alpha))
+        for _ in range(MAX_ROUNDS):
+            if not _merge_round(counts, sets, bound):
+                break
+    if size and max_states is not None:
+        _enforce_budget(counts, sets, max_states)
+
+    # Renumber blocks by their first-appearing member; members are in
+    # first-appearance order already, so the smallest index is first.
+    roots = sets.roots()
+    _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    appearance = np.argsort(first, kind="stable")
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(appearance))
+    mapping = rank[inverse.reshape(-1)]
+
+    merged = TransitionCounts.from_pairs(
+        [counts.states[index] for index in first[appearance].tolist()],
+        np.bincount(mapping, weights=counts.state_counts, minlength=len(first)).astype(np.int64),
+        mapping[counts.sources],
+        mapping[counts.targets],
+        counts.counts,
+        int(mapping[counts.first]) if counts.first is not None else None,
+        int(mapping[counts.last]) if counts.last is not None else None,
+    )
+    return merged, mapping
@@ -1,5 +1,8 @@
 from typing import List, Dict, Tuple
-from collections import defaultdict
+import numpy as np
+
+from backend.core.automata.transitions import TransitionCounts
+
 
 def infer_states(
     cluster_sequence: List[str]
@@ -7,31 +10,29 @@ def infer_states(
     """
     Infers a probabilistic state machine from an ordered cluster sequence.
     """
-    state_counts = defaultdict(int)
-    transition_counts = defaultdict(int)
+    return infer_states_from_counts(TransitionCounts.from_sequence(cluster_sequence))
 
-    for state in cluster_sequence:
-        state_counts[state] += 1
-
-    for a, b in zip(cluster_sequence, cluster_sequence[1:]):
-        transition_counts[(a, b)] += 1
 
+def infer_states_from_counts(
+    counts: TransitionCounts
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Normalizes (possibly merged) transition counts into states and transitions.
+    """
+    length = max(counts.length, 1)
+    support = counts.state_counts / length
     states = [
-        {
-            "state_id": state,
-            "label": state,
-            "support": count / len(cluster_sequence)
-        }
-        for state, count in state_counts.items()
+        {"state_id": state, "label": state, "support": value}
+        for state, value in zip(counts.states, support.tolist())
     ]
 
-    transitions = []
-    for (a, b), count in transition_counts.items():
-        total = state_counts[a]
-        transitions.append({
-            "from": a,
-            "to": b,
-            "probability": count / total
-        })
+    # One vectorized division over the nonzero (sparse) entries
+    probabilities = counts.counts / np.maximum(counts.state_counts[counts.sources], 1)
+    transitions = [
+        {"from": counts.states[a], "to": counts.states[b], "probability": probability}
+        for a, b, probability in zip(
+            counts.sources.tolist(), counts.targets.tolist(), probabilities.tolist()
+        )
+    ]
 
     return states, transitions
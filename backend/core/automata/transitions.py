@@ -1 +1,314 @@
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
 
+# Joins the states of an order-k context into one state name.
+CONTEXT_SEPARATOR = ">"
+
+
+def _empty_counts() -> np.ndarray:
+    return np.zeros(0, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class AutomataConfig:
+    """
+    order: states are the last `order` clusters (order-k / n-gram contexts).
+    max_contexts: keep at most this many contexts, by frequency; rarer
+    contexts back off to their most recent single cluster.
+    intervals: group contiguous chunks of a state into one interval and
+    count transitions between intervals, so there are no self-loops.
+    merge_alpha / max_states: merge indistinguishable states afterwards
+    (see automata.simplify.merge_states); off when both are None.
+    """
+
+    order: int = 1
+    max_contexts: Optional[int] = None
+    intervals: bool = False
+    merge_alpha: Optional[float] = None
+    max_states: Optional[int] = None
+
+
+def run_lengths(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run-length encodes a sequence: ([A, B, A], [2, 3, 1]) for A A B B B A.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if not len(codes):
+        return codes, _empty_counts()
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    lengths = np.diff(np.append(starts, len(codes)))
+    return codes[starts], lengths
+
+
+def _first_appearance(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Re-encodes codes as 0..n-1 by first appearance; also returns the
+    # position where each new code first appears.
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    appearance = np.argsort(first, kind="stable")
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(appearance))
+    return rank[inverse.reshape(-1)], first[appearance]
+
+
+def context_sequence(
+    codes: np.ndarray,
+    states: Sequence[str],
+    order: int,
+    max_contexts: Optional[int] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Maps a state sequence to its sequence of order-k contexts, one per
+    position from order-1 on, encoded by first appearance.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if len(codes) < order:
+        return _empty_counts(), []
+    contexts = np.lib.stride_tricks.sliding_window_view(codes, order)
+
+    # Folds the context columns into one id per distinct context, keeping
+    # ids below len(contexts) * len(states) at every step.
+    size = max(len(states), 1)
+    keys = contexts[:, 0]
+    for column in range(1, order):
+        keys = np.unique(keys * size + contexts[:, column], return_inverse=True)[1].reshape(-1)
+
+    if max_contexts is not None and order > 1:
+        counts = np.bincount(keys)
+        if np.count_nonzero(counts) > max_contexts:
+            # Rare contexts back off to their last state, kept apart from
+            # full contexts by a negative key.
+            rare = np.ones(len(counts), dtype=bool)
+            rare[np.argsort(-counts, kind="stable")[:max_contexts]] = False
+            keys = np.where(rare[keys], -1 - contexts[:, -1], keys)
+
+    encoded, first_rows = _first_appearance(keys)
+    names = []
+    for key, row in zip(keys[first_rows].tolist(), first_rows.tolist()):
+        if key < 0:
+            names.append(states[-1 - key])
+        else:
+            names.append(CONTEXT_SEPARATOR.join(states[code] for code in contexts[row].tolist()))
+    return encoded, names
+
+
+@dataclass
+class TransitionCounts:
+    """
+    State and transition counts for an ordered state sequence.
+    States are indexed by integer in order of first appearance. Transition
+    counts are sparse (COO): parallel sources/targets/counts arrays holding
+    nonzero entries only, in order of the pair's first appearance (the
+    order infer_states has always listed them in). first/last hold the
+    boundary states of the counted shard so that shards counted separately
+    can be merged, including the transition between them.
+    """
+
+    states: List[str] = field(default_factory=list)
+    state_counts: np.ndarray = field(default_factory=_empty_counts)
+    sources: np.ndarray = field(default_factory=_empty_counts)
+    targets: np.ndarray = field(default_factory=_empty_counts)
+    counts: np.ndarray = field(default_factory=_empty_counts)
+    first: Optional[int] = None
+    last: Optional[int] = None
+
+    @classmethod
+    def from_sequence(cls, sequence: Sequence[str]) -> "TransitionCounts":
+        index: Dict[str, int] = {}
+        codes = np.fromiter(
+            (index.setdefault(state, len(index)) for state in sequence),
+            dtype=np.int64,
+            count=len(sequence),
+        )
+        return cls.from_codes(codes, list(index))
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, states: Sequence[str]) -> "TransitionCounts":
+        """
+        Counts an integer-encoded sequence; codes index into states.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        return cls.from_pairs(
+            states,
+            np.bincount(codes, minlength=len(states)),
+            codes[:-1],
+            codes[1:],
+            np.ones(max(len(codes) - 1, 0), dtype=np.int64),
+            int(codes[0]) if len(codes) else None,
+            int(codes[-1]) if len(codes) else None,
+        )
+
+    @classmethod
+    def from_runs(
+        cls,
+        values: np.ndarray,
+        lengths: np.ndarray,
+        states: Sequence[str],
+    ) -> "TransitionCounts":
+        """
+        Counts a run-length-encoded sequence (see run_lengths) without
+        expanding it; equal to from_codes on the expanded sequence. A run
+        of n chunks adds n - 1 self-transitions.
+        """
+        values = np.asarray(values, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        loops = np.flatnonzero(lengths > 1)
+        # A run's self-transitions come before the transition out of it.
+        steps = np.arange(max(len(values) - 1, 0))
+        order = np.argsort(np.concatenate((2 * steps + 1, 2 * loops)), kind="stable")
+        return cls.from_pairs(
+            states,
+            np.bincount(values, weights=lengths, minlength=len(states)).astype(np.int64),
+            np.concatenate((values[:-1], values[loops]))[order],
+            np.concatenate((values[1:], values[loops]))[order],
+            np.concatenate((np.ones(len(steps), dtype=np.int64), lengths[loops] - 1))[order],
+            int(values[0]) if len(values) else None,
+            int(values[-1]) if len(values) else None,
+        )
+
+    @classmethod
+    def from_labels(
+        cls,
+        codes: np.ndarray,
+        states: Sequence[str],
+        config: AutomataConfig = AutomataConfig(),
+    ) -> "TransitionCounts":
+        """
+        Counts a sequence under an AutomataConfig: order-k contexts become
+        the states; with intervals, each run of a state counts once, so
+        support is the share of intervals rather than of chunks.
+        """
+        if config.order > 1:
+            codes, states = context_sequence(codes, states, config.order, config.max_contexts)
+        if config.intervals:
+            codes = run_lengths(codes)[0]
+        return cls.from_codes(codes, states)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        states: Sequence[str],
+        state_counts: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        first: Optional[int],
+        last: Optional[int],
+    ) -> "TransitionCounts":
+        """
+        Builds counts from (source, target, weight) triples given in
+        sequence order, summing duplicate pairs in one sort.
+        """
+        size = len(states)
+        keys, positions, inverse = np.unique(
+            sources * size + targets, return_index=True, return_inverse=True
+        )
+        counts = np.bincount(inverse.reshape(-1), weights=weights, minlength=len(keys))
+        appearance = np.argsort(positions, kind="stable")
+        sources, targets = np.divmod(keys[appearance], max(size, 1))
+        counts = counts[appearance]
+        return cls(
+            states=list(states),
+            state_counts=np.asarray(state_counts, dtype=np.int64),
+            sources=sources,
+            targets=targets,
+            counts=counts.astype(np.int64),
+            first=first,
+            last=last,
+        )
+
+    @property
+    def length(self) -> int:
+        return int(self.state_counts.sum())
+
+    def to_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (indptr, indices, data): row a's transitions are
+        indices[indptr[a]:indptr[a + 1]] with counts in data.
+        """
+        indptr = np.zeros(len(self.states) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=len(self.states)), out=indptr[1:])
+        rows = np.argsort(self.sources, kind="stable")
+        return indptr, self.targets[rows], self.counts[rows]
+
+    def to_dense(self) -> np.ndarray:
+        size = len(self.states)
+        matrix = np.zeros((size, size), dtype=np.int64)
+        matrix[self.sources, self.targets] = self.counts
+        return matrix
+
+    def merge(self, other: "TransitionCounts") -> "TransitionCounts":
+        """
+        Returns the counts of this shard followed by `other`.
+        """
+        index = {state: i for i, state in enumerate(self.states)}
+        remap = np.array(
+            [index.setdefault(state, len(index)) for state in other.states], dtype=np.int64
+        )
+        size, own = len(index), len(self.states)
+
+        state_counts = np.zeros(size, dtype=np.int64)
+        state_counts[:own] = self.state_counts
+        state_counts[remap] += other.state_counts
+
+        # The transition between the shards comes after this shard's pairs
+        # and before the other's.
+        sources = [self.sources]
+        targets = [self.targets]
+        weights = [self.counts]
+
+        first, last = self.first, self.last
+        if other.first is not None:
+            if last is not None:
+                sources.append(np.array([last], dtype=np.int64))
+                targets.append(remap[[other.first]])
+                weights.append(np.ones(1, dtype=np.int64))
+            if first is None:
+                first = int(remap[other.first])
+            last = int(remap[other.last])
+        sources.append(remap[other.sources])
+        targets.append(remap[other.targets])
+        weights.append(other.counts)
+
+        return TransitionCounts.from_pairs(
+            list(index),
+            state_counts,
+            np.concatenate(sources),
+            np.concatenate(targets),
+            np.concatenate(weights),
+            first,
+            last,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "states": list(self.states),
+            "state_counts": self.state_counts.tolist(),
+            "transitions": np.stack(
+                (self.sources, self.targets, self.counts), axis=1
+            ).tolist(),
+            "first": self.first,
+            "last": self.last,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TransitionCounts":
+        size = len(payload["states"])
+        triples = np.asarray(payload.get("transitions", []), dtype=np.int64).reshape(-1, 3)
+        return cls.from_pairs(
+            payload["states"],
+            np.asarray(payload["state_counts"], dtype=np.int64).reshape(size),
+            triples[:, 0],
+            triples[:, 1],
+            triples[:, 2],
+            payload.get("first"),
+            payload.get("last"),
+        )
+
+
+def merge_counts(shards: Iterable[TransitionCounts]) -> TransitionCounts:
+    """
+    Reduces per-shard counts, given in sequence order, into one.
+    """
+    return reduce(TransitionCounts.merge, shards, TransitionCounts())
@@ -1,23 +1,396 @@
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import numpy as np
 
+from backend.core.clustering.kdtree import QUERY_BLOCK, KDTree
+
+NOISE_LABEL = -1
+
+# Upper bound on the number of entries in one distance block.
+_BLOCK_CELLS = 1 << 22
+
+# Core points compared at once per query group in _assign_to_core.
+_ASSIGN_BATCH = 512
+
+# Points whose k-distance is measured when eps is chosen from the data.
+KNEE_SAMPLE = 2000
+
+
+def _pairwise_sq_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    distances = (
+        np.einsum("ij,ij->i", a, a)[:, None]
+        + np.einsum("ij,ij->i", b, b)[None, :]
+        - 2.0 * (a @ b.T)
+    )
+    return np.maximum(distances, 0.0)
+
+
+def _group(keys: np.ndarray, values: np.ndarray) -> Dict[int, np.ndarray]:
+    order = np.argsort(keys, kind="stable")
+    unique, starts = np.unique(keys[order], return_index=True)
+    return dict(zip(unique.tolist(), np.split(values[order], starts[1:])))
+
+
+def _run_starts(keys: np.ndarray) -> np.ndarray:
+    # Where each run of equal values starts in keys
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+def _find_roots(parent: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    roots = parent[nodes]
+    while True:
+        parents = parent[roots]
+        if np.array_equal(parents, roots):
+            return roots
+        roots = parents
+
+
+def _union(parent: np.ndarray, a: np.ndarray, b: np.ndarray) -> None:
+    # Vectorized union-find: hook the larger root under the smaller one
+    # until every pair shares a root. parent[i] <= i always holds.
+    while len(a):
+        root_a = _find_roots(parent, a)
+        root_b = _find_roots(parent, b)
+        apart = root_a != root_b
+        if not apart.any():
+            return
+        a, b = a[apart], b[apart]
+        root_a, root_b = root_a[apart], root_b[apart]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+
+def _gather(tree: KDTree, nodes: np.ndarray) -> np.ndarray:
+    # Members of the nodes, concatenated in node order
+    sizes = tree.end[nodes] - tree.start[nodes]
+    offsets = np.repeat(tree.start[nodes] - (np.cumsum(sizes) - sizes), sizes)
+    return tree.order[offsets + np.arange(len(offsets))]
+
+
+def _first_core(tree: KDTree, core: np.ndarray) -> np.ndarray:
+    # First core point of every node, or -1 when the node has none.
+    seen = np.concatenate([[0], np.cumsum(core[tree.order])])
+    position = np.searchsorted(seen, seen[tree.start] + 1)
+    has_core = seen[tree.end] > seen[tree.start]
+    first = np.full(len(tree.start), -1, dtype=np.int64)
+    first[has_core] = tree.order[position[has_core] - 1]
+    return first
+
+
+def _leaf_neighbours(
+    tree: KDTree, eps: float
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yields (leaf, members, full, partial) per leaf: the leaf node, its
+    points, the nodes entirely within eps of it (every pair of points are
+    neighbours) and the leaves that need point distances.
+    """
+    leaves, nodes, full = tree.query_boxes(tree.lo[tree.leaves], tree.hi[tree.leaves], eps)
+    # Grouped by leaf, keeping the order matches were found in
+    order = np.argsort(leaves, kind="stable")
+    leaves, nodes, full = leaves[order], nodes[order], full[order]
+    bounds = np.searchsorted(leaves, np.arange(len(tree.leaves) + 1))
+    for index, leaf in enumerate(tree.leaves.tolist()):
+        matches = slice(bounds[index], bounds[index + 1])
+        yield (
+            leaf,
+            tree.members(leaf),
+            nodes[matches][full[matches]],
+            nodes[matches][~full[matches]],
+        )
+
+
+def _dbscan(
+    points: np.ndarray, eps: float, min_samples: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns per-point cluster roots (NOISE_LABEL for noise) and the core-point mask.
+    """
+    tree = KDTree(points)
+    limit = eps * eps
+    sizes = tree.end - tree.start
+    neighbours = list(_leaf_neighbours(tree, eps))
+
+    # Pass 1: neighbour counts (each point counts itself), only as far as
+    # min_samples decides: fully-within nodes count without distances, and
+    # the leaf's own points, checked next, settle most dense leaves.
+    counts = np.zeros(len(points), dtype=np.int64)
+    for leaf, members, full, partial in neighbours:
+        counts[members] += sizes[full].sum()
+        if counts[members[0]] >= min_samples:
+            continue
+        if (partial == leaf).any():
+            member_points = points[members]
+            within = _pairwise_sq_distances(member_points, member_points) <= limit
+            counts[members] += within.sum(axis=1)
+            if counts[members].min() >= min_samples:
+                continue
+            partial = partial[partial != leaf]
+        others = _gather(tree, partial)
+        if len(others):
+            within = _pairwise_sq_distances(points[members], points[others]) <= limit
+            counts[members] += within.sum(axis=1)
+    core = counts >= min_samples
+
+    first_core = _first_core(tree, core)
+
+    # Pass 2: connect core points that are neighbours.
+    parent = np.arange(len(points))
+    for _, members, full, partial in neighbours:
+        members = members[core[members]]
+        if not len(members):
+            continue
+        # Every core here neighbours every core of a fully-within node, so one
+        # representative per such node is enough; the node's leaves link
+        # their own cores back when they are processed in turn.
+        linked = first_core[full]
+        linked = linked[linked >= 0]
+        if len(linked):
+            _union(parent, np.full(len(linked), members[0]), linked)
+            _union(parent, members, np.full(len(members), linked[0]))
+        others = _gather(tree, partial)
+        others = others[core[others]]
+        roots = _find_roots(parent, members)
+        if len(others) and (roots == roots[0]).all():
+            # Cores already joined to this leaf's cluster add no links
+            others = others[_find_roots(parent, others) != roots[0]]
+        if len(others):
+            rows, cols = np.nonzero(
+                _pairwise_sq_distances(points[members], points[others]) <= limit
+            )
+            _union(parent, members[rows], others[cols])
+
+    labels = np.full(len(points), NOISE_LABEL, dtype=np.int64)
+    core_ids = np.nonzero(core)[0]
+    labels[core_ids] = _find_roots(parent, core_ids)
+
+    # Border points join the cluster of a core neighbour: any core of a
+    # fully-within node, otherwise the nearest core within eps.
+    for _, members, full, partial in neighbours:
+        members = members[~core[members]]
+        if not len(members):
+            continue
+        linked = first_core[full]
+        linked = linked[linked >= 0]
+        if len(linked):
+            labels[members] = labels[linked[0]]
+            continue
+        others = _gather(tree, partial)
+        others = others[core[others]]
+        if len(others):
+            labels[members] = _nearest_labels(
+                points[members], points[others], labels[others], eps
+            )
+    return labels, core
+
+
+def _nearest_labels(
+    queries: np.ndarray,
+    references: np.ndarray,
+    reference_labels: np.ndarray,
+    eps: float,
+) -> np.ndarray:
+    labels = np.full(len(queries), NOISE_LABEL, dtype=np.int64)
+    step = max(1, _BLOCK_CELLS // max(len(references), 1))
+    for first in range(0, len(queries), step):
+        block = slice(first, first + step)
+        distances = _pairwise_sq_distances(queries[block], references)
+        nearest = np.argmin(distances, axis=1)
+        found = distances[np.arange(len(distances)), nearest] <= eps * eps
+        labels[block] = np.where(found, reference_labels[nearest], NOISE_LABEL)
+    return labels
+
+
+def _assign_to_core(
+    queries: np.ndarray,
+    core_points: np.ndarray,
+    core_labels: np.ndarray,
+    eps: float,
+) -> np.ndarray:
+    """
+    Labels each query with the cluster of a core point within eps, or noise.
+    Queries are grouped by the leaves of their own KD-tree; a group lying
+    entirely within eps of a core node takes that node's label without
+    computing point distances. Otherwise core leaves are compared nearest
+    box first, about _ASSIGN_BATCH core points at a time, and a query takes
+    the nearest core within eps of the first batch that has one: any core
+    within eps is a valid DBSCAN border assignment, and most queries are
+    settled by the first batch.
+    The core leaves overlapping a group's box are searched first; only
+    groups with queries still unlabelled then search everything within eps
+    of their box, which for a wide eps is far more leaves.
+    """
+    labels = np.full(len(queries), NOISE_LABEL, dtype=np.int64)
+    if not len(core_points):
+        return labels
+
+    tree = KDTree(core_points)
+    node_labels = core_labels[tree.order[tree.start]]
+
+    # Leaves of a second tree over the queries give tight query groups;
+    # sorted by start, so a query's position in order finds its leaf.
+    query_tree = KDTree(queries, leaf_size=128)
+    leaves = query_tree.leaves[np.argsort(query_tree.start[query_tree.leaves])]
+    _assign_leaves(query_tree, leaves, tree, core_labels, node_labels, 0.0, eps, labels)
+    unsettled = np.flatnonzero(labels[query_tree.order] == NOISE_LABEL)
+    owners = np.searchsorted(query_tree.start[leaves], unsettled, side="right") - 1
+    _assign_leaves(
+        query_tree, leaves[np.unique(owners)], tree, core_labels, node_labels, eps, eps, labels
+    )
+    return labels
+
+
+def _assign_leaves(
+    query_tree: KDTree,
+    leaves: np.ndarray,
+    tree: KDTree,
+    core_labels: np.ndarray,
+    node_labels: np.ndarray,
+    radius: float,
+    eps: float,
+    labels: np.ndarray,
+) -> None:
+    # Matches the leaves QUERY_BLOCK at a time to bound the (box, node) pairs
+    for first in range(0, len(leaves), QUERY_BLOCK):
+        _assign_block(
+            query_tree, leaves[first:first + QUERY_BLOCK], tree, core_labels, node_labels,
+            radius, eps, labels,
+        )
+
+
+def _assign_block(
+    query_tree: KDTree,
+    leaves: np.ndarray,
+    tree: KDTree,
+    core_labels: np.ndarray,
+    node_labels: np.ndarray,
+    radius: float,
+    eps: float,
+    labels: np.ndarray,
+) -> None:
+    queries, core_points = query_tree.points, tree.points
+    box_lo, box_hi = query_tree.lo[leaves], query_tree.hi[leaves]
+    boxes, nodes, full = tree.query_boxes(box_lo, box_hi, radius)
+    full_nodes = _group(boxes[full], nodes[full])
+
+    boxes, nodes = boxes[~full], nodes[~full]
+    gaps = np.maximum(
+        np.maximum(tree.lo[nodes] - box_hi[boxes], box_lo[boxes] - tree.hi[nodes]), 0.0
+    )
+    order = np.lexsort((np.einsum("ij,ij->i", gaps, gaps), boxes))
+    boxes, nodes = boxes[order], nodes[order]
+    starts = _run_starts(boxes)
+    for box, nearby in zip(boxes[starts].tolist(), np.split(nodes, starts[1:])):
+        if box in full_nodes:
+            continue
+        pending = query_tree.members(leaves[box])
+        pending = pending[labels[pending] == NOISE_LABEL]
+        if not len(pending):
+            continue
+        filled = np.cumsum(tree.end[nearby] - tree.start[nearby])
+        cuts = np.unique(np.searchsorted(filled, np.arange(_ASSIGN_BATCH, filled[-1], _ASSIGN_BATCH)) + 1)
+        for batch in np.split(nearby, cuts[cuts < len(nearby)]):
+            references = _gather(tree, batch)
+            found = _nearest_labels(
+                queries[pending], core_points[references], core_labels[references], eps
+            )
+            hit = found != NOISE_LABEL
+            labels[pending[hit]] = found[hit]
+            pending = pending[~hit]
+            if not len(pending):
+                break
+    for box, matched in full_nodes.items():
+        labels[query_tree.members(leaves[box])] = node_labels[matched[0]]
+
+
+def k_distance_eps(points: np.ndarray, min_samples: int, seed: int = 0) -> float:
+    """
+    DBSCAN radius at the knee of the k-distance curve: every point's
+    distance to its min_samples-th nearest point (itself included, as
+    DBSCAN counts it), sorted. The knee is the point farthest below the
+    chord from the smallest to the largest distance; past it distances
+    climb steeply, so points there sit in sparse regions and become noise.
+    Distances are measured from at most KNEE_SAMPLE of the points, to all
+    of them.
+    """
+    if len(points) < 2:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    queries = points
+    if len(points) > KNEE_SAMPLE:
+        queries = points[rng.choice(len(points), size=KNEE_SAMPLE, replace=False)]
+    k = min(min_samples, len(points)) - 1
+    distances = np.empty(len(queries), dtype=np.float64)
+    step = max(1, _BLOCK_CELLS // len(points))
+    for first in range(0, len(queries), step):
+        block = _pairwise_sq_distances(queries[first:first + step], points)
+        distances[first:first + step] = np.partition(block, k, axis=1)[:, k]
+    distances = np.sort(np.sqrt(distances))
+
+    spread = distances[-1] - distances[0]
+    if spread <= 0:
+        return float(distances[-1]) or 1.0
+    below_chord = np.linspace(0.0, 1.0, len(distances)) - (distances - distances[0]) / spread
+    return float(distances[np.argmax(below_chord)])
+
+
 def cluster_embeddings(
-    embeddings: List[List[float]],
-    min_cluster_size: int = 3
+    embeddings: Union[np.ndarray, Sequence[Sequence[float]]],
+    min_cluster_size: int = 3,
+    eps: Optional[float] = None,
+    max_points: int = 20000,
+    seed: int = 0,
 ) -> Dict[int, List[int]]:
     """
-    Simple placeholder clustering.
-    Replace internals with HDBSCAN later without changing signature.
+    Density-based (DBSCAN) clustering of chunk embeddings.
+    Embeddings are standardized per column; points with at least
+    min_cluster_size neighbours within eps are core points, and connected
+    core points plus their border points form a cluster. Points near no
+    core point are returned under NOISE_LABEL. Without eps, it is chosen
+    from the standardized points by k_distance_eps.
+    Neighbour queries go through a KD-tree. Above max_points, a random
+    sample is clustered and every other point joins the cluster of a core
+    sample point within eps.
     """
-    if not embeddings:
+    if len(embeddings) == 0:
         return {}
 
-    clusters: Dict[int, List[int]] = {}
-    cluster_id = 0
+    points = np.asarray(embeddings, dtype=np.float64).reshape(len(embeddings), -1)
+    scale = points.std(axis=0)
+    scale[scale == 0] = 1.0
+    points = (points - points.mean(axis=0)) / scale
+
+    if len(points) > max_points:
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(len(points), size=max_points, replace=False))
+        if eps is None:
+            eps = k_distance_eps(points[sample], min_cluster_size, seed)
+        sample_labels, sample_core = _dbscan(points[sample], eps, min_cluster_size)
+
+        labels = np.full(len(points), NOISE_LABEL, dtype=np.int64)
+        labels[sample] = sample_labels
+        rest = np.ones(len(points), dtype=bool)
+        rest[sample] = False
+        core = sample[sample_core]
+        labels[rest] = _assign_to_core(points[rest], points[core], labels[core], eps)
+    else:
+        if eps is None:
+            eps = k_distance_eps(points, min_cluster_size, seed)
+        labels, _ = _dbscan(points, eps, min_cluster_size)
 
-    for idx, _ in enumerate(embeddings):
-        clusters.setdefault(cluster_id, []).append(idx)
-        if len(clusters[cluster_id]) >= min_cluster_size:
-            cluster_id += 1
+    # Number clusters by their first member so the output is deterministic.
+    roots, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    clustered = roots != NOISE_LABEL
+    cluster_ids = np.full(len(roots), NOISE_LABEL, dtype=np.int64)
+    cluster_ids[clustered] = np.argsort(np.argsort(first[clustered]))
+    labels = cluster_ids[inverse]
 
-    return clusters
\ No newline at end of file
+    groups = _group(labels, np.arange(len(labels)))
+    clusters: Dict[int, List[int]] = {
+        cluster_id: groups[cluster_id].tolist()
+        for cluster_id in sorted(groups)
+        if cluster_id != NOISE_LABEL
+    }
+    if NOISE_LABEL in groups:
+        clusters[NOISE_LABEL] = groups[NOISE_LABEL].tolist()
+    return clusters
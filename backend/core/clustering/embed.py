@@ -1 +1,385 @@
-ph
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+
+# Odd multiplier of the polynomial rolling hash; odd so that it is
+# invertible modulo 2**64 and window hashes come from one prefix sum.
+_BASE = 0x100000001B3
+_BASE_INVERSE = pow(_BASE, -1, 1 << 64)
+
+# Salts keep word n-grams and character n-grams of equal text apart.
+_WORD_SALT = 0x9E3779B97F4A7C15
+_CHAR_SALT = 0xC2B2AE3D27D4EB4F
+
+# Joins the texts of a block; not a word character, so words never span
+# texts, and character windows across it are dropped.
+_SEPARATOR = "\n"
+
+
+@dataclass(frozen=True)
+class EmbeddingConfig:
+    """
+    dim: width of the dense embeddings; density clustering degrades
+    quickly above about 8.
+    n_features: hashed n-gram buckets (a power of two).
+    word_ngrams / char_ngrams: inclusive (min, max) n-gram lengths; None
+    turns that kind off. Character n-grams run over the lowercased text;
+    they add robustness to spelling variants but blur topics, since most
+    texts share common ones.
+    tfidf: weight n-grams by inverse document frequency over the texts
+    embedded together, estimated from up to idf_sample of them.
+    reduction: "svd" (truncated SVD, i.e. latent semantic analysis, fitted
+    on up to svd_sample texts) or "random" (fixed sparse random
+    projection: no fitting, but needs far more dimensions to keep topics
+    apart).
+    block_size: texts hashed at once; bounds memory independently of the
+    number of texts.
+    """
+
+    dim: int = 8
+    n_features: int = 1 << 18
+    word_ngrams: Optional[Tuple[int, int]] = (1, 2)
+    char_ngrams: Optional[Tuple[int, int]] = None
+    tfidf: bool = True
+    idf_sample: int = 50_000
+    reduction: str = "svd"
+    svd_sample: int = 5000
+    block_size: int = 4096
+    seed: int = 0
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer; spreads polynomial hashes over all 64 bits
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+@lru_cache(maxsize=1)
+def _word_characters() -> np.ndarray:
+    # Basic Multilingual Plane lookup; code points above it are not words
+    table = np.fromiter(
+        (chr(code).isalnum() or code == 0x5F for code in range(0x10000)),
+        dtype=bool,
+        count=0x10000,
+    )
+    table[0xFFFF] = False
+    return table
+
+
+def _powers(base: int, count: int) -> np.ndarray:
+    # base**0 .. base**(count - 1) modulo 2**64
+    powers = np.full(count, base, dtype=np.uint64)
+    powers[0] = 1
+    with np.errstate(over="ignore"):
+        return np.cumprod(powers, dtype=np.uint64)
+
+
+class _Block:
+    """
+    Lowercased code points of a block of texts, with the prefix sums that
+    give the polynomial hash of any window in O(1).
+    """
+
+    def __init__(self, texts: Sequence[str]) -> None:
+        lowered = [text.lower() for text in texts]
+        joined = _SEPARATOR.join(lowered) + _SEPARATOR
+        self.codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+        lengths = np.fromiter(
+            (len(text) + 1 for text in lowered), dtype=np.int64, count=len(lowered)
+        )
+        # Row of each position; separators belong to no row.
+        self.rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        self.rows[np.cumsum(lengths) - 1] = -1
+        size = len(self.codes)
+        self.powers = _powers(_BASE, size + 1)
+        prefix = np.zeros(size + 1, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            np.cumsum(
+                self.codes.astype(np.uint64) * _powers(_BASE_INVERSE, size),
+                dtype=np.uint64,
+                out=prefix[1:],
+            )
+        self.prefix = prefix
+
+    def window_hashes(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        # sum(codes[j] * BASE**(end - 1 - j)) over each window [start, end)
+        with np.errstate(over="ignore"):
+            return (self.prefix[ends] - self.prefix[starts]) * self.powers[ends - 1]
+
+
+def _word_features(
+    block: _Block, lengths: Tuple[int, int]
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    is_word = _word_characters()[np.minimum(block.codes, 0xFFFF)]
+    edges = np.diff(np.concatenate(([False], is_word, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    words = _mix(block.window_hashes(starts, ends))
+    rows = block.rows[starts]
+    for n in range(lengths[0], lengths[1] + 1):
+        count = len(words) - n + 1
+        if count <= 0:
+            break
+        # Only n consecutive words of the same text form an n-gram.
+        keep = rows[: count] == rows[n - 1:]
+        hashes = np.full(count, _WORD_SALT + n, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for offset in range(n):
+                hashes = hashes * np.uint64(_BASE) + words[offset: offset + count]
+        yield rows[: count][keep], _mix(hashes[keep])
+
+
+def _char_features(
+    block: _Block, lengths: Tuple[int, int]
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    positions = np.arange(len(block.codes), dtype=np.int64)
+    for n in range(lengths[0], lengths[1] + 1):
+        starts = positions[: max(len(positions) - n + 1, 0)]
+        rows = block.rows[starts]
+        keep = (rows >= 0) & (rows == block.rows[starts + n - 1])
+        starts = starts[keep]
+        with np.errstate(over="ignore"):
+            hashes = block.window_hashes(starts, starts + n) + np.uint64(_CHAR_SALT + n)
+        yield rows[keep], _mix(hashes)
+
+
+def _runs(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Distinct values of a sorted array and where each run starts
+    if not len(keys):
+        return keys, np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], starts
+
+
+def _hashed_counts(
+    texts: Sequence[str], config: EmbeddingConfig
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Signed hashed n-gram counts of one block as parallel (row, bucket,
+    count) arrays sorted by (row, bucket). Signed hashing keeps bucket
+    collisions unbiased: an n-gram adds +1 or -1 by one bit of its hash.
+    """
+    block = _Block(texts)
+    parts = []
+    if config.word_ngrams is not None:
+        parts.extend(_word_features(block, config.word_ngrams))
+    if config.char_ngrams is not None:
+        parts.extend(_char_features(block, config.char_ngrams))
+    if not parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    rows = np.concatenate([row for row, _ in parts])
+    hashes = np.concatenate([hashed for _, hashed in parts])
+
+    # One sort of (row, bucket, sign) keys counts every distinct n-gram
+    # bucket; np.sort is much faster than np.unique here.
+    buckets = (hashes & np.uint64(config.n_features - 1)).astype(np.int64)
+    negative = (hashes >> np.uint64(63)).astype(np.int64)
+    keys, starts = _runs(np.sort((rows * config.n_features + buckets) * 2 + negative))
+    counts = np.diff(np.append(starts, len(rows)))
+    signed = np.where(keys & 1, -counts, counts)
+    cells, starts = _runs(keys >> 1)
+    rows, buckets = np.divmod(cells, config.n_features)
+    return rows, buckets, np.add.reduceat(signed, starts).astype(np.float32)
+
+
+def _blocks(count: int, size: int) -> Iterator[slice]:
+    for first in range(0, count, max(size, 1)):
+        yield slice(first, min(first + size, count))
+
+
+def hash_ngrams(
+    texts: Sequence[str], config: EmbeddingConfig = EmbeddingConfig()
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Signed hashed n-gram counts of texts as a CSR matrix (indptr, indices,
+    data) with config.n_features columns; row i's entries are
+    indices[indptr[i]:indptr[i + 1]], sorted, with their counts in data.
+    """
+    rows, indices, data = _hashed_counts(texts, config)
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(texts)), out=indptr[1:])
+    return indptr, indices, data
+
+
+def document_frequencies(
+    texts: Sequence[str], config: EmbeddingConfig = EmbeddingConfig()
+) -> np.ndarray:
+    """
+    Number of texts containing each hashed bucket, one block at a time.
+    """
+    frequencies = np.zeros(config.n_features, dtype=np.int64)
+    for block in _blocks(len(texts), config.block_size):
+        _, buckets, _ = _hashed_counts(texts[block], config)
+        frequencies += np.bincount(buckets, minlength=config.n_features)
+    return frequencies
+
+
+def _idf(frequencies: np.ndarray, count: int) -> np.ndarray:
+    # Smoothed, as if one extra text contained every n-gram
+    return (np.log((1 + count) / (1 + frequencies)) + 1).astype(np.float32)
+
+
+@lru_cache(maxsize=4)
+def _random_projection(n_features: int, dim: int, seed: int) -> np.ndarray:
+    """
+    (dim, n_features) sparse random projection: entries are +-sqrt(3/dim)
+    with probability 1/6 each and 0 otherwise (Achlioptas), which preserves
+    distances in expectation.
+    """
+    rng = np.random.default_rng(seed)
+    choice = rng.integers(0, 6, size=(dim, n_features), dtype=np.int8)
+    scale = np.float32(np.sqrt(3.0 / dim))
+    projection = np.zeros((dim, n_features), dtype=np.float32)
+    projection[choice == 0] = scale
+    projection[choice == 1] = -scale
+    projection.setflags(write=False)
+    return projection
+
+
+def _project(
+    rows: np.ndarray,
+    buckets: np.ndarray,
+    weights: np.ndarray,
+    projection: np.ndarray,
+    count: int,
+) -> np.ndarray:
+    # Sparse rows times projection.T, one output column at a time so that
+    # memory stays O(nonzeros).
+    out = np.empty((count, len(projection)), dtype=np.float32)
+    for column, basis in enumerate(projection):
+        out[:, column] = np.bincount(rows, weights=weights * basis[buckets], minlength=count)
+    return out
+
+
+def _sample_rows(count: int, size: int) -> np.ndarray:
+    # Evenly spread, so a time-ordered input is sampled across its range
+    return np.unique(np.linspace(0, count - 1, num=min(size, count)).astype(np.int64))
+
+
+def _fit_svd(
+    texts: Sequence[str], idf: Optional[np.ndarray], config: EmbeddingConfig
+) -> np.ndarray:
+    """
+    (dim, n_features) top right singular vectors of the weighted n-gram
+    matrix of a sample of texts, by randomized SVD restricted to the
+    buckets the sample uses.
+    """
+    sample = [texts[row] for row in _sample_rows(len(texts), config.svd_sample).tolist()]
+    parts = []
+    for block in _blocks(len(sample), config.block_size):
+        rows, buckets, weights = _hashed_counts(sample[block], config)
+        parts.append((rows + block.start, buckets, weights))
+    rows, buckets, weights = (np.concatenate(column) for column in zip(*parts)) if parts else (
+        np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    )
+    if idf is not None:
+        weights = weights * idf[buckets]
+    used = np.flatnonzero(np.bincount(buckets, minlength=config.n_features))
+    columns = np.searchsorted(used, buckets)
+    rank = min(config.dim, len(sample), len(used))
+    components = np.zeros((config.dim, config.n_features), dtype=np.float32)
+    if not rank:
+        return components
+
+    # Per-row norms, so long texts do not dominate the fitted directions
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(sample)))
+    weights = weights / np.maximum(norms, 1e-12)[rows]
+
+    def times(dense: np.ndarray) -> np.ndarray:
+        # sample matrix @ dense, a column at a time
+        return np.stack(
+            [np.bincount(rows, weights=weights * part[columns], minlength=len(sample)) for part in dense.T],
+            axis=1,
+        )
+
+    def transposed_times(dense: np.ndarray) -> np.ndarray:
+        # sample matrix.T @ dense
+        return np.stack(
+            [np.bincount(columns, weights=weights * part[rows], minlength=len(used)) for part in dense.T],
+            axis=1,
+        )
+
+    rng = np.random.default_rng(config.seed)
+    width = min(rank + 8, len(used))
+    basis = np.linalg.qr(times(rng.standard_normal((len(used), width))))[0]
+    for _ in range(2):
+        # Power iterations sharpen the spectrum of sparse text matrices
+        basis = np.linalg.qr(times(np.linalg.qr(transposed_times(basis))[0]))[0]
+    _, _, right = np.linalg.svd(transposed_times(basis).T, full_matrices=False)
+    components[:rank, used] = right[:rank]
+    return components
+
+
+def _embed_shard(
+    texts: Sequence[str],
+    config: EmbeddingConfig,
+    idf: Optional[np.ndarray],
+    projection: Optional[np.ndarray],
+) -> np.ndarray:
+    # Runs in pool workers too; the random projection is rebuilt there
+    # from its seed rather than pickled.
+    if projection is None:
+        projection = _random_projection(config.n_features, config.dim, config.seed)
+    embeddings = np.zeros((len(texts), config.dim), dtype=np.float32)
+    for block in _blocks(len(texts), config.block_size):
+        rows, buckets, weights = _hashed_counts(texts[block], config)
+        if idf is not None:
+            weights = weights * idf[buckets]
+        embeddings[block] = _project(
+            rows, buckets, weights, projection, block.stop - block.start
+        )
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def embed_texts(
+    texts: Sequence[str],
+    config: EmbeddingConfig = EmbeddingConfig(),
+    executor: Optional[Executor] = None,
+    parts: int = 1,
+) -> np.ndarray:
+    """
+    Dense (len(texts), config.dim) float32 embeddings from hashed word and
+    character n-grams, optionally TF-IDF weighted, reduced to config.dim
+    and L2-normalized; ready for cluster_embeddings. Runs on CPU in
+    config.block_size blocks, so memory is bounded by one block's n-grams
+    and the projection whatever the number of texts. Document frequencies
+    come from up to config.idf_sample texts spread over the input. With an
+    executor, contiguous shards of whole blocks are embedded in parallel;
+    the result does not depend on it.
+    """
+    texts = list(texts)
+    idf = None
+    if config.tfidf and texts:
+        sample = _sample_rows(len(texts), config.idf_sample).tolist()
+        idf = _idf(document_frequencies([texts[row] for row in sample], config), len(sample))
+    if config.reduction == "svd":
+        projection: Optional[np.ndarray] = _fit_svd(texts, idf, config)
+    elif config.reduction == "random":
+        projection = None
+    else:
+        raise ValueError(f"Unknown reduction: {config.reduction!r}")
+
+    if executor is None or parts < 2 or len(texts) <= config.block_size:
+        return _embed_shard(texts, config, idf, projection)
+    blocks = -(-len(texts) // config.block_size)
+    step = -(-blocks // parts) * config.block_size
+    shards = [texts[first:first + step] for first in range(0, len(texts), step)]
+    return np.concatenate(
+        list(
+            executor.map(
+                _embed_shard,
+                shards,
+                repeat(config),
+                repeat(idf),
+                repeat(projection),
+            )
+        )
+    )
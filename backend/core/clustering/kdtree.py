@@ -0,0 +1,124 @@
+from typing import List, Tuple
+import numpy as np
+
+# Query boxes walked together; bounds the (box, node) frontier, which grows
+# with the radius.
+QUERY_BLOCK = 128
+
+
+class KDTree:
+    """
+    Static KD-tree over a point set, stored as flat arrays.
+    Each node keeps the tight bounding box of its points; leaves hold
+    at most leaf_size points as a contiguous range of `order`.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 32) -> None:
+        self.points = np.asarray(points, dtype=np.float64)
+        count, dims = self.points.shape
+        self.order = np.arange(count)
+
+        lo: List[np.ndarray] = []
+        hi: List[np.ndarray] = []
+        left: List[int] = []
+        right: List[int] = []
+        split_dim: List[int] = []
+        split_value: List[float] = []
+        start: List[int] = []
+        end: List[int] = []
+
+        def add_node(first: int, last: int) -> int:
+            members = self.points[self.order[first:last]]
+            lo.append(members.min(axis=0) if last > first else np.zeros(dims))
+            hi.append(members.max(axis=0) if last > first else np.zeros(dims))
+            for column in (left, right, split_dim):
+                column.append(-1)
+            split_value.append(0.0)
+            start.append(first)
+            end.append(last)
+            return len(start) - 1
+
+        stack = [add_node(0, count)]
+        while stack:
+            node = stack.pop()
+            first, last = start[node], end[node]
+            if last - first <= leaf_size:
+                continue
+
+            dim = int(np.argmax(hi[node] - lo[node]))
+            ids = self.order[first:last]
+            values = self.points[ids, dim]
+            middle = (last - first) // 2
+            partition = np.argpartition(values, middle)
+            self.order[first:last] = ids[partition]
+
+            split_dim[node] = dim
+            split_value[node] = float(values[partition[middle]])
+            left[node] = add_node(first, first + middle)
+            right[node] = add_node(first + middle, last)
+            stack.extend((left[node], right[node]))
+
+        self.lo = np.array(lo).reshape(-1, dims)
+        self.hi = np.array(hi).reshape(-1, dims)
+        self.left = np.array(left)
+        self.right = np.array(right)
+        self.split_dim = np.array(split_dim)
+        self.split_value = np.array(split_value)
+        self.start = np.array(start)
+        self.end = np.array(end)
+        self.leaves = np.nonzero(self.left < 0)[0]
+
+    def members(self, node: int) -> np.ndarray:
+        return self.order[self.start[node]:self.end[node]]
+
+    def query_boxes(
+        self, lo: np.ndarray, hi: np.ndarray, radius: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Finds the nodes within radius of each query box.
+        Returns parallel arrays of (query box index, node, full). A full node
+        lies entirely within radius of the box (every pair of points is
+        within radius) and is not descended into; other matches are leaves.
+        The tree is walked one level at a time for QUERY_BLOCK boxes together.
+        """
+        lo = np.asarray(lo, dtype=np.float64).reshape(-1, self.lo.shape[1])
+        hi = np.asarray(hi, dtype=np.float64).reshape(-1, self.lo.shape[1])
+        limit = radius * radius
+        found_boxes: List[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+        found_nodes: List[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+        found_full: List[np.ndarray] = [np.zeros(0, dtype=bool)]
+        for first in range(0, len(lo), QUERY_BLOCK):
+            boxes = np.arange(first, min(first + QUERY_BLOCK, len(lo)))
+            self._walk(lo, hi, limit, boxes, found_boxes, found_nodes, found_full)
+        return (
+            np.concatenate(found_boxes),
+            np.concatenate(found_nodes),
+            np.concatenate(found_full),
+        )
+
+    def _walk(
+        self,
+        lo: np.ndarray,
+        hi: np.ndarray,
+        limit: float,
+        boxes: np.ndarray,
+        found_boxes: List[np.ndarray],
+        found_nodes: List[np.ndarray],
+        found_full: List[np.ndarray],
+    ) -> None:
+        nodes = np.zeros(len(boxes), dtype=np.int64)
+        while len(nodes):
+            node_lo, node_hi = self.lo[nodes], self.hi[nodes]
+            box_lo, box_hi = lo[boxes], hi[boxes]
+            gap = np.maximum(np.maximum(node_lo - box_hi, box_lo - node_hi), 0.0)
+            near = np.einsum("ij,ij->i", gap, gap) <= limit
+            far = np.maximum(node_hi - box_lo, box_hi - node_lo)
+            full = near & (np.einsum("ij,ij->i", far, far) <= limit)
+            done = full | (near & (self.left[nodes] < 0))
+            found_boxes.append(boxes[done])
+            found_nodes.append(nodes[done])
+            found_full.append(full[done])
+            descend = near & ~done
+            boxes, nodes = boxes[descend], nodes[descend]
+            boxes = np.concatenate([boxes, boxes])
+            nodes = np.concatenate([self.left[nodes], self.right[nodes]])
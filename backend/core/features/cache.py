@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+_SQLITE_BATCH = 500
+
+
+class FeatureCache:
+    """
+    Content-addressed cache of per-chunk feature rows.
+    Keys hash the chunk text together with the features version, so bumping
+    the version invalidates every entry. An in-process LRU tier of at most
+    max_entries rows sits in front of an optional SQLite file.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        path: Optional[str | Path] = None,
+    ) -> None:
+        self.version = version
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(self.version.encode("utf-8") + b"\0", digest_size=16)
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            for key in keys:
+                row = self._memory.get(key)
+                if row is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = row
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self.path is not None:
+                from_disk = self._read_disk(missing)
+                found.update(from_disk)
+                for key, row in from_disk.items():
+                    self._remember(key, row)
+
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return {key: np.frombuffer(row, dtype=np.float64) for key, row in found.items()}
+
+    def put_many(self, keys: Sequence[bytes], rows: np.ndarray) -> None:
+        encoded = [
+            np.ascontiguousarray(row, dtype=np.float64).tobytes() for row in rows
+        ]
+        with self._lock:
+            for key, row in zip(keys, encoded):
+                self._remember(key, row)
+            if self.path is not None:
+                self._write_disk(list(zip(keys, encoded)))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: bytes, row: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = row
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feature_cache (
+                    key BLOB PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    vector BLOB NOT NULL
+                )
+                """
+            )
+            self._db.commit()
+        return self._db
+
+    def _read_disk(self, keys: Sequence[bytes]) -> Dict[bytes, bytes]:
+        db = self._connection()
+        found: Dict[bytes, bytes] = {}
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = db.execute(
+                f"SELECT key, vector FROM feature_cache WHERE key IN ({placeholders})",
+                batch,
+            )
+            found.update((bytes(key), bytes(vector)) for key, vector in rows)
+        return found
+
+    def _write_disk(self, entries: Sequence[tuple]) -> None:
+        db = self._connection()
+        db.executemany(
+            "INSERT OR REPLACE INTO feature_cache (key, version, vector) VALUES (?, ?, ?)",
+            [(key, self.version, row) for key, row in entries],
+        )
+        db.commit()
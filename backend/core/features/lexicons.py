@@ -0,0 +1,88 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple, Union
+
+
+@dataclass(frozen=True)
+class Lexicon:
+    """
+    A named, versioned list of words and multi-word phrases.
+    Bump the version, and FEATURES_VERSION, whenever the phrases change.
+    """
+
+    name: str
+    version: str
+    phrases: Tuple[str, ...]
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "Lexicon":
+        """
+        Loads {"name": ..., "version": ..., "phrases": [...]} from JSON.
+        """
+        with open(path, encoding="utf-8") as handle:
+            payload = json.load(handle)
+        return cls(payload["name"], str(payload["version"]), tuple(payload["phrases"]))
+
+
+HEDGES = Lexicon(
+    "hedges",
+    "1",
+    (
+        "maybe", "perhaps", "possibly", "probably", "presumably", "apparently",
+        "arguably", "likely", "unlikely", "might", "may", "could", "would",
+        "seem", "seems", "seemed", "appear", "appears", "appeared",
+        "suggest", "suggests", "suggested", "somewhat", "roughly",
+        "approximately", "relatively", "fairly", "rather", "almost",
+        "generally", "usually", "typically", "sometimes", "often",
+        "i think", "i believe", "i guess", "i suppose", "i feel", "i assume",
+        "we think", "we believe", "it seems", "it seems that",
+        "it appears that", "it looks like", "sort of", "kind of",
+        "more or less", "to some extent", "in some cases", "in my opinion",
+        "not sure", "not certain", "tend to", "tends to", "as far as i know",
+    ),
+)
+
+ABSTRACTIONS = Lexicon(
+    "abstractions",
+    "1",
+    (
+        "concept", "concepts", "framework", "frameworks", "principle",
+        "principles", "strategy", "strategies", "structure", "structures",
+        "system", "systems", "model", "models", "pattern", "patterns",
+        "process", "processes", "approach", "approaches", "theory",
+        "theories", "paradigm", "abstraction", "abstractions", "idea",
+        "ideas", "notion", "perspective", "vision", "mission", "value",
+        "values", "alignment", "impact", "outcome", "outcomes", "capability",
+        "capabilities", "dynamics", "ecosystem", "architecture",
+        "in general", "in principle", "in theory", "at a high level",
+        "big picture", "the bigger picture", "long term", "high level",
+        "best practice", "best practices", "root cause", "first principles",
+    ),
+)
+
+LOGICAL_CONNECTIVES = Lexicon(
+    "logical_connectives",
+    "1",
+    (
+        "if", "then", "because", "therefore", "however", "but", "thus",
+        "hence", "so", "since", "although", "though", "unless", "whereas",
+        "otherwise", "consequently", "moreover", "furthermore", "nevertheless",
+        "nonetheless", "instead", "meanwhile", "as a result", "in contrast",
+        "on the other hand", "for example", "for instance", "in addition",
+        "due to", "so that", "even though", "as long as", "in order to",
+        "which means", "this means that", "that is why", "it follows that",
+    ),
+)
+
+ORDERING_MARKERS = Lexicon(
+    "ordering_markers",
+    "1",
+    (
+        "first", "second", "third", "fourth", "fifth", "firstly", "secondly",
+        "thirdly", "lastly", "finally", "next", "afterwards", "subsequently",
+        "first of all", "to begin with", "to start with", "in the first place",
+        "after that", "last but not least", "step one", "step two",
+        "step three", "in conclusion", "to conclude",
+    ),
+)
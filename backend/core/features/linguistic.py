@@ -1 +1,77 @@
+from functools import lru_cache
+from typing import Dict, Optional, Sequence
+import re
 
+import numpy as np
+
+from backend.core.features.lexicons import (
+    ABSTRACTIONS,
+    HEDGES,
+    LOGICAL_CONNECTIVES,
+    ORDERING_MARKERS,
+)
+from backend.core.features.matcher import PhraseMatcher
+from backend.core.schemas import FEATURE_FIELDS
+
+# Feature column filled from each lexicon, in matcher lexicon order
+FEATURE_LEXICONS = {
+    "logical_operator_ratio": LOGICAL_CONNECTIVES,
+    "hedging_frequency": HEDGES,
+    "abstraction_level": ABSTRACTIONS,
+}
+
+# A list item: "1.", "b)", "-", "*" or "•" opening a line
+_LIST_ITEM_RE = re.compile(r"^[ \t]*(?:\d{1,3}[.)]|[a-z][.)]|[-*•])[ \t]+\S", re.MULTILINE)
+
+_COLUMNS = [FEATURE_FIELDS.index(field) for field in FEATURE_LEXICONS]
+_ORDERING_COLUMN = FEATURE_FIELDS.index("ordering_strength")
+
+# Texts scanned together; bounds the per-word scan state.
+SCAN_BLOCK = 8192
+
+
+@lru_cache(maxsize=1)
+def default_matcher() -> PhraseMatcher:
+    return PhraseMatcher([*FEATURE_LEXICONS.values(), ORDERING_MARKERS])
+
+
+def _has_list_item(text: str) -> bool:
+    return bool(_LIST_ITEM_RE.match(text) or ("\n" in text and _LIST_ITEM_RE.search(text)))
+
+
+def extract_linguistic_features(text: str) -> Dict[str, float]:
+    row = extract_linguistic_features_batch([text])[0]
+    fields = [*FEATURE_LEXICONS, "ordering_strength"]
+    return {field: float(row[FEATURE_FIELDS.index(field)]) for field in fields}
+
+
+def extract_linguistic_features_batch(
+    texts: Sequence[str],
+    matcher: Optional[PhraseMatcher] = None,
+) -> np.ndarray:
+    """
+    Extracts lexicon features for a batch of texts.
+    Each lexicon feature is the share of words inside at least one phrase of
+    its lexicon, so "it seems that" counts three hedged words, not three
+    hedges. ordering_strength is 1.0 for a text with a sequence marker or a
+    list item; sequential_features averages it over neighbouring chunks.
+    A custom matcher must list the FEATURE_LEXICONS lexicons, in order,
+    then ORDERING_MARKERS.
+    Returns a float matrix with one row per text and columns in FEATURE_FIELDS order;
+    columns this module does not produce are left at 0.0.
+    """
+    matrix = np.zeros((len(texts), len(FEATURE_FIELDS)), dtype=np.float64)
+    if not len(texts):
+        return matrix
+
+    matcher = matcher or default_matcher()
+    texts = list(texts)
+    for start in range(0, len(texts), SCAN_BLOCK):
+        words, matches, covered = matcher.scan(texts[start:start + SCAN_BLOCK])
+        block = slice(start, start + len(words))
+        matrix[block, _COLUMNS] = covered[:, :len(_COLUMNS)] / np.maximum(words, 1)[:, None]
+        matrix[block, _ORDERING_COLUMN] = matches[:, len(_COLUMNS)] > 0
+
+    listed = np.fromiter(map(_has_list_item, texts), dtype=bool, count=len(texts))
+    matrix[listed, _ORDERING_COLUMN] = 1.0
+    return matrix
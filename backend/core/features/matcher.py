@@ -0,0 +1,164 @@
+import re
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+from backend.core.features.lexicons import Lexicon
+
+# Words are runs of letters and digits, keeping inner apostrophes ("don't").
+_WORD_RE = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class PhraseMatcher:
+    """
+    Word-level Aho-Corasick automaton over several lexicons.
+    Phrases are tokenized like the texts, so "It seems, that" matches
+    "it seems that". Compilation turns the trie and its failure links into
+    a sparse DFA: one sorted (state, word) -> state table holding only the
+    transitions that differ from those of the root. A scan then costs one
+    table lookup per word, whatever the number of phrases, and runs over a
+    whole batch of texts at once: all texts advance a word per step.
+    """
+
+    def __init__(self, lexicons: Sequence[Lexicon]) -> None:
+        self.lexicons = tuple(lexicons)
+        self.vocabulary: Dict[str, int] = {}
+        children: List[Dict[int, int]] = [{}]
+        depth = [0]
+        # Longest phrase of each lexicon ending exactly at each state
+        ends: List[Dict[int, int]] = [{}]
+        for column, lexicon in enumerate(self.lexicons):
+            for phrase in lexicon.phrases:
+                words = tokenize(phrase)
+                if not words:
+                    continue
+                state = 0
+                for word in words:
+                    # Word ids start at 1; 0 stands for every other word.
+                    code = self.vocabulary.setdefault(word, len(self.vocabulary) + 1)
+                    if code not in children[state]:
+                        children[state][code] = len(children)
+                        children.append({})
+                        depth.append(depth[state] + 1)
+                        ends.append({})
+                    state = children[state][code]
+                ends[state][column] = min(len(words), np.iinfo(np.int16).max)
+
+        size = len(children)
+        fail = [0] * size
+        transitions: List[Dict[int, int]] = [{} for _ in range(size)]
+        longest = np.zeros((size, len(self.lexicons)), dtype=np.int16)
+        matches = np.zeros((size, len(self.lexicons)), dtype=np.int64)
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            # Breadth-first, so the failure state is complete already
+            if state:
+                transitions[state] = {
+                    code: target
+                    for code, target in transitions[fail[state]].items()
+                    if target != children[0].get(code, 0)
+                }
+                longest[state] = longest[fail[state]]
+                matches[state] = matches[fail[state]]
+            for column, length in ends[state].items():
+                longest[state, column] = length
+                matches[state, column] += 1
+            for code, child in children[state].items():
+                transitions[state][code] = child
+                if state:
+                    fallback = fail[state]
+                    while fallback and code not in children[fallback]:
+                        fallback = fail[fallback]
+                    fail[child] = children[fallback].get(code, 0)
+                queue.append(child)
+
+        self._width = len(self.vocabulary) + 1
+        root = np.zeros(self._width, dtype=np.int64)
+        for code, child in children[0].items():
+            root[code] = child
+        self._root = root
+        keys = [
+            (state * self._width + code, target)
+            for state in range(1, size)
+            for code, target in transitions[state].items()
+        ]
+        keys.sort()
+        self._keys = np.array([key for key, _ in keys], dtype=np.int64)
+        self._targets = np.array([target for _, target in keys], dtype=np.int64)
+        self._longest = longest
+        self._matches = matches
+
+    @property
+    def states(self) -> int:
+        return len(self._longest)
+
+    def _encode(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        # Word ids of all texts, concatenated, and the word count per text
+        vocabulary = self.vocabulary
+        tokens = [tokenize(text) for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        codes = np.fromiter(
+            (vocabulary.get(word, 0) for words in tokens for word in words),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        return codes, lengths
+
+    def _step(self, states: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        following = self._root[codes]
+        if not len(self._keys):
+            return following
+        keys = states * self._width + codes
+        found = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        hit = self._keys[found] == keys
+        following[hit] = self._targets[found[hit]]
+        return following
+
+    def scan(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (words, matches, covered): the word count of each text and,
+        per text and lexicon, the number of phrase occurrences (overlapping
+        and nested ones included) and the number of words inside at least
+        one occurrence.
+        """
+        codes, lengths = self._encode(texts)
+        columns = len(self.lexicons)
+        matches = np.zeros((len(texts), columns), dtype=np.int64)
+        covered = np.zeros((len(texts), columns), dtype=np.int64)
+        if not len(codes):
+            return lengths, matches, covered
+
+        # Longest texts first, so the texts still running at step t are a
+        # prefix of this order and the scan costs O(total words).
+        order = np.argsort(-lengths, kind="stable")
+        starts = (np.cumsum(lengths) - lengths)[order]
+        ascending = lengths[order][::-1]
+        running = len(order) - np.searchsorted(ascending, np.arange(ascending[-1]), side="right")
+        states = np.zeros(len(texts), dtype=np.int64)
+        # Longest phrase of each lexicon ending at each word position
+        reach = np.zeros((len(codes), columns), dtype=self._longest.dtype)
+        for step, active in enumerate(running.tolist()):
+            positions = starts[:active] + step
+            current = self._step(states[:active], codes[positions])
+            states[:active] = current
+            matches[:active] += self._matches[current]
+            reach[positions] = self._longest[current]
+
+        # A word is covered when an occurrence ending at most `longest - 1`
+        # words later reaches back to it; phrases never span texts.
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        for column in range(columns):
+            flags = np.zeros(len(codes), dtype=bool)
+            for back in range(int(reach[:, column].max())):
+                ends = np.flatnonzero(reach[:, column] > back)
+                flags[ends - back] = True
+            covered[:, column] = np.bincount(rows[flags], minlength=len(texts))
+
+        unsorted = np.empty_like(order)
+        unsorted[order] = np.arange(len(order))
+        return lengths, matches[unsorted], covered
@@ -0,0 +1,98 @@
+from typing import Sequence
+import numpy as np
+
+from backend.core.clustering.embed import EmbeddingConfig, hash_ngrams
+from backend.core.schemas import FEATURE_FIELDS
+
+# Chunks in the sliding window of the sequential pass
+SEQUENCE_WINDOW = 8
+
+# Signed hashed word buckets of the per-chunk topic signature
+SIGNATURE_DIM = 16
+
+# Columns extract_sequence_inputs adds after the FEATURE_FIELDS columns
+SEQUENCE_INPUTS = SIGNATURE_DIM
+
+# Chunks per step of the pass; bounds its memory on long histories.
+SEQUENCE_BLOCK = 65_536
+
+_SIGNATURE_CONFIG = EmbeddingConfig(
+    n_features=SIGNATURE_DIM, word_ngrams=(1, 1), tfidf=False
+)
+
+_DRIFT_COLUMN = FEATURE_FIELDS.index("topic_drift")
+_ORDERING_COLUMN = FEATURE_FIELDS.index("ordering_strength")
+
+
+def topic_signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    Unit-length signed word counts hashed into SIGNATURE_DIM buckets, one
+    row per text; all zeros for a text without words.
+    """
+    signatures = np.zeros((len(texts), SIGNATURE_DIM), dtype=np.float64)
+    for start in range(0, len(texts), _SIGNATURE_CONFIG.block_size):
+        block = texts[start:start + _SIGNATURE_CONFIG.block_size]
+        indptr, buckets, counts = hash_ngrams(block, _SIGNATURE_CONFIG)
+        rows = np.repeat(np.arange(len(block)), np.diff(indptr))
+        signatures[start + rows, buckets] = counts
+    norms = np.linalg.norm(signatures, axis=1, keepdims=True)
+    return np.divide(signatures, norms, out=signatures, where=norms > 0)
+
+
+def extract_sequence_inputs(texts: Sequence[str]) -> np.ndarray:
+    """
+    Per-chunk inputs of the sequential features, SEQUENCE_INPUTS columns
+    per text. They depend on the text alone, so they are cached with the
+    other feature columns.
+    """
+    return topic_signatures(list(texts))
+
+
+def sequential_features(
+    rows: np.ndarray,
+    window: int = SEQUENCE_WINDOW,
+    block: int = SEQUENCE_BLOCK,
+) -> np.ndarray:
+    """
+    Fills topic_drift and ordering_strength for one time-ordered chunk
+    stream. rows holds the FEATURE_FIELDS columns followed by the
+    extract_sequence_inputs columns; the result keeps the FEATURE_FIELDS
+    columns only.
+    topic_drift is 1 - cosine similarity between a chunk's topic signature
+    and the centroid of the window chunks before it (0 for the first chunk),
+    clipped to [0, 1]. ordering_strength becomes the mean of the per-chunk
+    values (1.0 for a chunk with a sequence marker or list item) over the
+    last window chunks, the chunk itself included.
+    Window sums come from prefix sums, so the pass is O(chunks) whatever the
+    window; it runs block by block, each block carrying the window before it.
+    """
+    width = len(FEATURE_FIELDS)
+    features = np.array(rows[:, :width], dtype=np.float64)
+    ordered = rows[:, _ORDERING_COLUMN]
+    signatures = rows[:, width:]
+    window = max(window, 1)
+
+    for start in range(0, len(rows), max(block, 1)):
+        end = min(start + block, len(rows))
+        first = max(start - window, 0)
+        marks = np.zeros(end - first + 1, dtype=np.float64)
+        np.cumsum(ordered[first:end], out=marks[1:])
+        sums = np.zeros((end - first + 1, signatures.shape[1]), dtype=np.float64)
+        np.cumsum(signatures[first:end], axis=0, out=sums[1:])
+
+        # Prefix index of each chunk of the block: sums[i] covers the
+        # chunks before it, sums[i + 1] the chunk itself too.
+        positions = np.arange(start - first, end - first)
+        through = positions + 1
+        since = np.maximum(through - window, 0)
+        features[start:end, _ORDERING_COLUMN] = (marks[through] - marks[since]) / (
+            through - since
+        )
+
+        centroids = sums[positions] - sums[np.maximum(positions - window, 0)]
+        current = signatures[start:end]
+        norms = np.linalg.norm(centroids, axis=1) * np.linalg.norm(current, axis=1)
+        dots = np.einsum("ij,ij->i", centroids, current)
+        similarity = np.divide(dots, norms, out=np.ones_like(dots), where=norms > 0)
+        features[start:end, _DRIFT_COLUMN] = np.clip(1.0 - similarity, 0.0, 1.0)
+    return features
@@ -1,23 +1,45 @@
-from typing import Dict
+from typing import Dict, Sequence
 import re
 
-LOGICAL_OPERATORS = ["if", "then", "because", "therefore", "however", "but"]
+import numpy as np
+
+from backend.core.schemas import FEATURE_FIELDS
+
+_SENTENCE_RE = re.compile(r"[.!?]")
+
+_DENSITY_COLUMN = FEATURE_FIELDS.index("information_density")
+
 
 def extract_structural_features(text: str) -> Dict[str, float]:
     words = text.split()
     word_count = max(len(words), 1)
 
-    logical_hits = sum(
-        1 for w in words if w.lower().strip(",.") in LOGICAL_OPERATORS
-    )
-
-    sentences = re.split(r"[.!?]", text)
+    sentences = _SENTENCE_RE.split(text)
     avg_sentence_length = (
         sum(len(s.split()) for s in sentences if s.strip()) / max(len(sentences), 1)
     )
 
     return {
         "information_density": word_count / max(len(text), 1),
-        "logical_operator_ratio": logical_hits / word_count,
         "avg_sentence_length": avg_sentence_length,
     }
+
+
+def extract_structural_features_batch(texts: Sequence[str]) -> np.ndarray:
+    """
+    Extracts structural features for a batch of texts.
+    Returns a float matrix with one row per text and columns in FEATURE_FIELDS order;
+    columns this module does not produce are left at 0.0.
+    """
+    matrix = np.zeros((len(texts), len(FEATURE_FIELDS)), dtype=np.float64)
+    if not len(texts):
+        return matrix
+
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    word_counts = np.fromiter(
+        (len(text.split()) for text in texts), dtype=np.int64, count=len(texts)
+    )
+
+    safe_word_counts = np.maximum(word_counts, 1)
+    matrix[:, _DENSITY_COLUMN] = safe_word_counts / np.maximum(lengths, 1)
+    return matrix
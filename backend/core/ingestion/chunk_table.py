@@ -0,0 +1,144 @@
+import io
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.ingestion.chunking import iter_chunks
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def timestamp_micros(value: datetime) -> int:
+    """
+    Microseconds since the Unix epoch; naive datetimes are taken as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+class ChunkTable:
+    """
+    Columnar store of chunks: one row per chunk in parallel NumPy columns.
+    document indexes into document_ids; chunk text is text[text_start:text_end]
+    of one shared buffer. Chunk ids ("<document_id>:<index>") are only
+    built on request.
+    """
+
+    def __init__(
+        self,
+        document_ids: List[str],
+        document: np.ndarray,
+        index: np.ndarray,
+        timestamp: np.ndarray,
+        text: str,
+        text_start: np.ndarray,
+        text_end: np.ndarray,
+    ) -> None:
+        self.document_ids = document_ids
+        self.document = document
+        self.index = index
+        self.timestamp = timestamp
+        self.text = text
+        self.text_start = text_start
+        self.text_end = text_end
+
+    @classmethod
+    def from_documents(
+        cls, documents: Iterable[Tuple[str, datetime, str]]
+    ) -> "ChunkTable":
+        """
+        Chunks (document_id, timestamp, content) triples, in order.
+        """
+        document_ids: List[str] = []
+        timestamps = array("q")
+        counts = array("q")
+        lengths = array("q")
+        # Chunk texts go straight into one "\n"-separated buffer; no per-chunk
+        # string outlives its chunk.
+        buffer = io.StringIO()
+        for document_id, timestamp, content in documents:
+            document_ids.append(document_id)
+            timestamps.append(timestamp_micros(timestamp))
+            count = 0
+            for chunk in iter_chunks(content):
+                if lengths:
+                    buffer.write("\n")
+                buffer.write(chunk.text)
+                lengths.append(len(chunk.text))
+                count += 1
+            counts.append(count)
+
+        counts_array = np.frombuffer(counts, dtype=np.int64)
+        document = np.repeat(np.arange(len(document_ids), dtype=np.int32), counts_array)
+        first = np.cumsum(counts_array) - counts_array
+        index = np.arange(len(document)) - np.repeat(first, counts_array)
+
+        lengths_array = np.frombuffer(lengths, dtype=np.int64)
+        text_start = np.cumsum(lengths_array + 1) - lengths_array - 1
+        return cls(
+            document_ids=document_ids,
+            document=document,
+            index=index.astype(np.int32),
+            timestamp=np.frombuffer(timestamps, dtype=np.int64)[document],
+            text=buffer.getvalue(),
+            text_start=text_start,
+            text_end=text_start + lengths_array,
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["ChunkTable"]) -> "ChunkTable":
+        if not tables:
+            return cls.from_documents([])
+        document_offsets = np.cumsum([0] + [len(t.document_ids) for t in tables[:-1]])
+        text_offsets = np.cumsum([0] + [len(t.text) + 1 for t in tables[:-1]])
+        return cls(
+            document_ids=[document_id for t in tables for document_id in t.document_ids],
+            document=np.concatenate(
+                [t.document + offset for t, offset in zip(tables, document_offsets)]
+            ).astype(np.int32),
+            index=np.concatenate([t.index for t in tables]),
+            timestamp=np.concatenate([t.timestamp for t in tables]),
+            text="\n".join(t.text for t in tables),
+            text_start=np.concatenate(
+                [t.text_start + offset for t, offset in zip(tables, text_offsets)]
+            ),
+            text_end=np.concatenate(
+                [t.text_end + offset for t, offset in zip(tables, text_offsets)]
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.document)
+
+    def take(self, rows: np.ndarray) -> "ChunkTable":
+        # Reorders or filters rows; the text buffer is shared, not copied.
+        return ChunkTable(
+            document_ids=self.document_ids,
+            document=self.document[rows],
+            index=self.index[rows],
+            timestamp=self.timestamp[rows],
+            text=self.text,
+            text_start=self.text_start[rows],
+            text_end=self.text_end[rows],
+        )
+
+    def sort_by_time(self) -> "ChunkTable":
+        return self.take(np.argsort(self.timestamp, kind="stable"))
+
+    def texts(self) -> List[str]:
+        text = self.text
+        return [
+            text[start:end]
+            for start, end in zip(self.text_start.tolist(), self.text_end.tolist())
+        ]
+
+    def chunk_ids(self, rows: Iterable[int]) -> List[str]:
+        rows = np.asarray(list(rows), dtype=np.int64)
+        return [
+            f"{self.document_ids[document]}:{index}"
+            for document, index in zip(self.document[rows].tolist(), self.index[rows].tolist())
+        ]
@@ -1,9 +1,196 @@
-from typing import List
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Union
 import re
 
 MIN_CHUNK_LENGTH = 40
 MAX_CHUNK_LENGTH = 500
 
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+class TextChunk(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+def _utf8_length(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _iter_paragraph_fragments(pieces: Iterable[str]) -> Iterator[Tuple[str, int, bool]]:
+    """
+    Cut a stream of text pieces on blank-line ("\\n\\n") boundaries.
+    Yields (fragment, byte offset, ends_paragraph); a paragraph may arrive
+    over several fragments.
+    """
+    offset = 0
+    carry = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        data = carry + piece
+        carry = ""
+        pos = 0
+        while True:
+            boundary = data.find("\n\n", pos)
+            if boundary == -1:
+                break
+            fragment = data[pos:boundary]
+            yield fragment, offset, True
+            offset += _utf8_length(fragment) + 2
+            pos = boundary + 2
+        rest = data[pos:]
+        # A trailing newline may pair with the next piece's leading one.
+        if rest.endswith("\n"):
+            carry = "\n"
+            rest = rest[:-1]
+        if rest:
+            yield rest, offset, False
+            offset += _utf8_length(rest)
+    yield carry, offset, True
+
+
+class _Paragraph:
+    """
+    Chunking state for the paragraph currently being read.
+    Short paragraphs are held whole; once a paragraph is known to exceed
+    MAX_CHUNK_LENGTH it is split into sentences as its text arrives.
+    """
+
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self.head = ""
+        self.head_offset = 0
+        self.long = False
+        # Text after the last complete sentence boundary.
+        self.pending: List[str] = []
+        self.pending_length = 0
+        self.pending_offset = 0
+        # Last non-space character of the pending text plus trailing whitespace.
+        self.context = ""
+        # Sentences waiting to be emitted together as one chunk.
+        self.sentences: List[str] = []
+        self.buffer_length = 0
+        self.buffer_start = 0
+        self.buffer_end = 0
+
+    def feed(self, fragment: str, offset: int) -> Iterator[TextChunk]:
+        if self.long:
+            yield from self._feed_sentences(fragment)
+            return
+
+        if not self.head:
+            stripped = fragment.lstrip()
+            if not stripped:
+                return
+            self.head_offset = offset + _utf8_length(fragment[: len(fragment) - len(stripped)])
+            fragment = stripped
+
+        self.head += fragment
+        if len(self.head) > MAX_CHUNK_LENGTH and len(self.head.rstrip()) > MAX_CHUNK_LENGTH:
+            head, self.head = self.head, ""
+            self.long = True
+            self.pending_offset = self.head_offset
+            yield from self._feed_sentences(head)
+
+    def close(self) -> Iterator[TextChunk]:
+        if self.long:
+            last = "".join(self.pending).rstrip()
+            if last:
+                yield from self._add_sentence(
+                    last, self.pending_offset, self.pending_offset + _utf8_length(last)
+                )
+            chunk = self._flush()
+            if chunk is not None:
+                yield chunk
+        else:
+            text = self.head.rstrip()
+            if len(text) >= MIN_CHUNK_LENGTH:
+                yield TextChunk(text, self.head_offset, self.head_offset + _utf8_length(text))
+        self._clear()
+
+    def _feed_sentences(self, fragment: str) -> Iterator[TextChunk]:
+        text = self.context + fragment
+        # A boundary is only complete once the whitespace run after it has ended.
+        boundaries = [
+            match for match in _SENTENCE_BOUNDARY.finditer(text) if match.end() < len(text)
+        ]
+        if not boundaries:
+            self.pending.append(fragment)
+            self.pending_length += len(fragment)
+            self._update_context(text)
+            return
+
+        base = self.pending_length - len(self.context)
+        tail = "".join(self.pending) + fragment
+        pos = 0
+        for match in boundaries:
+            start, end = base + match.start(), base + match.end()
+            sentence = tail[pos:start]
+            sentence_end = self.pending_offset + _utf8_length(sentence)
+            yield from self._add_sentence(sentence, self.pending_offset, sentence_end)
+            self.pending_offset = sentence_end + _utf8_length(tail[start:end])
+            pos = end
+
+        rest = tail[pos:]
+        self.pending = [rest]
+        self.pending_length = len(rest)
+        self._update_context(rest)
+
+    def _update_context(self, text: str) -> None:
+        trimmed = len(text.rstrip())
+        self.context = text[trimmed - 1:] if trimmed else self.context + text
+
+    def _add_sentence(self, sentence: str, start: int, end: int) -> Iterator[TextChunk]:
+        if self.buffer_length + len(sentence) < MAX_CHUNK_LENGTH:
+            if not self.sentences:
+                self.buffer_start = start
+            self.sentences.append(sentence)
+            self.buffer_length += 1 + len(sentence)
+        else:
+            chunk = self._flush()
+            if chunk is not None:
+                yield chunk
+            self.sentences = [sentence]
+            self.buffer_length = len(sentence)
+            self.buffer_start = start
+        self.buffer_end = end
+
+    def _flush(self) -> Union[TextChunk, None]:
+        text = " ".join(self.sentences)
+        if len(text) >= MIN_CHUNK_LENGTH:
+            return TextChunk(text, self.buffer_start, self.buffer_end)
+        return None
+
+
+def iter_chunks(stream: Union[str, Iterable[str]]) -> Iterator[TextChunk]:
+    """
+    Lazily split text into chunks with the same rules as chunk_text.
+    Accepts a string, a text file object or any iterable of text pieces
+    (e.g. lines with their line endings). Each chunk carries the UTF-8 byte
+    span it covers in the source. Memory is bounded by the chunk and
+    sentence size rather than the document size.
+    """
+    if isinstance(stream, str):
+        stream = (stream,)
+
+    paragraph = _Paragraph()
+    for fragment, offset, ends_paragraph in _iter_paragraph_fragments(stream):
+        if ends_paragraph and not paragraph.head and not paragraph.long:
+            # Fast path for a paragraph that arrived in one piece.
+            text = fragment.strip()
+            if len(text) <= MAX_CHUNK_LENGTH:
+                if len(text) >= MIN_CHUNK_LENGTH:
+                    start = offset + _utf8_length(fragment[: fragment.index(text[0])])
+                    yield TextChunk(text, start, start + _utf8_length(text))
+                continue
+        yield from paragraph.feed(fragment, offset)
+        if ends_paragraph:
+            yield from paragraph.close()
+
+
 def chunk_text(text: str) -> List[str]:
     """
     Split text into semantically meaningful chunks.
@@ -12,25 +199,4 @@ def chunk_text(text: str) -> List[str]:
     if not text or not text.strip():
         return []
 
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-    chunks: List[str] = []
-
-    for p in paragraphs:
-        if len(p) <= MAX_CHUNK_LENGTH:
-            if len(p) >= MIN_CHUNK_LENGTH:
-                chunks.append(p)
-        else:
-            # fallback to sentence split
-            sentences = re.split(r"(?<=[.!?])\s+", p)
-            buffer = ""
-            for s in sentences:
-                if len(buffer) + len(s) < MAX_CHUNK_LENGTH:
-                    buffer += " " + s
-                else:
-                    if len(buffer.strip()) >= MIN_CHUNK_LENGTH:
-                        chunks.append(buffer.strip())
-                    buffer = s
-            if len(buffer.strip()) >= MIN_CHUNK_LENGTH:
-                chunks.append(buffer.strip())
-
-    return chunks
+    return [chunk.text for chunk in iter_chunks(text)]
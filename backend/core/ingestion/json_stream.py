@@ -0,0 +1,148 @@
+import json
+import re
+from typing import Any, Dict, Iterator, TextIO
+
+READ_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"\s*")
+_DOCUMENTS_KEY = re.compile(r'\{\s*"documents"\s*:\s*\[')
+
+# A decode error this close to the end of the window may be a token cut off
+# by it ("tru", "-", "\ud83d\ude"); one further back is a syntax error.
+_CUT_OFF_TAIL = 16
+
+
+class _Reader:
+    """
+    Sliding text window over a stream for incremental raw_decode parsing.
+    """
+
+    def __init__(self, stream: TextIO, read_size: int = READ_SIZE) -> None:
+        self.stream = stream
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        # Drop the consumed prefix before growing the window.
+        if self.position:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer += data
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, or "" at EOF.
+        """
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill(self.read_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON input")
+        self.position += 1
+
+    def match_prefix(self, pattern: "re.Pattern[str]", limit: int = 4096) -> bool:
+        # Matches only near the current position; the input is not buffered whole.
+        self.peek()
+        while len(self.buffer) - self.position < limit and self.fill(self.read_size):
+            pass
+        match = pattern.match(self.buffer, self.position)
+        if match is None:
+            return False
+        self.position = match.end()
+        return True
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.read_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as err:
+                # Cut off at the window edge: read more and retry, doubling
+                # the read so one huge value is not re-parsed often. An
+                # unterminated string reports where it starts, not the edge.
+                cut_off = err.pos >= len(self.buffer) - _CUT_OFF_TAIL or err.msg.startswith(
+                    "Unterminated string"
+                )
+                if not cut_off or not self.fill(size):
+                    raise
+                size *= 2
+                continue
+            if end == len(self.buffer) and not self.eof and self.fill(size):
+                # A scalar may continue past the window edge (e.g. 12|34).
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_documents(stream: TextIO, read_size: int = READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yields documents from a sequence of top-level JSON values (one,
+    or NDJSON), each a document array, an object with a "documents" array,
+    or a document object. Only the document being decoded is held in
+    memory, plus one read window, except for a "documents" object whose
+    first key is not "documents", which is decoded whole.
+    """
+    reader = _Reader(stream, read_size)
+    while True:
+        first = reader.peek()
+        if not first:
+            return
+        if first == "[":
+            reader.position += 1
+            yield from _iter_array(reader)
+        elif first == "{" and reader.match_prefix(_DOCUMENTS_KEY):
+            yield from _iter_array(reader)
+            _skip_members(reader)
+        else:
+            value = reader.value()
+            if isinstance(value, dict) and isinstance(value.get("documents"), list):
+                yield from map(_document, value["documents"])
+            else:
+                yield _document(value)
+
+
+def _document(value: Any) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ValueError("Each document must be a JSON object.")
+    return value
+
+
+def _iter_array(reader: _Reader) -> Iterator[Dict[str, Any]]:
+    if reader.peek() == "]":
+        reader.position += 1
+        return
+    while True:
+        yield _document(reader.value())
+        if reader.peek() == ",":
+            reader.position += 1
+            continue
+        reader.expect("]")
+        return
+
+
+def _skip_members(reader: _Reader) -> None:
+    # Decodes and drops the keys after "documents", one value at a time,
+    # up to the closing brace.
+    while reader.peek() == ",":
+        reader.position += 1
+        if not isinstance(reader.value(), str):
+            raise ValueError("Expected an object key in JSON input")
+        reader.expect(":")
+        reader.value()
+    reader.expect("}")
@@ -1,133 +1,277 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Sequence, Dict
-from datetime import datetime
-
-from backend.core.automata.state_inference import infer_states
-from backend.core.clustering.cluster import cluster_embeddings
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Dict, Tuple, TypeVar
+
+import numpy as np
+
+from backend.config import Settings, load_settings
+
+from backend.core.automata.simplify import merge_states
+from backend.core.automata.state_inference import infer_states_from_counts
+from backend.core.automata.transitions import AutomataConfig, TransitionCounts
+from backend.core.clustering.cluster import NOISE_LABEL, cluster_embeddings
+from backend.core.clustering.embed import EmbeddingConfig, embed_texts
 from backend.core.confidence.scoring import compute_confidence
-from backend.core.features.structural import extract_structural_features
-from backend.core.ingestion.chunking import chunk_text
+from backend.core.features.cache import FeatureCache
+from backend.core.features.linguistic import extract_linguistic_features_batch
+from backend.core.features.sequential import extract_sequence_inputs, sequential_features
+from backend.core.features.structural import extract_structural_features_batch
+from backend.core.ingestion.chunk_table import ChunkTable
+from backend.core.tracing import NULL_TRACER, NullTracer, Tracer
+from backend.core.versions import (
+    AUTOMATA_VERSION,
+    CLUSTERING_VERSION,
+    FEATURES_VERSION,
+    INTERPRETATION_VERSION,
+)
 
 from backend.core.schemas import (
     Automata,
     AutomataState,
     AutomataTransition,
-    Chunk,
     Cluster,
     Confidence,
-    Feature,
-    FeatureVector,
+    FEATURE_FIELDS,
     Input,
     Interpretation,
     Report,
     VersionInfo,
 )
 
-FEATURE_FIELDS = (
-    "information_density",
-    "logical_operator_ratio",
-    "hedging_frequency",
-    "abstraction_level",
-    "ordering_strength",
-    "topic_drift",
-)
+logger = logging.getLogger(__name__)
+
+# Shards handed to each pool worker; a few per worker evens out uneven documents.
+SHARDS_PER_WORKER = 4
+
+# Documents per chunking task in the pool.
+SHARD_DOCUMENTS = 256
+
+# Chunks gathered across subjects before run_pipeline_many extracts features
+# for them as one batch; bounds memory for very large organisations.
+MANY_BATCH_CHUNKS = 200_000
+
+# DBSCAN radius for text embeddings per sqrt(dimension): columns are
+# standardized, so distances grow with the square root of the width.
+TEXT_EMBEDDING_EPS = 0.5
+
+# DBSCAN min_samples for the FEATURE_FIELDS rows, twice their width as is
+# usual in low dimensions; their radius is read off the k-distance curve
+# for that min_samples (k_distance_eps).
+FEATURE_MIN_SAMPLES = 2 * len(FEATURE_FIELDS)
+
+T = TypeVar("T")
+
+_default_feature_cache: Optional[FeatureCache] = None
+
+
+def default_feature_cache() -> FeatureCache:
+    global _default_feature_cache
+    if _default_feature_cache is None:
+        settings = load_settings()
+        _default_feature_cache = FeatureCache(
+            FEATURES_VERSION,
+            max_entries=settings.feature_cache_size,
+            path=settings.feature_cache_path,
+        )
+    return _default_feature_cache
+
+
+def default_automata_config(settings: Optional[Settings] = None) -> AutomataConfig:
+    settings = settings or load_settings()
+    return AutomataConfig(
+        order=settings.automata_order,
+        max_contexts=settings.automata_max_contexts,
+        intervals=settings.automata_intervals,
+        merge_alpha=settings.automata_merge_alpha,
+        max_states=settings.automata_max_states,
+    )
 
-FEATURES_VERSION = "0.1.0"
-AUTOMATA_VERSION = "0.1.0"
-INTERPRETATION_VERSION = "0.1.0"
+
+def default_embedding_config(settings: Optional[Settings] = None) -> Optional[EmbeddingConfig]:
+    # None (the default) clusters on the structural feature rows
+    settings = settings or load_settings()
+    if not settings.text_embedding_dim:
+        return None
+    return EmbeddingConfig(
+        dim=settings.text_embedding_dim, reduction=settings.text_embedding_reduction
+    )
 
 
 # ---------- Normalization ----------
 
-def _normalize_inputs(documents: Iterable[Input | dict]) -> List[Input]:
-    inputs: List[Input] = []
+def _normalize_inputs(documents: Iterable[Input | dict]) -> Iterator[Input]:
+    # Lazy, so a streamed input is never held in memory as a whole
     for document in documents:
         if isinstance(document, Input):
-            inputs.append(document)
+            yield document
         else:
             if hasattr(Input, "model_validate"):
-                inputs.append(Input.model_validate(document))
+                yield Input.model_validate(document)
             else:
-                inputs.append(Input.parse_obj(document))
-    return inputs
+                yield Input.parse_obj(document)
 
 
 # ---------- Chunking ----------
 
-def _build_chunks(documents: Sequence[Input]) -> List[Chunk]:
-    chunks: List[Chunk] = []
-    for document in documents:
-        for index, content in enumerate(chunk_text(document.content)):
-            chunks.append(
-                Chunk(
-                    chunk_id=f"{document.document_id}:{index}",
-                    document_id=document.document_id,
-                    content=content,
-                    index=index,
-                    timestamp=document.timestamp,
-                )
-            )
-    return chunks
+def _chunk_shard(documents: Iterable[Input | dict]) -> ChunkTable:
+    # Runs in pool workers: a ChunkTable pickles as a few arrays and one string
+    return ChunkTable.from_documents(
+        (document.document_id, document.timestamp, document.content)
+        for document in _normalize_inputs(documents)
+    )
+
+
+def _batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _map_bounded(
+    function: Callable[[List[T]], object],
+    batches: Iterable[List[T]],
+    executor: Executor,
+    window: int,
+) -> Iterator:
+    # Ordered map that keeps at most `window` batches in flight
+    pending: deque = deque()
+    for batch in batches:
+        pending.append(executor.submit(function, batch))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _split(items: Sequence[T], parts: int) -> List[Sequence[T]]:
+    # Contiguous, order-preserving shards
+    parts = max(1, min(parts, len(items)))
+    step, extra = divmod(len(items), parts)
+    shards = []
+    start = 0
+    for part in range(parts):
+        end = start + step + (1 if part < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+def _map_shards(
+    function: Callable[[Sequence[T]], object],
+    items: Sequence[T],
+    executor: Optional[Executor],
+    parts: int,
+) -> List:
+    if executor is None or len(items) < 2:
+        return [function(items)]
+    return list(executor.map(function, _split(items, parts)))
 
 
 # ---------- Features ----------
 
-def _build_features(chunks: Sequence[Chunk]) -> List[Feature]:
-    features: List[Feature] = []
-    for chunk in chunks:
-        structural = extract_structural_features(chunk.content)
-        vector = FeatureVector(
-            information_density=structural.get("information_density", 0.0),
-            logical_operator_ratio=structural.get("logical_operator_ratio", 0.0),
-            hedging_frequency=0.0,
-            abstraction_level=0.0,
-            ordering_strength=0.0,
-            topic_drift=0.0,
-        )
-        features.append(Feature(chunk_id=chunk.chunk_id, features=vector))
-    return features
+def _feature_rows(texts: Sequence[str]) -> np.ndarray:
+    # The two extractors fill disjoint FEATURE_FIELDS columns; the sequence
+    # inputs follow them until sequential_features consumes them.
+    return np.hstack(
+        [
+            extract_structural_features_batch(texts) + extract_linguistic_features_batch(texts),
+            extract_sequence_inputs(texts),
+        ]
+    )
 
 
-def _feature_embeddings(features: Sequence[Feature]) -> List[List[float]]:
-    embeddings: List[List[float]] = []
-    for feature in features:
-        vector = feature.features
-        embeddings.append(
-            [float(getattr(vector, field) or 0.0) for field in FEATURE_FIELDS]
-        )
-    return embeddings
+def _extract_features(
+    texts: Sequence[str],
+    executor: Optional[Executor] = None,
+    parts: int = 1,
+) -> np.ndarray:
+    if not texts:
+        return _feature_rows([])
+    return np.vstack(_map_shards(_feature_rows, list(texts), executor, parts))
+
+
+def _build_features(
+    chunks: ChunkTable,
+    cache: Optional[FeatureCache] = None,
+    executor: Optional[Executor] = None,
+    parts: int = 1,
+    tracer: Tracer | NullTracer = NULL_TRACER,
+) -> np.ndarray:
+    # One row per chunk: FEATURE_FIELDS columns, then the sequence inputs
+    texts = chunks.texts()
+    if cache is None:
+        return _extract_features(texts, executor, parts)
+
+    keys = [cache.key(text) for text in texts]
+    cached = cache.get_many(keys)
+
+    # Extract each unseen text once, even if it repeats across chunks
+    unseen: Dict[bytes, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in cached:
+            unseen.setdefault(key, text)
+    if unseen:
+        rows = _extract_features(list(unseen.values()), executor, parts)
+        cache.put_many(list(unseen), rows)
+        cached.update(zip(unseen, rows))
+
+    hits = len(set(keys)) - len(unseen)
+    tracer.count("cache_hits", hits)
+    tracer.count("cache_misses", len(unseen))
+    logger.info(
+        "Feature cache: %d hits, %d misses for %d chunks",
+        hits,
+        len(unseen),
+        len(keys),
+    )
+    if not keys:
+        return _feature_rows([])
+    return np.stack([cached[key] for key in keys])
 
 
 # ---------- Clustering ----------
 
-def _build_clusters(
-    chunks: Sequence[Chunk],
-    embeddings: Sequence[List[float]],
-) -> List[Cluster]:
-    clusters: List[Cluster] = []
-    assignments = cluster_embeddings(list(embeddings))
-    if not assignments:
-        return clusters
+def _cluster_labels(embeddings: np.ndarray, config: Optional[EmbeddingConfig]) -> np.ndarray:
+    # Cluster id per chunk row, NOISE_LABEL for noise; config is None for
+    # the feature rows and the EmbeddingConfig of text embeddings otherwise.
+    if config is None:
+        clusters = cluster_embeddings(embeddings, FEATURE_MIN_SAMPLES)
+    else:
+        clusters = cluster_embeddings(embeddings, eps=TEXT_EMBEDDING_EPS * math.sqrt(config.dim))
+    labels = np.full(len(embeddings), NOISE_LABEL, dtype=np.int64)
+    for cluster_id, member_indices in clusters.items():
+        labels[member_indices] = cluster_id
+    return labels
+
 
+def _build_clusters(chunks: ChunkTable, labels: np.ndarray) -> List[Cluster]:
+    clusters: List[Cluster] = []
     total_chunks = max(len(chunks), 1)
 
-    for cluster_id, member_indices in assignments.items():
-        member_chunks = [
-            chunks[idx].chunk_id
-            for idx in member_indices
-            if 0 <= idx < len(chunks)
-        ]
-        if not member_chunks:
+    rows = np.argsort(labels, kind="stable")
+    cluster_ids, starts = np.unique(labels[rows], return_index=True)
+    for cluster_id, members in zip(cluster_ids.tolist(), np.split(rows, starts[1:])):
+        # Noise chunks stay out of the patterns and map to "cluster_noise"
+        if cluster_id == NOISE_LABEL:
             continue
 
-        coherence_score = min(len(member_chunks) / total_chunks, 1.0)
+        coherence_score = min(len(members) / total_chunks, 1.0)
 
         clusters.append(
             Cluster(
                 cluster_id=f"cluster_{cluster_id}",
                 label=f"Cluster {cluster_id}",
-                member_chunks=member_chunks,
+                member_chunks=chunks.chunk_ids(members),
                 coherence_score=round(coherence_score, 2),
             )
         )
@@ -152,12 +296,31 @@ def _select_primary_cluster(clusters: Sequence[Cluster]) -> Cluster:
 
 # ---------- Automata ----------
 
-def _build_automata(cluster_sequence: Sequence[str]) -> Automata:
-    states_raw, transitions_raw = infer_states(list(cluster_sequence))
+def _construct(model, **values):
+    # Skips validation for values the pipeline built itself
+    construct = getattr(model, "model_construct", None) or model.construct
+    return construct(**values)
+
+
+def _build_automata(labels: np.ndarray, config: AutomataConfig = AutomataConfig()) -> Automata:
+    # States are numbered by first appearance, as infer_states would
+    cluster_ids, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    appearance = np.argsort(first, kind="stable")
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(appearance))
+    state_names = [
+        "cluster_noise" if cluster_id == NOISE_LABEL else f"cluster_{cluster_id}"
+        for cluster_id in cluster_ids[appearance].tolist()
+    ]
+    counts = TransitionCounts.from_labels(rank[inverse.reshape(-1)], state_names, config)
+    if config.merge_alpha is not None or config.max_states is not None:
+        counts, _ = merge_states(counts, config.merge_alpha, config.max_states)
+    states_raw, transitions_raw = infer_states_from_counts(counts)
 
-    states = [AutomataState(**state) for state in states_raw]
+    states = [_construct(AutomataState, **state) for state in states_raw]
     transitions = [
-        AutomataTransition(
+        _construct(
+            AutomataTransition,
             from_state=t["from"],
             to_state=t["to"],
             probability=t["probability"],
@@ -170,58 +333,71 @@ def _build_automata(cluster_sequence: Sequence[str]) -> Automata:
 
 # ---------- Pipeline ----------
 
-def run_pipeline(
-    subject_id: str,
+def _chunk_documents(
     documents: Iterable[Input | dict],
-    enable_interpretation: bool = True,
-) -> Report:
-    inputs = _normalize_inputs(documents)
-    chunks = _build_chunks(inputs)
-
-    if len(chunks) < 5:
-        interpretation = Interpretation(
-            summary="Insufficient text volume to infer stable communication patterns.",
-            guidance=["Provide more written material for analysis."],
-            failure_modes=["Too few chunks for reliable clustering."],
-            non_claims=["This analysis does not assess personality, intent, or mental state."],
+    executor: Optional[Executor],
+    parts: int,
+) -> ChunkTable:
+    # Documents are consumed as they stream in; only chunk tables are kept.
+    # Batches are contiguous, so a stable sort of their concatenation keeps
+    # ties in document order exactly as the serial path does.
+    if executor is None:
+        chunks = _chunk_shard(documents)
+    else:
+        chunks = ChunkTable.concat(
+            list(
+                _map_bounded(
+                    _chunk_shard, _batches(documents, SHARD_DOCUMENTS), executor, parts
+                )
+            )
         )
+    return chunks.sort_by_time()
 
-        return Report(
-            subject_id=subject_id,
-            patterns=[],
-            primary_cluster_id=None,
-            automata=Automata(states=[], transitions=[]),
-            interpretation=interpretation,
-            confidence=Confidence(
-                overall=0.2,
-                notes="Insufficient usable text for inference.",
-            ),
-            version=VersionInfo(
-                features=FEATURES_VERSION,
-                automata=AUTOMATA_VERSION,
-                interpretation=INTERPRETATION_VERSION,
-            ),
-        )
 
-    # Order chunks by time before sequencing
-    chunks = sorted(chunks, key=lambda c: c.timestamp)
+def _version_info() -> VersionInfo:
+    return VersionInfo(
+        features=FEATURES_VERSION,
+        clustering=CLUSTERING_VERSION,
+        automata=AUTOMATA_VERSION,
+        interpretation=INTERPRETATION_VERSION,
+    )
 
-    features = _build_features(chunks)
-    embeddings = _feature_embeddings(features)
-    clusters = _build_clusters(chunks, embeddings)
 
-    # Map every chunk to its assigned cluster
-    chunk_to_cluster: Dict[str, str] = {}
-    for cluster in clusters:
-        for cid in cluster.member_chunks:
-            chunk_to_cluster[cid] = cluster.cluster_id
+def _insufficient_report(subject_id: str, tracer: Tracer | NullTracer) -> Report:
+    interpretation = Interpretation(
+        summary="Insufficient text volume to infer stable communication patterns.",
+        guidance=["Provide more written material for analysis."],
+        failure_modes=["Too few chunks for reliable clustering."],
+        non_claims=["This analysis does not assess personality, intent, or mental state."],
+    )
 
-    cluster_sequence = [
-        chunk_to_cluster.get(chunk.chunk_id, "cluster_noise")
-        for chunk in chunks
-    ]
+    return Report(
+        subject_id=subject_id,
+        patterns=[],
+        primary_cluster_id=None,
+        automata=Automata(states=[], transitions=[]),
+        interpretation=interpretation,
+        confidence=Confidence(
+            overall=0.2,
+            notes="Insufficient usable text for inference.",
+        ),
+        version=_version_info(),
+        diagnostics=tracer.diagnostics(),
+    )
 
-    automata = _build_automata(cluster_sequence)
+
+def _build_report(
+    subject_id: str,
+    chunks: ChunkTable,
+    labels: np.ndarray,
+    enable_interpretation: bool,
+    automata_config: AutomataConfig,
+    tracer: Tracer | NullTracer,
+) -> Report:
+    with tracer.stage("clustering"):
+        clusters = _build_clusters(chunks, labels)
+    with tracer.stage("automata"):
+        automata = _build_automata(labels, automata_config)
 
     primary_cluster = _select_primary_cluster(clusters)
     coherence = primary_cluster.coherence_score or 0.0
@@ -262,9 +438,211 @@ def run_pipeline(
             overall=confidence_value,
             notes="Confidence reflects chunk volume, state variety, and cluster coherence.",
         ),
-        version=VersionInfo(
-            features=FEATURES_VERSION,
-            automata=AUTOMATA_VERSION,
-            interpretation=INTERPRETATION_VERSION,
-        ),
-    )
\ No newline at end of file
+        version=_version_info(),
+        diagnostics=tracer.diagnostics(),
+    )
+
+
+def run_pipeline(
+    subject_id: str,
+    documents: Iterable[Input | dict],
+    enable_interpretation: bool = True,
+    feature_cache: Optional[FeatureCache] = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    diagnostics: bool = False,
+    automata_config: Optional[AutomataConfig] = None,
+    on_features: Optional[Callable[[ChunkTable, np.ndarray], None]] = None,
+    embedding_config: Optional[EmbeddingConfig] = None,
+    settings: Optional[Settings] = None,
+) -> Report:
+    """
+    Runs the analysis pipeline over a subject's documents.
+    documents may be a lazy stream; it is consumed once and only its chunks
+    are kept. With workers > 1 (or an explicit executor), normalization, chunking and
+    feature extraction run on shards of the input in a process pool; the
+    report is identical to the serial path.
+    With diagnostics=True the report carries per-stage timings, counts and
+    peak memory; otherwise tracing hooks are no-ops.
+    automata_config (order-k contexts, intervals) defaults to the
+    AUTOMATA_* settings. on_features, if given, receives the time-ordered
+    chunks and their feature rows (e.g. for vector indexing).
+    embedding_config (defaults to the TEXT_EMBEDDING_* settings, off unless
+    set) clusters hashed n-gram text embeddings instead of the feature rows.
+    Those defaults come from settings, or load_settings() if not given.
+    """
+    if executor is None and workers is not None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return run_pipeline(
+                subject_id,
+                documents,
+                enable_interpretation=enable_interpretation,
+                feature_cache=feature_cache,
+                workers=workers,
+                executor=pool,
+                diagnostics=diagnostics,
+                automata_config=automata_config,
+                on_features=on_features,
+                embedding_config=embedding_config,
+                settings=settings,
+            )
+
+    tracer = Tracer() if diagnostics else NULL_TRACER
+    parts = (workers or os.cpu_count() or 1) * SHARDS_PER_WORKER if executor else 1
+
+    with tracer.stage("chunking"):
+        chunks = _chunk_documents(documents, executor, parts)
+    tracer.count("documents", len(chunks.document_ids))
+    tracer.count("chunks", len(chunks))
+
+    if len(chunks) < 5:
+        return _insufficient_report(subject_id, tracer)
+
+    with tracer.stage("features"):
+        embeddings = sequential_features(
+            _build_features(
+                chunks, feature_cache or default_feature_cache(), executor, parts, tracer
+            )
+        )
+    if on_features is not None:
+        on_features(chunks, embeddings)
+    embedding_config = embedding_config or default_embedding_config(settings)
+    if embedding_config is not None:
+        with tracer.stage("embedding"):
+            embeddings = embed_texts(chunks.texts(), embedding_config, executor, parts)
+    with tracer.stage("clustering"):
+        labels = _cluster_labels(embeddings, embedding_config)
+    return _build_report(
+        subject_id,
+        chunks,
+        labels,
+        enable_interpretation,
+        automata_config or default_automata_config(settings),
+        tracer,
+    )
+
+
+def _analyze_batch(
+    batch: List[Tuple[str, ChunkTable, Tracer | NullTracer]],
+    enable_interpretation: bool,
+    automata_config: AutomataConfig,
+    embedding_config: Optional[EmbeddingConfig],
+    cache: FeatureCache,
+    executor: Optional[Executor],
+    parts: int,
+) -> Iterator[Report]:
+    # Features for every subject in the batch come from one deduplicated,
+    # cached extraction over the concatenated chunks; rows are then split
+    # back per subject, whose chunks are contiguous in the concatenation.
+    analyzed = [(chunks, tracer) for _, chunks, tracer in batch if len(chunks) >= 5]
+    ends = np.cumsum([len(chunks) for chunks, _ in analyzed]).tolist()
+    started = time.perf_counter()
+    embeddings = _build_features(
+        ChunkTable.concat([chunks for chunks, _ in analyzed]), cache, executor, parts
+    )
+    # Sequential features run over each subject's own chunk stream
+    rows = [
+        sequential_features(embeddings[end - len(chunks):end])
+        for end, (chunks, _) in zip(ends, analyzed)
+    ]
+    elapsed = time.perf_counter() - started
+    total = max(ends[-1], 1) if ends else 1
+    for chunks, tracer in analyzed:
+        # The shared extraction is attributed by chunk share.
+        tracer.add("features", elapsed * len(chunks) / total)
+
+    if embedding_config is not None:
+        for index, (chunks, tracer) in enumerate(analyzed):
+            # Per subject, so IDF and SVD match run_pipeline's
+            with tracer.stage("embedding"):
+                rows[index] = embed_texts(chunks.texts(), embedding_config, executor, parts)
+    configs = [embedding_config] * len(rows)
+    if executor is not None and len(rows) > 1:
+        labels = executor.map(_cluster_labels, rows, configs)
+    else:
+        labels = map(_cluster_labels, rows, configs)
+
+    for subject_id, chunks, tracer in batch:
+        if len(chunks) < 5:
+            yield _insufficient_report(subject_id, tracer)
+            continue
+        with tracer.stage("clustering"):
+            subject_labels = next(labels)
+        yield _build_report(
+            subject_id, chunks, subject_labels, enable_interpretation, automata_config, tracer
+        )
+
+
+def run_pipeline_many(
+    subjects: Mapping[str, Iterable[Input | dict]],
+    enable_interpretation: bool = True,
+    feature_cache: Optional[FeatureCache] = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    diagnostics: bool = False,
+    batch_chunks: int = MANY_BATCH_CHUNKS,
+    automata_config: Optional[AutomataConfig] = None,
+    embedding_config: Optional[EmbeddingConfig] = None,
+) -> Iterator[Report]:
+    """
+    Runs the pipeline for many subjects, yielding one report per subject in
+    mapping order; each report equals run_pipeline's for that subject.
+    Subjects are chunked one after another and gathered into batches of
+    about batch_chunks chunks; feature extraction runs once per batch across
+    all of its subjects, clustering and automata inference per subject.
+    Reports are yielded as each batch completes, and each subject's
+    documents are only read when its batch is being filled.
+    In diagnostics, per-subject feature time is the subject's chunk share of
+    the batch extraction; cache hit counts are not broken down per subject.
+    """
+    if executor is None and workers is not None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from run_pipeline_many(
+                subjects,
+                enable_interpretation=enable_interpretation,
+                feature_cache=feature_cache,
+                workers=workers,
+                executor=pool,
+                diagnostics=diagnostics,
+                batch_chunks=batch_chunks,
+                automata_config=automata_config,
+                embedding_config=embedding_config,
+            )
+        return
+
+    cache = feature_cache or default_feature_cache()
+    automata_config = automata_config or default_automata_config()
+    embedding_config = embedding_config or default_embedding_config()
+    parts = (workers or os.cpu_count() or 1) * SHARDS_PER_WORKER if executor else 1
+
+    batch: List[Tuple[str, ChunkTable, Tracer | NullTracer]] = []
+    pending = 0
+    for subject_id, documents in subjects.items():
+        tracer = Tracer() if diagnostics else NULL_TRACER
+        with tracer.stage("chunking"):
+            chunks = _chunk_documents(documents, executor, parts)
+        tracer.count("documents", len(chunks.document_ids))
+        tracer.count("chunks", len(chunks))
+        batch.append((subject_id, chunks, tracer))
+        pending += len(chunks)
+        if pending >= batch_chunks:
+            yield from _analyze_batch(
+                batch,
+                enable_interpretation,
+                automata_config,
+                embedding_config,
+                cache,
+                executor,
+                parts,
+            )
+            batch, pending = [], 0
+    if batch:
+        yield from _analyze_batch(
+            batch,
+            enable_interpretation,
+            automata_config,
+            embedding_config,
+            cache,
+            executor,
+            parts,
+        )
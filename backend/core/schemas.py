@@ -31,6 +31,16 @@ class FeatureVector(BaseModel):
     topic_drift: Optional[float] = None
 
 
+FEATURE_FIELDS = (
+    "information_density",
+    "logical_operator_ratio",
+    "hedging_frequency",
+    "abstraction_level",
+    "ordering_strength",
+    "topic_drift",
+)
+
+
 class Feature(BaseModel):
     chunk_id: str
     features: FeatureVector
@@ -77,10 +87,23 @@ class Confidence(BaseModel):
 
 class VersionInfo(BaseModel):
     features: str
+    clustering: str
     automata: str
     interpretation: str
 
 
+class Diagnostics(BaseModel):
+    stage_seconds: Dict[str, float]
+    total_seconds: float
+    documents: int
+    chunks: int
+    cache_hits: Optional[int] = None
+    cache_misses: Optional[int] = None
+    peak_rss_mib: Optional[float] = None
+    peak_rss_growth_mib: Optional[float] = None
+    queue_seconds: Optional[float] = None
+
+
 class Report(BaseModel):
     subject_id: str
     patterns: List[Cluster]
@@ -88,4 +111,5 @@ class Report(BaseModel):
     automata: Automata
     interpretation: Optional[Interpretation] = None
     confidence: Confidence
-    version: VersionInfo
\ No newline at end of file
+    version: VersionInfo
+    diagnostics: Optional[Diagnostics] = None
\ No newline at end of file
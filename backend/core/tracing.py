@@ -0,0 +1,89 @@
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, Optional
+
+from backend.core.schemas import Diagnostics
+
+
+def peak_rss_mib() -> float:
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Tracer:
+    """
+    Collects per-stage wall time and counters for one pipeline run.
+    The process peak RSS is never reset, as other runs may share the
+    process; the run reports it along with how far it rose while the run
+    was traced.
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.stage_seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._peak_before = peak_rss_mib()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.add(name, elapsed)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def diagnostics(self) -> Diagnostics:
+        peak = peak_rss_mib()
+        return Diagnostics(
+            stage_seconds={name: round(seconds, 6) for name, seconds in self.stage_seconds.items()},
+            total_seconds=round(time.perf_counter() - self._started, 6),
+            documents=self.counts.get("documents", 0),
+            chunks=self.counts.get("chunks", 0),
+            cache_hits=self.counts.get("cache_hits"),
+            cache_misses=self.counts.get("cache_misses"),
+            peak_rss_mib=round(peak, 1),
+            peak_rss_growth_mib=round(peak - self._peak_before, 1),
+        )
+
+
+class NullTracer:
+    """
+    Tracer used when diagnostics are off: every hook is a no-op.
+    """
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return self._context
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, value: int) -> None:
+        pass
+
+    def diagnostics(self) -> Optional[Diagnostics]:
+        return None
+
+
+NULL_TRACER = NullTracer()
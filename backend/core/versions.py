@@ -0,0 +1,6 @@
+# Versions of the pipeline stages, recorded in every report and in job
+# fingerprints; bump one whenever its stage's output can change.
+FEATURES_VERSION = "0.3.0"
+CLUSTERING_VERSION = "0.1.0"
+AUTOMATA_VERSION = "0.2.1"
+INTERPRETATION_VERSION = "0.1.0"
@@ -2,18 +2,36 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 
-from backend.api.v1 import analysis, health, results
+from backend.api.v1 import analysis, health, results, similarity
 from backend.config import load_settings
+from backend.metrics import CONTENT_TYPE, REGISTRY
+from storage.database import (
+    close_async_pool,
+    close_pool,
+    init_db_once,
+    open_async_pool,
+    open_pool,
+    refresh_queue_depth,
+)
 
 settings = load_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup hooks (DB, vector store, queues) go here
-    yield
-    # Shutdown hooks go here
+    # Sync routes borrow from the sync pool (in the threadpool), async routes
+    # from the async pool; the schema is created once here, not per request.
+    open_pool(settings.db_pool_min_size, settings.db_pool_max_size)
+    await open_async_pool(settings.db_pool_min_size, settings.db_pool_max_size)
+    init_db_once()
+    REGISTRY.add_collector(refresh_queue_depth)
+    try:
+        yield
+    finally:
+        await close_async_pool()
+        close_pool()
 
 
 app = FastAPI(
@@ -36,6 +54,12 @@ app.include_router(
     tags=["reports"],
 )
 
+app.include_router(
+    similarity.router,
+    prefix=API_V1_PREFIX,
+    tags=["similarity"],
+)
+
 app.include_router(
     health.router,
     prefix=API_V1_PREFIX,
@@ -43,6 +67,12 @@ app.include_router(
 )
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    # Pipeline stage and job histograms are exported by the worker process.
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/")
 def root():
     return {
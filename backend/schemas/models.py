@@ -66,6 +66,7 @@ class Confidence(BaseModel):
 
 class VersionInfo(BaseModel):
     features: str
+    clustering: str
     automata: str
     interpretation: str
 
@@ -2,20 +2,58 @@ from __future__ import annotations
 
 from storage.database import (
     DATABASE_URL,
+    JOB_CHANNEL,
+    JobListener,
+    async_connection,
     claim_next_job,
+    claim_next_jobs,
+    close_async_pool,
+    canonical_json,
+    close_pool,
+    connection,
+    count_jobs_by_status,
     enqueue_analysis_job,
+    enqueue_analysis_jobs,
+    enqueue_analysis_jobs_async,
     fetch_job,
+    fetch_job_async,
+    fetch_job_status_async,
+    fetch_report_json_async,
     get_connection,
     init_db,
+    init_db_once,
+    job_fingerprint,
+    open_async_pool,
+    open_pool,
+    refresh_queue_depth,
     update_job_status,
 )
 
 __all__ = [
     "DATABASE_URL",
+    "JOB_CHANNEL",
+    "JobListener",
+    "async_connection",
     "claim_next_job",
+    "claim_next_jobs",
+    "close_async_pool",
+    "canonical_json",
+    "close_pool",
+    "connection",
+    "count_jobs_by_status",
     "enqueue_analysis_job",
+    "enqueue_analysis_jobs",
+    "enqueue_analysis_jobs_async",
     "fetch_job",
+    "fetch_job_async",
+    "fetch_job_status_async",
+    "fetch_report_json_async",
     "get_connection",
     "init_db",
+    "init_db_once",
+    "job_fingerprint",
+    "open_async_pool",
+    "open_pool",
+    "refresh_queue_depth",
     "update_job_status",
 ]
@@ -1,19 +1,198 @@
 from __future__ import annotations
 
 import json
+import mmap
+import os
+import struct
+import zlib
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional
 
-BASE_DIR = Path("storage_artifacts")
+from backend.config import load_settings
 
+# Binary report container:
+#   header  = MAGIC, format version (u16), index length (u32)
+#   index   = compact JSON {section: {offset, length, codec, encoding, ...}}
+#   data    = section payloads; offsets are relative to the end of the index
+# Every top-level report key is its own section. member_chunks lists are
+# split out of `patterns` into a NUL-separated string column, which decodes
+# far faster than a JSON list of strings.
+MAGIC = b"CXRP"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
 
-def persist_report(report_id: str, payload: Dict[str, Any]) -> Path:
-    BASE_DIR.mkdir(parents=True, exist_ok=True)
-    path = BASE_DIR / f"{report_id}.json"
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+REPORT_SUFFIX = ".report"
+LEGACY_SUFFIX = ".json"
+
+# Sections at least this large are zlib-compressed.
+COMPRESS_THRESHOLD = 4096
+
+_MEMBERS_SECTION = "patterns.member_chunks"
+_SEPARATOR = "\0"
+
+
+def _encode_section(raw: bytes, entry: Dict[str, Any]) -> bytes:
+    if len(raw) >= COMPRESS_THRESHOLD:
+        entry["codec"] = "zlib"
+        return zlib.compress(raw, 1)
+    entry["codec"] = "raw"
+    return raw
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _split_members(patterns: Any) -> Optional[tuple]:
+    # Returns (patterns without member_chunks, counts, joined members), or
+    # None when the column layout cannot represent them losslessly.
+    if not isinstance(patterns, list):
+        return None
+    stripped: List[Any] = []
+    counts: List[int] = []
+    members: List[str] = []
+    for pattern in patterns:
+        chunk_ids = pattern.get("member_chunks") if isinstance(pattern, dict) else None
+        if not isinstance(chunk_ids, list) or not all(
+            isinstance(chunk_id, str) and _SEPARATOR not in chunk_id for chunk_id in chunk_ids
+        ):
+            return None
+        stripped.append({key: value for key, value in pattern.items() if key != "member_chunks"})
+        counts.append(len(chunk_ids))
+        members.extend(chunk_ids)
+    return stripped, counts, _SEPARATOR.join(members).encode("utf-8")
+
+
+def encode_report(payload: Dict[str, Any]) -> bytes:
+    sections: Dict[str, bytes] = {}
+    index: Dict[str, Dict[str, Any]] = {}
+
+    for name, value in payload.items():
+        entry: Dict[str, Any] = {"encoding": "json"}
+        split = _split_members(value) if name == "patterns" else None
+        if split is not None:
+            stripped, counts, members = split
+            member_entry: Dict[str, Any] = {"encoding": "strings", "counts": counts}
+            sections[_MEMBERS_SECTION] = _encode_section(members, member_entry)
+            index[_MEMBERS_SECTION] = member_entry
+            value = stripped
+        sections[name] = _encode_section(_json_bytes(value), entry)
+        index[name] = entry
+
+    offset = 0
+    for name, data in sections.items():
+        index[name]["offset"] = offset
+        index[name]["length"] = len(data)
+        offset += len(data)
+
+    index_bytes = _json_bytes(index)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes))
+    return b"".join([header, index_bytes, *sections.values()])
+
+
+class ReportFile:
+    """
+    Memory-mapped binary report. Only the sections that are read get
+    decompressed and decoded.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a binary report")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported report format version {version} in {self.path}")
+        index_start = _HEADER.size
+        self._data_start = index_start + index_length
+        self._index: Dict[str, Dict[str, Any]] = json.loads(
+            self._map[index_start:self._data_start]
+        )
+
+    @property
+    def sections(self) -> List[str]:
+        return [name for name in self._index if name != _MEMBERS_SECTION]
+
+    def read(self, name: str) -> Any:
+        if name not in self._index or name == _MEMBERS_SECTION:
+            raise KeyError(name)
+        value = json.loads(self._raw(name))
+        if name == "patterns" and _MEMBERS_SECTION in self._index:
+            value = self._attach_members(value)
+        return value
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "ReportFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _raw(self, name: str) -> bytes:
+        entry = self._index[name]
+        start = self._data_start + entry["offset"]
+        data = self._map[start:start + entry["length"]]
+        if entry["codec"] == "zlib":
+            data = zlib.decompress(data)
+        return data
+
+    def _attach_members(self, patterns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        counts = self._index[_MEMBERS_SECTION]["counts"]
+        raw = self._raw(_MEMBERS_SECTION)
+        members = raw.decode("utf-8").split(_SEPARATOR) if sum(counts) else []
+        position = 0
+        for pattern, count in zip(patterns, counts):
+            pattern["member_chunks"] = members[position:position + count]
+            position += count
+        return patterns
+
+
+def report_dir() -> Path:
+    # Under DATA_DIR; settings are read per call so tests and tools can set it.
+    return Path(load_settings().data_dir) / "reports"
+
+
+def persist_report(
+    report_id: str,
+    payload: Dict[str, Any],
+    directory: Optional[Path] = None,
+) -> Path:
+    directory = Path(directory) if directory is not None else report_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{report_id}{REPORT_SUFFIX}"
+    # Write-then-rename so readers never map a partially written file.
+    partial = path.with_name(f"{path.name}.tmp")
+    partial.write_bytes(encode_report(payload))
+    os.replace(partial, path)
     return path
 
 
-def load_report(report_id: str) -> Dict[str, Any]:
-    path = BASE_DIR / f"{report_id}.json"
-    return json.loads(path.read_text(encoding="utf-8"))
+def load_report(
+    report_id: str,
+    sections: Optional[Iterable[str]] = None,
+    directory: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Loads a report, or only the requested top-level sections of it
+    (e.g. ["automata"]). Falls back to legacy JSON reports; raises
+    FileNotFoundError when neither exists.
+    """
+    directory = Path(directory) if directory is not None else report_dir()
+    wanted = list(sections) if sections is not None else None
+    path = directory / f"{report_id}{REPORT_SUFFIX}"
+    if path.exists():
+        with ReportFile(path) as report:
+            names = report.sections if wanted is None else wanted
+            return {name: report.read(name) for name in names if name in report.sections}
+
+    legacy = directory / f"{report_id}{LEGACY_SUFFIX}"
+    payload = json.loads(legacy.read_text(encoding="utf-8"))
+    if wanted is None:
+        return payload
+    return {name: payload[name] for name in wanted if name in payload}
@@ -1,5 +1,19 @@
 from __future__ import annotations
 
-from storage.vectors import store_report_vectors
+from storage.vectors import (
+    VectorIndex,
+    open_index,
+    search_chunks,
+    similar_subjects,
+    store_report_vectors,
+    summary_vector,
+)
 
-__all__ = ["store_report_vectors"]
+__all__ = [
+    "VectorIndex",
+    "open_index",
+    "search_chunks",
+    "similar_subjects",
+    "store_report_vectors",
+    "summary_vector",
+]
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import json
 import logging
+from concurrent.futures import Executor
 from typing import Any, Dict, Optional
 
-from backend.core.pipeline import run_pipeline
+from backend.config import load_settings
+from backend.storage.files import persist_report
 from storage.database import claim_next_job, update_job_status
 
 logger = logging.getLogger(__name__)
@@ -16,20 +18,31 @@ def _coerce_documents(value: Any) -> Any:
     return value
 
 
-def run_once() -> Optional[str]:
+def run_once(workers: Optional[int] = None, executor: Optional[Executor] = None) -> Optional[str]:
     job = claim_next_job()
     if not job:
         return None
+    # Deferred so that an empty queue never pays for the pipeline imports.
+    from backend.core.pipeline import run_pipeline
 
     analysis_id = str(job["analysis_id"])
     try:
         documents = _coerce_documents(job.get("documents", []))
-        report = run_pipeline(documents)
+        report = run_pipeline(
+            str(job.get("subject_id", "unknown")),
+            documents,
+            workers=workers,
+            executor=executor,
+        )
         if hasattr(report, "model_dump"):
             payload: Dict[str, Any] = report.model_dump(by_alias=True)
         else:
             payload = report.dict(by_alias=True)
         update_job_status(analysis_id, "completed", report=payload)
+        try:
+            persist_report(analysis_id, payload)
+        except OSError:
+            logger.exception("Report file write failed for analysis job %s", analysis_id)
         logger.info("Completed analysis job %s", analysis_id)
     except Exception as exc:  # noqa: BLE001
         logger.exception("Analysis job %s failed", analysis_id)
@@ -38,7 +51,7 @@ def run_once() -> Optional[str]:
 
 
 def main() -> None:
-    processed = run_once()
+    processed = run_once(workers=load_settings().pipeline_workers)
     if processed is None:
         logger.info("No queued analysis jobs available.")
 
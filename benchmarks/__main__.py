@@ -0,0 +1,118 @@
+"""
+Pipeline benchmark suite.
+
+    python -m benchmarks run --scales 1k,100k --output benchmarks/baselines/local.json
+    python -m benchmarks compare benchmarks/baselines/reference.json benchmarks/baselines/local.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from benchmarks.corpus import CorpusConfig
+from benchmarks.suite import (
+    STAGES,
+    compare_results,
+    load_results,
+    parse_scale,
+    run_suite,
+    save_results,
+)
+
+
+def _pair(value: str) -> tuple:
+    low, _, high = value.partition(",")
+    return int(low), int(high or low)
+
+
+def _run(args: argparse.Namespace) -> int:
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    config = CorpusConfig(
+        paragraphs=args.paragraphs,
+        sentences_per_paragraph=args.sentences,
+        words_per_sentence=args.words,
+        sources=tuple(args.sources.split(",")),
+        authors=args.authors,
+        span_days=args.span_days,
+        seed=args.seed,
+    )
+    payload = run_suite(
+        stages,
+        [parse_scale(scale) for scale in args.scales.split(",")],
+        config,
+        repeat=args.repeat,
+        log=print,
+    )
+    if args.output:
+        save_results(args.output, payload)
+        print(f"Wrote {args.output}")
+    return 1 if any("error" in result for result in payload["results"]) else 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    rows = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+    )
+    for row in rows:
+        if "error" in row:
+            print(f"{row['stage']:<36} {row['chunks']:>9} ERROR {row['error']}")
+            continue
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['stage']:<36} {row['chunks']:>9} {row['metric']:<13} "
+            f"{row['baseline']:>10.3f} -> {row['current']:>10.3f} "
+            f"({row['change']:+.1%}) {flag}"
+        )
+    regressions = sum(row["regression"] and "error" not in row for row in rows)
+    errors = sum("error" in row for row in rows)
+    print(
+        f"{regressions} regression(s) beyond {args.threshold:.0%} and {errors} errored stage(s) "
+        f"in {len(rows)} comparison(s)"
+    )
+    return 1 if regressions or errors else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run stages and optionally save a JSON baseline.")
+    run.add_argument("--stages", default=None, help=f"Comma-separated subset of: {', '.join(STAGES)}.")
+    run.add_argument("--scales", default="1k,100k", help="Comma-separated chunk counts, e.g. 1k,100k,1m.")
+    run.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept.")
+    run.add_argument("--output", default=None, help="Where to write the JSON results.")
+    run.add_argument("--paragraphs", type=_pair, default=(2, 12), help="Paragraphs per document, min,max.")
+    run.add_argument("--sentences", type=_pair, default=(1, 5), help="Sentences per paragraph, min,max.")
+    run.add_argument("--words", type=_pair, default=(6, 24), help="Words per sentence, min,max.")
+    run.add_argument("--sources", default="email,chat,doc,ticket,note")
+    run.add_argument("--authors", type=int, default=1)
+    run.add_argument("--span-days", type=int, default=365, help="Timestamp spread in days.")
+    run.add_argument("--seed", type=int, default=0)
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser("compare", help="Flag regressions between two result files.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative increase.")
+    compare.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="Ignore timings shorter than this in both runs.",
+    )
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Peak-RSS comparison of per-chunk pydantic objects against ChunkTable.
+
+    python -m benchmarks.chunk_memory --documents 20000
+
+Each mode runs in a fresh interpreter and reports the peak RSS growth
+caused by chunking the same synthetic corpus, sorting it by time and
+mapping chunks to (dummy) cluster assignments.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.corpus import CorpusConfig, iter_documents
+
+def _corpus(documents: int, seed: int) -> List[Tuple[str, datetime, str]]:
+    return [
+        (doc["document_id"], datetime.fromisoformat(doc["timestamp"]), doc["content"])
+        for doc in iter_documents(documents, CorpusConfig(seed=seed))
+    ]
+
+
+def _peak_rss_kib() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _objects(corpus: List[Tuple[str, datetime, str]]) -> int:
+    from backend.core.ingestion.chunking import iter_chunks
+    from backend.core.schemas import Chunk
+
+    chunks = [
+        Chunk(
+            chunk_id=f"{document_id}:{index}",
+            document_id=document_id,
+            content=chunk.text,
+            index=index,
+            timestamp=timestamp,
+        )
+        for document_id, timestamp, content in corpus
+        for index, chunk in enumerate(iter_chunks(content))
+    ]
+    chunks = sorted(chunks, key=lambda c: c.timestamp)
+    chunk_to_cluster: Dict[str, str] = {
+        chunk.chunk_id: f"cluster_{position % 8}" for position, chunk in enumerate(chunks)
+    }
+    sequence = [chunk_to_cluster[chunk.chunk_id] for chunk in chunks]
+    return len(sequence)
+
+
+def _table(corpus: List[Tuple[str, datetime, str]]) -> int:
+    from backend.core.ingestion.chunk_table import ChunkTable
+
+    chunks = ChunkTable.from_documents(corpus).sort_by_time()
+    labels = np.arange(len(chunks)) % 8
+    return int(len(labels))
+
+
+MODES = {"objects": _objects, "table": _table}
+
+
+def _measure(mode: str, documents: int, seed: int, results: "multiprocessing.Queue") -> None:
+    corpus = _corpus(documents, seed)
+    # Touch the imports first so they are not charged to the mode itself.
+    import backend.core.ingestion.chunk_table  # noqa: F401
+    import backend.core.schemas  # noqa: F401
+
+    before = _peak_rss_kib()
+    chunks = MODES[mode](corpus)
+    results.put((mode, chunks, _peak_rss_kib() - before))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    for mode in MODES:
+        process = context.Process(target=_measure, args=(mode, args.documents, args.seed, results))
+        process.start()
+        process.join()
+        name, chunks, growth = results.get()
+        print(f"{name:>8}: {chunks} chunks, peak RSS +{growth / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
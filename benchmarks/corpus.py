@@ -0,0 +1,71 @@
+"""
+Deterministic synthetic corpus for benchmarks.
+
+The same CorpusConfig and seed always produce the same documents, so runs
+on different commits measure the same input.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+WORDS = (
+    "therefore however because if then we should consider the data shows "
+    "maybe perhaps first second finally result pattern system design "
+    "thus hence and or not implies question answer plan detail scope"
+).split()
+
+SOURCES = ("email", "chat", "doc", "ticket", "note")
+
+
+@dataclass(frozen=True)
+class CorpusConfig:
+    paragraphs: Tuple[int, int] = (2, 12)
+    sentences_per_paragraph: Tuple[int, int] = (1, 5)
+    words_per_sentence: Tuple[int, int] = (6, 24)
+    sources: Tuple[str, ...] = SOURCES
+    authors: int = 1
+    span_days: int = 365
+    seed: int = 0
+
+
+def iter_documents(count: int, config: CorpusConfig = CorpusConfig()) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(config.seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    span_seconds = max(config.span_days, 0) * 24 * 3600
+
+    def sentence() -> str:
+        words = rng.randint(*config.words_per_sentence)
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def paragraph() -> str:
+        return " ".join(sentence() for _ in range(rng.randint(*config.sentences_per_paragraph)))
+
+    for index in range(count):
+        timestamp = start + timedelta(seconds=rng.randint(0, span_seconds))
+        yield {
+            "document_id": f"doc_{index}",
+            "author_id": f"author_{index % max(config.authors, 1)}",
+            "source": rng.choice(config.sources),
+            "content": "\n\n".join(paragraph() for _ in range(rng.randint(*config.paragraphs))),
+            "timestamp": timestamp.isoformat(),
+        }
+
+
+def generate_corpus(count: int, config: CorpusConfig = CorpusConfig()) -> List[Dict[str, Any]]:
+    return list(iter_documents(count, config))
+
+
+def documents_for_chunks(chunks: int, config: CorpusConfig = CorpusConfig()) -> int:
+    """
+    Estimates how many documents yield roughly `chunks` chunks.
+    """
+    from backend.core.ingestion.chunking import chunk_text
+
+    sample = generate_corpus(500, config)
+    per_document = sum(len(chunk_text(doc["content"])) for doc in sample) / len(sample)
+    return max(1, math.ceil(chunks / max(per_document, 1e-9)))
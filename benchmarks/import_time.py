@@ -0,0 +1,85 @@
+"""
+Startup import-time budget for the CLI and worker entry points.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --module backend.cli=50
+
+Each module is imported in a fresh interpreter under `python -X importtime`
+and its cumulative import time (the best of --repeat runs) is checked
+against a budget. Exits non-zero when any module is over budget, so heavy
+dependencies (pydantic, NumPy, psycopg) creeping back into module load fail
+CI rather than every short CLI run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, Optional
+
+# Milliseconds; about twice the measured cost, so only a new heavy import
+# trips them (pydantic, NumPy and psycopg cost 30-130 ms each).
+IMPORT_BUDGETS_MS: Dict[str, float] = {
+    "backend.cli": 50.0,
+    "backend.workers.analysis_job": 100.0,
+    "workers.analysis_job": 150.0,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s?(\S.*)$")
+
+
+def import_time_ms(module: str) -> float:
+    """
+    Cumulative import time of `module` in a fresh interpreter, in ms.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr}")
+    cumulative: Optional[int] = None
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        # Top-level entries are unindented; the module itself comes last.
+        if match and match.group(3) == module:
+            cumulative = int(match.group(2))
+    if cumulative is None:
+        raise RuntimeError(f"no import time reported for {module}")
+    return cumulative / 1000
+
+
+def _budget(value: str) -> tuple:
+    module, _, budget = value.partition("=")
+    return module, float(budget) if budget else IMPORT_BUDGETS_MS.get(module, 100.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module; the fastest is kept.")
+    parser.add_argument(
+        "--module",
+        type=_budget,
+        action="append",
+        default=None,
+        metavar="MODULE[=MS]",
+        help="Check only these modules, optionally with their own budget.",
+    )
+    args = parser.parse_args()
+
+    budgets = dict(args.module) if args.module else IMPORT_BUDGETS_MS
+    over = 0
+    for module, budget in budgets.items():
+        best = min(import_time_ms(module) for _ in range(max(args.repeat, 1)))
+        flag = "OVER BUDGET" if best > budget else ""
+        over += best > budget
+        print(f"{module:<32} {best:>8.1f} ms / {budget:>6.1f} ms {flag}")
+    print(f"{over} module(s) over budget")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
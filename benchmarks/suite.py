@@ -0,0 +1,332 @@
+"""
+Per-stage pipeline benchmarks.
+
+Each (stage, scale) pair runs in a fresh interpreter: inputs are built
+first, then the stage is timed and its peak RSS recorded on its own.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from backend.core.automata.state_inference import infer_states
+from backend.core.clustering.cluster import NOISE_LABEL, cluster_embeddings
+from backend.core.features.cache import FeatureCache
+from backend.core.features.linguistic import extract_linguistic_features_batch
+from backend.core.features.sequential import extract_sequence_inputs, sequential_features
+from backend.core.features.structural import (
+    extract_structural_features,
+    extract_structural_features_batch,
+)
+from backend.core.ingestion.chunking import chunk_text
+from backend.core.pipeline import FEATURE_MIN_SAMPLES, FEATURES_VERSION, run_pipeline
+from benchmarks.corpus import CorpusConfig, documents_for_chunks, generate_corpus
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+METRICS = ("wall_seconds", "peak_rss_mib")
+# Clustering output of the stages that cluster, checked like METRICS: more
+# clusters or more noise on the same corpus is a regression too.
+QUALITY_METRICS = ("clusters", "noise_ratio")
+
+
+class Stage(NamedTuple):
+    setup: Callable[[int, CorpusConfig], Any]
+    run: Callable[[Any], Any]
+
+
+def _documents(chunks: int, config: CorpusConfig) -> List[Dict[str, Any]]:
+    return generate_corpus(documents_for_chunks(chunks, config), config)
+
+
+def _contents(chunks: int, config: CorpusConfig) -> List[str]:
+    return [document["content"] for document in _documents(chunks, config)]
+
+
+def _texts(chunks: int, config: CorpusConfig) -> List[str]:
+    return [text for content in _contents(chunks, config) for text in chunk_text(content)]
+
+
+def _sequence_rows(chunks: int, config: CorpusConfig) -> np.ndarray:
+    texts = _texts(chunks, config)
+    return np.hstack([extract_linguistic_features_batch(texts), extract_sequence_inputs(texts)])
+
+
+def _features(chunks: int, config: CorpusConfig) -> np.ndarray:
+    # The rows run_pipeline clusters, in corpus order
+    texts = _texts(chunks, config)
+    rows = extract_structural_features_batch(texts) + extract_linguistic_features_batch(texts)
+    return sequential_features(np.hstack([rows, extract_sequence_inputs(texts)]))
+
+
+def _state_sequence(chunks: int, config: CorpusConfig) -> List[str]:
+    # Random walk over 8 states with sticky self-transitions.
+    rng = np.random.default_rng(config.seed)
+    moves = np.where(rng.random(chunks) < 0.6, 0, rng.integers(1, 8, size=chunks))
+    return [f"cluster_{state}" for state in (np.cumsum(moves) % 8).tolist()]
+
+
+def _chunk_all(contents: List[str]) -> int:
+    return sum(len(chunk_text(content)) for content in contents)
+
+
+def _extract_each(texts: List[str]) -> int:
+    return len([extract_structural_features(text) for text in texts])
+
+
+def _extract_batch(texts: List[str]) -> int:
+    return len(extract_structural_features_batch(texts))
+
+
+def _extract_linguistic(texts: List[str]) -> int:
+    return len(extract_linguistic_features_batch(texts))
+
+
+def _sequential(rows: np.ndarray) -> int:
+    return len(sequential_features(rows))
+
+
+def _clustering(clusters: int, members: int, rows: int) -> Dict[str, Any]:
+    return {"clusters": clusters, "noise_ratio": round(1.0 - members / rows, 4) if rows else 0.0}
+
+
+def _cluster(features: np.ndarray) -> Dict[str, Any]:
+    clusters = cluster_embeddings(features, FEATURE_MIN_SAMPLES)
+    noise = len(clusters.pop(NOISE_LABEL, []))
+    return _clustering(len(clusters), len(features) - noise, len(features))
+
+
+def _infer(sequence: List[str]) -> int:
+    return len(infer_states(sequence)[1])
+
+
+def _pipeline(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # A fresh in-memory cache per run, so every repeat is a cold run.
+    chunks: List[int] = []
+    report = run_pipeline(
+        "benchmark",
+        documents,
+        feature_cache=FeatureCache(FEATURES_VERSION),
+        on_features=lambda table, rows: chunks.append(len(rows)),
+    )
+    members = sum(len(pattern.member_chunks) for pattern in report.patterns)
+    return _clustering(len(report.patterns), members, sum(chunks))
+
+
+STAGES: Dict[str, Stage] = {
+    "chunk_text": Stage(_contents, _chunk_all),
+    "extract_structural_features": Stage(_texts, _extract_each),
+    "extract_structural_features_batch": Stage(_texts, _extract_batch),
+    "extract_linguistic_features_batch": Stage(_texts, _extract_linguistic),
+    "sequential_features": Stage(_sequence_rows, _sequential),
+    "cluster_embeddings": Stage(_features, _cluster),
+    "infer_states": Stage(_state_sequence, _infer),
+    "run_pipeline": Stage(_documents, _pipeline),
+}
+
+
+def parse_scale(value: str) -> int:
+    value = value.strip().lower()
+    if value in SCALES:
+        return SCALES[value]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+# ---------- Memory ----------
+
+def _reset_peak_rss() -> bool:
+    # Linux can reset the RSS high-water mark; elsewhere the process peak is used.
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _status_mib(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mib() -> float:
+    peak = _status_mib("VmHWM")
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------- Running ----------
+
+def _measure(
+    stage: str,
+    chunks: int,
+    config: CorpusConfig,
+    repeat: int,
+    results: "multiprocessing.Queue",
+) -> None:
+    try:
+        inputs = STAGES[stage].setup(chunks, config)
+        size = len(inputs)
+        gc.collect()
+        setup_rss = _status_mib("VmRSS")
+        isolated = _reset_peak_rss()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = STAGES[stage].run(inputs)
+            timings.append(time.perf_counter() - started)
+        result = {
+            "stage": stage,
+            "chunks": chunks,
+            "input_size": size,
+            "wall_seconds": round(min(timings), 6),
+            "peak_rss_mib": round(_peak_rss_mib(), 1),
+            # Peak includes the resident inputs (setup_rss_mib).
+            "setup_rss_mib": round(setup_rss, 1) if setup_rss is not None else None,
+            "peak_rss_isolated": isolated,
+        }
+        if isinstance(output, dict):
+            result.update(output)
+        results.put(result)
+    except BaseException as exc:  # noqa: BLE001
+        results.put({"stage": stage, "chunks": chunks, "error": repr(exc)})
+
+
+def run_suite(
+    stages: Sequence[str],
+    scales: Sequence[int],
+    config: CorpusConfig = CorpusConfig(),
+    repeat: int = 1,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results: List[Dict[str, Any]] = []
+    for chunks in scales:
+        for stage in stages:
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(stage, chunks, config, repeat, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            if log is not None:
+                log(format_result(result))
+    return {"meta": environment(config, repeat), "results": results}
+
+
+def environment(config: CorpusConfig, repeat: int) -> Dict[str, Any]:
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "corpus": asdict(config),
+    }
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"{result['stage']:<36} {result['chunks']:>9}  ERROR {result['error']}"
+    line = (
+        f"{result['stage']:<36} {result['chunks']:>9}  "
+        f"{result['wall_seconds']:>10.3f}s  {result['peak_rss_mib']:>9.1f} MiB"
+    )
+    if "clusters" in result:
+        line += f"  {result['clusters']} cluster(s), {result['noise_ratio']:.1%} noise"
+    return line
+
+
+# ---------- Baselines ----------
+
+def save_results(path: str, payload: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+        handle.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+    min_seconds: float = 0.05,
+) -> List[Dict[str, Any]]:
+    """
+    Pairs results by (stage, chunks) and returns one row per metric, with
+    `regression` set when current exceeds baseline by more than threshold.
+    Timings below min_seconds in both runs are too noisy to flag.
+    QUALITY_METRICS are compared when both runs recorded them.
+    A stage that errored in the current run is one `error` row flagged as a
+    regression, whether or not it passed in the baseline.
+    """
+    previous = {
+        (result["stage"], result["chunks"]): result
+        for result in baseline["results"]
+        if "error" not in result
+    }
+    rows: List[Dict[str, Any]] = []
+    for result in current["results"]:
+        before = previous.get((result["stage"], result["chunks"]))
+        if "error" in result:
+            rows.append(
+                {
+                    "stage": result["stage"],
+                    "chunks": result["chunks"],
+                    "metric": "error",
+                    "baseline": None if before is None else before["wall_seconds"],
+                    "current": None,
+                    "change": None,
+                    "regression": True,
+                    "error": result["error"],
+                }
+            )
+            continue
+        if before is None:
+            continue
+        for metric in METRICS + QUALITY_METRICS:
+            if metric not in before or metric not in result:
+                continue
+            old, new = before[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            noisy = metric == "wall_seconds" and max(old, new) < min_seconds
+            rows.append(
+                {
+                    "stage": result["stage"],
+                    "chunks": result["chunks"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                    "regression": change > threshold and not noisy,
+                }
+            )
+    return rows
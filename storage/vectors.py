@@ -1,13 +1,597 @@
 from __future__ import annotations
 
+import fcntl
+import json
 import logging
-from typing import Any, Dict
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from backend.config import load_settings
+from backend.core.versions import FEATURES_VERSION
 
 logger = logging.getLogger(__name__)
 
+CHUNK_INDEX = "chunks"
+REPORT_INDEX = "reports"
+
+# Separates subject and chunk ids in chunk index entries.
+_ID_SEPARATOR = "\t"
+
+# Vectors held before the first training; until then search is exact.
+TRAIN_MIN_VECTORS = 4096
+# Retrain once the index has grown by this factor since the last training.
+RETRAIN_GROWTH = 4
+TRAIN_SAMPLE = 65536
+KMEANS_ITERATIONS = 12
+MAX_LISTS = 4096
+DEFAULT_NPROBE = 8
+
+# Rows per block when scanning vectors.
+_BLOCK_ROWS = 65536
+# Vector x centroid distances per block when assigning vectors to lists.
+_ASSIGN_CELLS = 1 << 20
+
+# On-disk layout of one index directory:
+#   meta.json              dim, count, ids_bytes, epoch, features_version,
+#                          generation, nlist, and for standardized indexes
+#                          column sums, squares and the training weights
+#                          (written last, atomically; readers never look
+#                          past count)
+#   vectors-<epoch>.f32    count x dim float32, append-only
+#   ids-<epoch>.txt        one id per line, append-only
+#   centroids-<gen>.f32    nlist x dim float32 for the current training
+#   lists-<gen>.i32        inverted-list number per vector, append-only
+# A new epoch starts, empty, when vectors of another FEATURES_VERSION or
+# dimension are inserted.
+
+
+def _sq_distances(vectors: np.ndarray, query: np.ndarray) -> np.ndarray:
+    difference = vectors - query
+    return np.einsum("ij,ij->i", difference, difference)
+
+
+def _nearest(
+    vectors: np.ndarray, centroids: np.ndarray, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    # Nearest centroid per (weighted) row; blocks hold at most
+    # _ASSIGN_CELLS distances
+    norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.int32)
+    rows = max(_ASSIGN_CELLS // max(len(centroids), 1), 1)
+    for start in range(0, len(vectors), rows):
+        block = np.asarray(vectors[start:start + rows], dtype=np.float32)
+        if weights is not None:
+            block = block * weights
+        out[start:start + len(block)] = np.argmin(norms[None, :] - 2.0 * block @ centroids.T, axis=1)
+    return out
+
+
+def _kmeans(sample: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = _nearest(sample, centroids)
+        sizes = np.bincount(labels, minlength=lists)
+        sums = np.zeros_like(centroids, dtype=np.float64)
+        np.add.at(sums, labels, sample)
+        filled = sizes > 0
+        centroids[filled] = (sums[filled] / sizes[filled, None]).astype(np.float32)
+        # Empty lists restart at a random sample point
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), size=len(empty))]
+    return centroids
+
+
+def _column_weights(meta: Dict[str, Any]) -> Optional[np.ndarray]:
+    # 1 / per-column standard deviation of the stored vectors, from the
+    # running sums. Weighting both sides of a distance by these is
+    # standardizing the columns as the clustering path does (the mean
+    # cancels); constant columns keep weight 1.
+    count = meta["count"]
+    if not count or "sums" not in meta:
+        return None
+    mean = np.asarray(meta["sums"]) / count
+    scale = np.sqrt(np.maximum(np.asarray(meta["squares"]) / count - mean**2, 0.0))
+    scale[scale <= 1e-6 * np.abs(mean)] = 1.0
+    scale[scale == 0] = 1.0
+    return (1.0 / scale).astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Embedded IVF (inverted file) index persisted as memory-mapped files.
+    Inserts append; the coarse quantizer (k-means centroids) is trained by
+    train(), due once TRAIN_MIN_VECTORS are stored and again as the index
+    grows. Training runs outside the insert lock, so inserts carry on
+    meanwhile. Searches probe the nprobe nearest lists, or scan everything
+    while untrained. One process writes (under a file lock); any number read.
+    With standardize, distances are between column-standardized vectors;
+    the column scales are fixed at each training, and current while
+    untrained.
+    """
+
+    def __init__(self, path: Path, track_ids: bool = False, standardize: bool = False) -> None:
+        self.path = Path(path)
+        self._standardize = standardize
+        self._weights: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Any] = {}
+        self._meta_mtime: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        # Ids stay on disk; only the end offset of each line is held.
+        self._id_bytes: np.ndarray = np.zeros(0, dtype=np.uint8)
+        self._id_ends: np.ndarray = np.zeros(0, dtype=np.int64)
+        # Latest row per id, kept only when track_ids (for vector lookups)
+        self._track_ids = track_ids
+        self._positions: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None
+        # Inverted lists: rows sorted by list, with per-list offsets, built
+        # for the first `_sorted_count` rows; later rows are scanned.
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._sorted_count = 0
+
+    # ---------- Files ----------
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {
+                "dim": None,
+                "count": 0,
+                "ids_bytes": 0,
+                "epoch": 0,
+                "features_version": FEATURES_VERSION,
+                "generation": 0,
+                "nlist": 0,
+            }
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        temporary = self._file("meta.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self._file("meta.json"))
+
+    @contextmanager
+    def _writer(self) -> Iterator[Dict[str, Any]]:
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._file("lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self._read_meta()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _unlink(self, *names: str) -> None:
+        # Readers still holding the old maps keep them valid until closed
+        for name in names:
+            try:
+                os.unlink(self._file(name))
+            except FileNotFoundError:
+                pass
+
+    def _append(self, name: str, data: bytes, committed: int) -> None:
+        # Drops bytes past the committed length left by an interrupted writer
+        with open(self._file(name), "ab") as handle:
+            if handle.tell() != committed:
+                handle.truncate(committed)
+                handle.seek(committed)
+            handle.write(data)
+
+    def _map(self, name: str, dtype: Any, rows: int, dim: int = 0) -> np.ndarray:
+        shape = (rows, dim) if dim else (rows,)
+        if not rows:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    # ---------- Writing ----------
+
+    def insert(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(ids) != len(vectors):
+            raise ValueError("Expected one id per vector row")
+        if not len(vectors):
+            return
+        with self._writer() as meta:
+            if meta["count"] and (
+                meta.get("features_version") != FEATURES_VERSION
+                or meta["dim"] != vectors.shape[1]
+            ):
+                self._clear(meta)
+            dim = meta["dim"] = vectors.shape[1]
+            meta["features_version"] = FEATURES_VERSION
+            count, epoch = meta["count"], meta.get("epoch", 0)
+            encoded = "".join(
+                str(item).replace("\n", " ") + "\n" for item in ids
+            ).encode("utf-8")
+
+            if self._standardize:
+                self._add_column_sums(meta, vectors)
+            self._append(f"vectors-{epoch}.f32", vectors.tobytes(), count * dim * 4)
+            self._append(f"ids-{epoch}.txt", encoded, meta["ids_bytes"])
+            if meta["nlist"]:
+                centroids = self._map(
+                    f"centroids-{meta['generation']}.f32", np.float32, meta["nlist"], dim
+                )
+                weights = meta.get("weights")
+                self._append(
+                    f"lists-{meta['generation']}.i32",
+                    _nearest(
+                        vectors,
+                        np.asarray(centroids),
+                        None if weights is None else np.asarray(weights, dtype=np.float32),
+                    ).tobytes(),
+                    count * 4,
+                )
+            meta.update(count=count + len(vectors), ids_bytes=meta["ids_bytes"] + len(encoded))
+            self._write_meta(meta)
+
+    def _add_column_sums(self, meta: Dict[str, Any], vectors: np.ndarray) -> None:
+        if "sums" not in meta:
+            # Indexes written before standardizing: count the stored rows once
+            stored = np.asarray(
+                self._map(
+                    f"vectors-{meta.get('epoch', 0)}.f32",
+                    np.float32,
+                    meta["count"],
+                    vectors.shape[1],
+                ),
+                dtype=np.float64,
+            )
+            meta["sums"] = stored.sum(axis=0).tolist()
+            meta["squares"] = (stored**2).sum(axis=0).tolist()
+        rows = vectors.astype(np.float64)
+        meta["sums"] = (np.asarray(meta["sums"]) + rows.sum(axis=0)).tolist()
+        meta["squares"] = (np.asarray(meta["squares"]) + (rows**2).sum(axis=0)).tolist()
+
+    def _clear(self, meta: Dict[str, Any]) -> None:
+        # Vectors of another feature version or size are not comparable
+        # with new ones; start an empty epoch instead of mixing them.
+        logger.info(
+            "Clearing vector index %s (%d vectors, features %s, dim %s)",
+            self.path,
+            meta["count"],
+            meta.get("features_version"),
+            meta["dim"],
+        )
+        epoch, generation = meta.get("epoch", 0), meta["generation"]
+        self._unlink(
+            f"vectors-{epoch}.f32",
+            f"ids-{epoch}.txt",
+            f"centroids-{generation}.f32",
+            f"lists-{generation}.i32",
+        )
+        if "epoch" not in meta:
+            # Files of the layout before epochs
+            self._unlink("vectors.f32", "ids.txt")
+        meta.update(
+            dim=None,
+            count=0,
+            ids_bytes=0,
+            epoch=epoch + 1,
+            features_version=FEATURES_VERSION,
+            nlist=0,
+            trained_count=0,
+        )
+        for key in ("sums", "squares", "weights"):
+            meta.pop(key, None)
+
+    def needs_training(self) -> bool:
+        meta = self._read_meta()
+        return meta["count"] >= TRAIN_MIN_VECTORS and (
+            not meta["nlist"] or meta["count"] >= RETRAIN_GROWTH * meta.get("trained_count", 0)
+        )
 
-def store_report_vectors(subject_id: str, report: Dict[str, Any]) -> None:
-    logger.info(
-        "Vector storage not configured. Skipping vector persistence for subject %s.",
-        subject_id,
+    def train(self) -> bool:
+        """
+        Retrains the coarse quantizer if it is due; returns whether it did.
+        k-means and list assignment run on the vectors stored when training
+        starts, without holding the insert lock; rows inserted meanwhile are
+        assigned when the new lists are committed. Concurrent calls skip.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._file("train.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                return self._train()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _train(self) -> bool:
+        if not self.needs_training():
+            return False
+        snapshot = self._read_meta()
+        count, dim, epoch = snapshot["count"], snapshot["dim"], snapshot.get("epoch", 0)
+        vectors = self._map(f"vectors-{epoch}.f32", np.float32, count, dim)
+        lists = int(min(MAX_LISTS, max(1, np.sqrt(count))))
+        rng = np.random.default_rng(count)
+        sample_rows = np.sort(rng.choice(count, size=min(count, TRAIN_SAMPLE), replace=False))
+        # Centroids live in the weighted space of this training's scales
+        weights = _column_weights(snapshot) if self._standardize else None
+        sample = np.asarray(vectors[sample_rows])
+        centroids = _kmeans(sample if weights is None else sample * weights, lists)
+
+        # Only train() moves the generation on, under train.lock.
+        generation = snapshot["generation"] + 1
+        new_files = (f"centroids-{generation}.f32", f"lists-{generation}.i32")
+        centroids.tofile(self._file(new_files[0]))
+        _nearest(vectors, centroids, weights).tofile(self._file(new_files[1]))
+        del vectors
+
+        with self._writer() as meta:
+            if meta.get("epoch", 0) != epoch:
+                # Cleared while training
+                self._unlink(*new_files)
+                return False
+            if meta["count"] > count:
+                added = self._map(f"vectors-{epoch}.f32", np.float32, meta["count"], dim)[count:]
+                self._append(
+                    new_files[1], _nearest(added, centroids, weights).tobytes(), count * 4
+                )
+            previous = meta["generation"]
+            meta.update(generation=generation, nlist=lists, trained_count=count)
+            if weights is not None:
+                meta["weights"] = weights.tolist()
+            self._write_meta(meta)
+        self._unlink(f"centroids-{previous}.f32", f"lists-{previous}.i32")
+        logger.info("Trained vector index %s: %d lists over %d vectors", self.path, lists, count)
+        return True
+
+    # ---------- Reading ----------
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.stat(self._file("meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._meta_mtime:
+            return
+        meta = self._read_meta()
+        if meta.get("features_version") != FEATURES_VERSION:
+            # Vectors of another feature version read as an empty index
+            meta = {**meta, "count": 0, "ids_bytes": 0, "nlist": 0}
+        count, dim, epoch = meta["count"], meta["dim"] or 0, meta.get("epoch", 0)
+        if epoch != self._meta.get("epoch", 0):
+            # Cleared: ids and lists start over
+            self._id_ends = np.zeros(0, dtype=np.int64)
+            self._positions = {}
+            self._centroids = None
+            self._sorted_count = 0
+        self._vectors = self._map(f"vectors-{epoch}.f32", np.float32, count, dim)
+
+        read = int(self._id_ends[-1]) + 1 if len(self._id_ends) else 0
+        self._id_bytes = self._map(f"ids-{epoch}.txt", np.uint8, meta["ids_bytes"])
+        added = np.flatnonzero(np.asarray(self._id_bytes[read:]) == ord("\n")) + read
+        first_row = len(self._id_ends)
+        self._id_ends = np.concatenate((self._id_ends, added))
+        if self._track_ids and len(added):
+            text = bytes(self._id_bytes[read:int(added[-1])]).decode("utf-8")
+            self._positions.update(zip(text.split("\n"), range(first_row, len(self._id_ends))))
+
+        if meta["nlist"]:
+            if self._centroids is None or meta["generation"] != self._meta.get("generation"):
+                self._centroids = np.array(
+                    self._map(f"centroids-{meta['generation']}.f32", np.float32, meta["nlist"], dim)
+                )
+                self._sorted_count = 0
+            self._lists = self._map(f"lists-{meta['generation']}.i32", np.int32, count)
+            # Re-sort once a tenth of the rows are past the sorted prefix
+            if count - self._sorted_count > count // 10:
+                lists = np.asarray(self._lists)
+                self._order = np.argsort(lists, kind="stable").astype(np.int64)
+                self._offsets = np.searchsorted(lists[self._order], np.arange(meta["nlist"] + 1))
+                self._sorted_count = count
+        self._weights = None
+        if self._standardize:
+            self._weights = (
+                np.asarray(meta["weights"], dtype=np.float32)
+                if meta["nlist"] and "weights" in meta
+                else _column_weights(meta)
+            )
+        self._meta, self._meta_mtime = meta, mtime
+
+    def _id(self, row: int) -> str:
+        start = int(self._id_ends[row - 1]) + 1 if row else 0
+        return bytes(self._id_bytes[start:int(self._id_ends[row])]).decode("utf-8")
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._meta.get("count", 0)
+
+    def vector(self, item: str) -> Optional[np.ndarray]:
+        """
+        Latest vector stored under this id; needs track_ids.
+        """
+        with self._lock:
+            self._refresh()
+            position = self._positions.get(item)
+            if position is None:
+                return None
+            return np.array(self._vectors[position])
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        if self._centroids is None or not self._meta.get("nlist"):
+            return None
+        distances = _sq_distances(self._centroids, query)
+        probes = np.argsort(distances)[: max(nprobe, 1)]
+        rows = [self._order[self._offsets[probe]:self._offsets[probe + 1]] for probe in probes]
+        count = self._meta["count"]
+        if count > self._sorted_count:
+            tail = np.asarray(self._lists[self._sorted_count:count])
+            rows.append(np.flatnonzero(np.isin(tail, probes)) + self._sorted_count)
+        return np.sort(np.concatenate(rows))
+
+    def search(
+        self, query: np.ndarray, k: int = 10, nprobe: int = DEFAULT_NPROBE
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate k nearest ids by Euclidean distance, nearest first;
+        standardized indexes weight every column by 1 / its scale.
+        """
+        with self._lock:
+            self._refresh()
+            count = self._meta.get("count", 0)
+            if not count or k <= 0:
+                return []
+            query = np.asarray(query, dtype=np.float32).reshape(-1)
+            if query.shape[0] != self._meta["dim"]:
+                raise ValueError(f"Expected a {self._meta['dim']}-dimensional query")
+            weights = self._weights
+            if weights is not None:
+                query = query * weights
+
+            rows = self._candidates(query, nprobe)
+            if rows is None:
+                rows = np.arange(count)
+            best_rows: List[np.ndarray] = []
+            best_distances: List[np.ndarray] = []
+            for start in range(0, len(rows), _BLOCK_ROWS):
+                block = rows[start:start + _BLOCK_ROWS]
+                points = np.asarray(self._vectors[block])
+                if weights is not None:
+                    points = points * weights
+                distances = _sq_distances(points, query)
+                keep = np.argsort(distances)[:k] if len(block) > k else np.arange(len(block))
+                best_rows.append(block[keep])
+                best_distances.append(distances[keep])
+            rows = np.concatenate(best_rows)
+            distances = np.concatenate(best_distances)
+            top = np.argsort(distances, kind="stable")[:k]
+            return [
+                (self._id(row), float(np.sqrt(distance)))
+                for row, distance in zip(rows[top].tolist(), distances[top].tolist())
+            ]
+
+
+_indexes: Dict[Path, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+# Index paths with a training thread running in this process
+_training: Set[Path] = set()
+
+
+def vector_dir() -> Path:
+    # VECTOR_INDEX_DIR, else under DATA_DIR; never relative to the working directory
+    configured = os.environ.get("VECTOR_INDEX_DIR")
+    if configured:
+        return Path(os.path.abspath(configured))
+    return Path(load_settings().data_dir) / "vectors"
+
+
+def open_index(name: str) -> VectorIndex:
+    path = vector_dir() / name
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            # Summaries are compared by standardized columns
+            index = VectorIndex(
+                path, track_ids=name == REPORT_INDEX, standardize=name == REPORT_INDEX
+            )
+            _indexes[path] = index
+        return index
+
+
+def _train_in_background(index: VectorIndex) -> None:
+    def run() -> None:
+        try:
+            index.train()
+        except Exception:  # noqa: BLE001
+            logger.exception("Training vector index %s failed", index.path)
+        finally:
+            with _indexes_lock:
+                _training.discard(index.path)
+
+    with _indexes_lock:
+        if index.path in _training:
+            return
+        _training.add(index.path)
+    threading.Thread(target=run, name=f"train-{index.path.name}", daemon=True).start()
+
+
+def summary_vector(chunk_vectors: np.ndarray) -> np.ndarray:
+    """
+    Per-report vector: mean and spread of its chunks' feature vectors.
+    """
+    chunk_vectors = np.asarray(chunk_vectors, dtype=np.float32)
+    return np.concatenate((chunk_vectors.mean(axis=0), chunk_vectors.std(axis=0)))
+
+
+def store_report_vectors(
+    subject_id: str,
+    report: Dict[str, Any],
+    chunk_ids: Optional[Sequence[str]] = None,
+    chunk_vectors: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Indexes a finished report: one entry per chunk feature vector and one
+    summary vector per report, under the subject id.
+    """
+    if chunk_ids is None or chunk_vectors is None or not len(chunk_ids):
+        logger.info("No feature vectors for subject %s; skipping vector indexing.", subject_id)
+        return
+    subject = subject_id.replace(_ID_SEPARATOR, " ")
+    open_index(CHUNK_INDEX).insert(
+        [subject + _ID_SEPARATOR + chunk_id for chunk_id in chunk_ids], chunk_vectors
     )
+    open_index(REPORT_INDEX).insert([subject], summary_vector(chunk_vectors)[None, :])
+    for name in (CHUNK_INDEX, REPORT_INDEX):
+        index = open_index(name)
+        if index.needs_training():
+            _train_in_background(index)
+
+
+def similar_subjects(
+    subject_id: str, k: int = 10, nprobe: int = DEFAULT_NPROBE
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Subjects whose latest report summary is nearest to this subject's, or
+    None when the subject has no indexed report.
+    """
+    index = open_index(REPORT_INDEX)
+    query = index.vector(subject_id)
+    if query is None:
+        return None
+    # Older reports of the same subject are also indexed; over-fetch and
+    # keep each subject's nearest entry, widening the search until k other
+    # subjects are found or it covers every entry and list.
+    total = len(index)
+    fetch, probes = k * 4 + 1, nprobe
+    while True:
+        results: Dict[str, float] = {}
+        for item, distance in index.search(query, fetch, probes):
+            if item != subject_id and item not in results:
+                results[item] = distance
+        if len(results) >= k or (fetch >= total and probes >= MAX_LISTS):
+            break
+        fetch, probes = min(fetch * 4, total), min(max(probes, 1) * 4, MAX_LISTS)
+    return [
+        {"subject_id": item, "distance": distance}
+        for item, distance in list(results.items())[:k]
+    ]
+
+
+def search_chunks(
+    vector: Sequence[float], k: int = 10, nprobe: int = DEFAULT_NPROBE
+) -> List[Dict[str, Any]]:
+    matches = []
+    for item, distance in open_index(CHUNK_INDEX).search(np.asarray(vector), k, nprobe):
+        subject_id, _, chunk_id = item.partition(_ID_SEPARATOR)
+        matches.append({"subject_id": subject_id, "chunk_id": chunk_id, "distance": distance})
+    return matches
@@ -0,0 +1,157 @@
+import random
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from backend.core.automata.state_inference import infer_states, infer_states_from_counts
+from backend.core.automata.transitions import (
+    CONTEXT_SEPARATOR,
+    AutomataConfig,
+    TransitionCounts,
+    context_sequence,
+    merge_counts,
+    run_lengths,
+)
+
+
+def _reference_infer_states(cluster_sequence: List[str]) -> Tuple[List[Dict], List[Dict]]:
+    # infer_states as it was before TransitionCounts
+    state_counts = defaultdict(int)
+    transition_counts = defaultdict(int)
+
+    for state in cluster_sequence:
+        state_counts[state] += 1
+
+    for a, b in zip(cluster_sequence, cluster_sequence[1:]):
+        transition_counts[(a, b)] += 1
+
+    states = [
+        {"state_id": state, "label": state, "support": count / len(cluster_sequence)}
+        for state, count in state_counts.items()
+    ]
+
+    transitions = []
+    for (a, b), count in transition_counts.items():
+        transitions.append({"from": a, "to": b, "probability": count / state_counts[a]})
+
+    return states, transitions
+
+
+def _sequence(rng):
+    alphabet = [f"cluster_{index}" for index in range(rng.randint(1, 12))]
+    return [rng.choice(alphabet) for _ in range(rng.randint(1, 300))]
+
+
+def _shards(rng, sequence):
+    cuts = sorted(rng.sample(range(len(sequence) + 1), min(len(sequence), rng.randint(0, 8))))
+    return [sequence[start:end] for start, end in zip([0] + cuts, cuts + [len(sequence)])]
+
+
+def _assert_equal_counts(actual, expected):
+    assert actual.states == expected.states
+    for name in ("state_counts", "sources", "targets", "counts"):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+    assert (actual.first, actual.last) == (expected.first, expected.last)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_infer_states_matches_the_dictionary_count(seed):
+    sequence = _sequence(random.Random(seed))
+    # Same states and transitions, in the same (first appearance) order
+    assert infer_states(sequence) == _reference_infer_states(sequence)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_merged_shards_count_like_the_whole_sequence(seed):
+    rng = random.Random(seed)
+    sequence = _sequence(rng)
+    whole = TransitionCounts.from_sequence(sequence)
+    merged = merge_counts(
+        TransitionCounts.from_sequence(shard) for shard in _shards(rng, sequence)
+    )
+
+    _assert_equal_counts(merged, whole)
+    assert infer_states_from_counts(merged) == _reference_infer_states(sequence)
+    _assert_equal_counts(TransitionCounts.from_dict(merged.to_dict()), whole)
+
+
+def test_empty_sequence():
+    counts = merge_counts([TransitionCounts.from_sequence([])])
+    assert counts.length == 0
+    assert infer_states_from_counts(counts) == ([], [])
+
+
+def _reference_contexts(sequence, order, max_contexts=None):
+    # Order-k context names per position, rare contexts backed off to their
+    # last state; frequency ties keep the lexicographically smaller context.
+    contexts = [tuple(sequence[i - order + 1:i + 1]) for i in range(order - 1, len(sequence))]
+    names = [CONTEXT_SEPARATOR.join(context) for context in contexts]
+    if max_contexts is not None and order > 1 and len(set(contexts)) > max_contexts:
+        counts = Counter(contexts)
+        kept = sorted(counts, key=lambda context: (-counts[context], context))[:max_contexts]
+        names = [
+            name if context in kept else context[-1] for context, name in zip(contexts, names)
+        ]
+    return names
+
+
+def _codes(sequence):
+    # Sequence encoded by first appearance
+    states = list(dict.fromkeys(sequence))
+    index = {state: code for code, state in enumerate(states)}
+    return np.array([index[state] for state in sequence], dtype=np.int64), states
+
+
+@pytest.mark.parametrize("seed", range(60))
+@pytest.mark.parametrize("order", [2, 3])
+def test_context_sequence_matches_sliding_windows(seed, order):
+    rng = random.Random(seed)
+    sequence = [f"c{rng.randint(0, 5)}" for _ in range(rng.randint(0, 200))]
+    # Codes numbered by name, so code order is the reference's tie order
+    states = sorted(set(sequence))
+    codes = np.array([states.index(state) for state in sequence], dtype=np.int64)
+
+    for max_contexts in (None, 1, 4):
+        encoded, names = context_sequence(codes, states, order, max_contexts)
+        assert [names[code] for code in encoded.tolist()] == _reference_contexts(
+            sequence, order, max_contexts
+        )
+        assert names == list(dict.fromkeys(names[code] for code in encoded.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_sparse_counts_match_a_dense_count(seed):
+    rng = random.Random(seed)
+    codes, states = _codes(_sequence(rng))
+    counts = TransitionCounts.from_codes(codes, states)
+
+    dense = np.zeros((len(states), len(states)), dtype=np.int64)
+    np.add.at(dense, (codes[:-1], codes[1:]), 1)
+    np.testing.assert_array_equal(counts.to_dense(), dense)
+    assert np.all(counts.counts > 0)
+
+    indptr, indices, data = counts.to_csr()
+    for row in range(len(states)):
+        columns = indices[indptr[row]:indptr[row + 1]]
+        np.testing.assert_array_equal(dense[row, columns], data[indptr[row]:indptr[row + 1]])
+        assert np.count_nonzero(dense[row]) == len(columns)
+
+    values, lengths = run_lengths(codes)
+    np.testing.assert_array_equal(np.repeat(values, lengths), codes)
+    _assert_equal_counts(TransitionCounts.from_runs(values, lengths, states), counts)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_interval_counts_collapse_runs(seed):
+    rng = random.Random(seed)
+    sequence = [rng.choice("aab") for _ in range(rng.randint(1, 100))]
+    codes, states = _codes(sequence)
+    intervals = [
+        state for index, state in enumerate(sequence) if sequence[index - 1:index] != [state]
+    ]
+
+    counts = TransitionCounts.from_labels(codes, states, AutomataConfig(intervals=True))
+    assert counts.states == states
+    assert infer_states_from_counts(counts) == _reference_infer_states(intervals)
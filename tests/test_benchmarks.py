@@ -0,0 +1,68 @@
+import numpy as np
+
+from benchmarks.suite import _cluster, compare_results
+
+
+def _result(stage, wall_seconds=1.0, peak_rss_mib=100.0, error=None):
+    if error is not None:
+        return {"stage": stage, "chunks": 1000, "error": error}
+    return {
+        "stage": stage,
+        "chunks": 1000,
+        "wall_seconds": wall_seconds,
+        "peak_rss_mib": peak_rss_mib,
+    }
+
+
+def test_compare_flags_slower_stages():
+    rows = compare_results(
+        {"results": [_result("chunk_text"), _result("infer_states")]},
+        {"results": [_result("chunk_text", wall_seconds=1.5), _result("infer_states")]},
+    )
+    flagged = {(row["stage"], row["metric"]) for row in rows if row["regression"]}
+    assert flagged == {("chunk_text", "wall_seconds")}
+
+
+def test_compare_reports_errored_stages():
+    rows = compare_results(
+        {"results": [_result("chunk_text"), _result("infer_states", error="boom")]},
+        {
+            "results": [
+                _result("chunk_text", error="MemoryError"),
+                _result("infer_states", error="boom"),
+                _result("run_pipeline", error="new stage"),
+            ]
+        },
+    )
+    errors = {row["stage"]: row for row in rows if row["metric"] == "error"}
+    assert set(errors) == {"chunk_text", "infer_states", "run_pipeline"}
+    assert all(row["regression"] for row in errors.values())
+    assert errors["chunk_text"]["baseline"] == 1.0
+    assert errors["chunk_text"]["error"] == "MemoryError"
+    assert errors["infer_states"]["baseline"] is None
+
+
+def test_compare_flags_clustering_changes():
+    def clustered(clusters, noise_ratio):
+        return {**_result("run_pipeline"), "clusters": clusters, "noise_ratio": noise_ratio}
+
+    rows = compare_results(
+        {"results": [clustered(3, 0.03), _result("chunk_text")]},
+        {"results": [clustered(52, 0.74), _result("chunk_text")]},
+    )
+    flagged = {(row["stage"], row["metric"]) for row in rows if row["regression"]}
+    assert flagged == {("run_pipeline", "clusters"), ("run_pipeline", "noise_ratio")}
+
+    # Baselines recorded before the clustering metrics only compare METRICS
+    rows = compare_results(
+        {"results": [_result("run_pipeline")]}, {"results": [clustered(3, 0.03)]}
+    )
+    assert {row["metric"] for row in rows} == {"wall_seconds", "peak_rss_mib"}
+
+
+def test_cluster_stage_counts_noise_apart():
+    points = np.random.default_rng(0).normal(size=(500, 6))
+    points[:5] += 50
+    result = _cluster(points)
+    assert result["clusters"] == 1
+    assert 0 < result["noise_ratio"] < 0.1
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from backend.core.ingestion.chunk_table import ChunkTable, timestamp_micros
+from backend.core.ingestion.chunking import iter_chunks
+from backend.core.pipeline import _chunk_documents, _normalize_inputs
+from benchmarks.corpus import CorpusConfig, generate_corpus
+
+
+def _reference_rows(documents):
+    # (chunk_id, timestamp, text) rows as the per-chunk pipeline built them:
+    # chunks in document order, stably sorted by timestamp
+    rows = []
+    for document in _normalize_inputs(documents):
+        for index, chunk in enumerate(iter_chunks(document.content)):
+            rows.append((f"{document.document_id}:{index}", document.timestamp, chunk.text))
+    rows.sort(key=lambda row: row[1])
+    return rows
+
+
+def _rows(chunks):
+    return list(
+        zip(chunks.chunk_ids(range(len(chunks))), chunks.timestamp.tolist(), chunks.texts())
+    )
+
+
+@pytest.mark.parametrize("span_days", [0, 365])
+@pytest.mark.parametrize("threads", [0, 3])
+def test_chunk_table_matches_per_chunk_rows(monkeypatch, span_days, threads):
+    # span_days=0 gives every document the same timestamp: all ties
+    documents = generate_corpus(60, CorpusConfig(span_days=span_days))
+    expected = [
+        (chunk_id, timestamp_micros(timestamp), text)
+        for chunk_id, timestamp, text in _reference_rows(documents)
+    ]
+
+    if threads:
+        monkeypatch.setattr("backend.core.pipeline.SHARD_DOCUMENTS", 7)
+        with ThreadPoolExecutor(threads) as executor:
+            chunks = _chunk_documents(documents, executor, threads)
+    else:
+        chunks = _chunk_documents(documents, None, 1)
+    assert _rows(chunks) == expected
+
+
+def test_concat_and_take_keep_rows():
+    documents = generate_corpus(10)
+    tables = [ChunkTable.from_documents([]), _chunk_documents(documents[:4], None, 1)]
+    tables.append(_chunk_documents(documents[4:], None, 1))
+    whole = ChunkTable.concat(tables)
+
+    assert _rows(whole) == _rows(tables[1]) + _rows(tables[2])
+    assert whole.document_ids == [document["document_id"] for document in documents]
+    rows = np.array([len(whole) - 1, 0, 3])
+    assert _rows(whole.take(rows)) == [_rows(whole)[row] for row in rows]
+    assert len(ChunkTable.concat([])) == 0
+
+
+def test_naive_timestamps_are_utc():
+    naive = datetime(2024, 5, 1, 12, 30)
+    assert timestamp_micros(naive) == timestamp_micros(naive.replace(tzinfo=timezone.utc))
@@ -0,0 +1,95 @@
+import random
+import re
+from typing import List
+
+import pytest
+
+from backend.core.ingestion.chunking import (
+    MAX_CHUNK_LENGTH,
+    MIN_CHUNK_LENGTH,
+    chunk_text,
+    iter_chunks,
+)
+
+WORDS = ["alpha", "beta", "gamma", "café", "naïve", "日本語", "\U0001f600", "x", "longerword"]
+
+
+def _reference_chunk_text(text: str) -> List[str]:
+    # chunk_text as it was before iter_chunks
+    if not text or not text.strip():
+        return []
+
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    chunks: List[str] = []
+
+    for p in paragraphs:
+        if len(p) <= MAX_CHUNK_LENGTH:
+            if len(p) >= MIN_CHUNK_LENGTH:
+                chunks.append(p)
+        else:
+            sentences = re.split(r"(?<=[.!?])\s+", p)
+            buffer = ""
+            for s in sentences:
+                if len(buffer) + len(s) < MAX_CHUNK_LENGTH:
+                    buffer += " " + s
+                else:
+                    if len(buffer.strip()) >= MIN_CHUNK_LENGTH:
+                        chunks.append(buffer.strip())
+                    buffer = s
+            if len(buffer.strip()) >= MIN_CHUNK_LENGTH:
+                chunks.append(buffer.strip())
+
+    return chunks
+
+
+def _sentence(rng):
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 40)))
+    return words + rng.choice([".", "!", "?", ""])
+
+
+def _text(rng):
+    paragraphs = []
+    for _ in range(rng.randint(0, 12)):
+        sentences = [_sentence(rng) for _ in range(rng.choice([1, 2, 5, 30]))]
+        paragraphs.append(
+            rng.choice(["", " ", "\n"])
+            + "".join(s + rng.choice([" ", "  ", "\n", "\t "]) for s in sentences)
+        )
+    return "".join(p + rng.choice(["\n\n", "\n\n\n", " \n\n", "\n\n\n\n"]) for p in paragraphs)
+
+
+def _pieces(rng, text):
+    # The text cut at random points, as a file or socket would deliver it
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text), rng.randint(0, 40))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def _spaced(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_iter_chunks_matches_chunk_text_before_streaming(seed):
+    rng = random.Random(seed)
+    text = _text(rng)
+    expected = _reference_chunk_text(text)
+
+    assert chunk_text(text) == expected
+    assert [chunk.text for chunk in iter_chunks(text)] == expected
+    assert list(iter_chunks(_pieces(rng, text))) == list(iter_chunks(text))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_chunk_offsets_are_utf8_spans_of_the_source(seed):
+    rng = random.Random(seed)
+    text = _text(rng)
+    source = text.encode("utf-8")
+
+    previous_end = 0
+    for chunk in iter_chunks(text):
+        assert previous_end <= chunk.start < chunk.end <= len(source)
+        span = source[chunk.start:chunk.end].decode("utf-8")
+        # Sentences of a split paragraph are rejoined with single spaces
+        assert span == span.strip()
+        assert _spaced(span) == _spaced(chunk.text)
+        previous_end = chunk.end
@@ -0,0 +1,209 @@
+import numpy as np
+import pytest
+
+from backend.core.clustering.cluster import NOISE_LABEL, _union, cluster_embeddings
+from backend.core.clustering.kdtree import KDTree
+
+
+def _standardize(points):
+    scale = points.std(axis=0)
+    scale[scale == 0] = 1.0
+    return (points - points.mean(axis=0)) / scale
+
+
+def _labels(clusters, count):
+    labels = np.full(count, NOISE_LABEL - 1)
+    for cluster_id, members in clusters.items():
+        labels[members] = cluster_id
+    return labels
+
+
+def _brute_force(points, eps, min_samples):
+    # Core mask and connected core components from the full distance matrix
+    distances = ((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+    within = distances <= eps * eps
+    core = within.sum(axis=1) >= min_samples
+    component = np.full(len(points), -1)
+    for start in np.flatnonzero(core):
+        if component[start] >= 0:
+            continue
+        component[start] = start
+        stack = [start]
+        while stack:
+            point = stack.pop()
+            for other in np.flatnonzero(within[point] & core & (component < 0)):
+                component[other] = start
+                stack.append(other)
+    return within, core, component
+
+
+def _check_assignment(labels, rows, core_rows, within, component):
+    """
+    Cores keep their brute-force components (one label each), and every
+    other row is noise exactly when no core lies within eps, otherwise it
+    has the label of such a core.
+    """
+    mapping = {}
+    for row in core_rows:
+        assert labels[row] != NOISE_LABEL
+        assert mapping.setdefault(component[row], labels[row]) == labels[row]
+    assert len(set(mapping.values())) == len(mapping)
+    for row, near in zip(rows, within):
+        near_cores = core_rows[near]
+        if not len(near_cores):
+            assert labels[row] == NOISE_LABEL
+        else:
+            assert labels[row] in {mapping[component[core]] for core in near_cores}
+
+
+def _random_points(rng):
+    count = int(rng.integers(1, 250))
+    dims = int(rng.integers(1, 7))
+    centers = rng.normal(size=(int(rng.integers(1, 6)), dims)) * 3
+    points = centers[rng.integers(0, len(centers), count)] + rng.normal(size=(count, dims))
+    if rng.random() < 0.3:
+        # Exact duplicates, as identical chunks produce
+        points[rng.integers(0, count, count // 3)] = points[0]
+    if rng.random() < 0.2:
+        points[:, 0] = 1.0
+    return points
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_cluster_embeddings_matches_brute_force_dbscan(seed):
+    rng = np.random.default_rng(seed)
+    points = _random_points(rng)
+    eps = float(rng.choice([0.2, 0.5, 0.8, 1.5]))
+    min_samples = int(rng.integers(1, 6))
+
+    labels = _labels(cluster_embeddings(points, min_samples, eps), len(points))
+
+    within, core, component = _brute_force(_standardize(points), eps, min_samples)
+    rows = np.arange(len(points))
+    core_rows = np.flatnonzero(core)
+    _check_assignment(labels, rows, core_rows, within[:, core], component)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_sampled_clustering_assigns_to_sample_cores(seed):
+    rng = np.random.default_rng(seed)
+    points = _random_points(rng)
+    points = np.vstack([points, points + rng.normal(scale=0.05, size=points.shape)])
+    max_points = max(1, len(points) // 3)
+    eps, min_samples = 0.5, 3
+
+    clusters = cluster_embeddings(points, min_samples, eps, max_points=max_points, seed=seed)
+    labels = _labels(clusters, len(points))
+    if len(points) <= max_points:
+        return
+
+    standardized = _standardize(points)
+    sample = np.sort(
+        np.random.default_rng(seed).choice(len(points), size=max_points, replace=False)
+    )
+    _, core, component = _brute_force(standardized[sample], eps, min_samples)
+    core_rows = sample[core]
+    distances = (
+        (standardized[:, None, :] - standardized[None, core_rows, :]) ** 2
+    ).sum(axis=2)
+    full_component = np.full(len(points), -1)
+    full_component[sample] = component
+    _check_assignment(
+        labels, np.arange(len(points)), core_rows, distances <= eps * eps, full_component
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kdtree_query_boxes_covers_radius(seed):
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(int(rng.integers(1, 400)), int(rng.integers(1, 5))))
+    tree = KDTree(points, leaf_size=8)
+    queries = rng.normal(size=(30, points.shape[1]))
+    radius = float(rng.uniform(0.1, 1.5))
+
+    boxes, nodes, full = tree.query_boxes(queries, queries, radius)
+    for query in range(len(queries)):
+        found = boxes == query
+        reached = set()
+        for node, is_full in zip(nodes[found], full[found]):
+            members = tree.members(node)
+            if is_full:
+                assert (((points[members] - queries[query]) ** 2).sum(axis=1) <= radius**2).all()
+            else:
+                assert tree.left[node] < 0
+            reached.update(members.tolist())
+        within = ((points - queries[query]) ** 2).sum(axis=1) <= radius**2
+        assert set(np.flatnonzero(within).tolist()) <= reached
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_union_matches_sequential_union_find(seed):
+    rng = np.random.default_rng(seed)
+    count = 200
+    a = rng.integers(0, count, 150)
+    b = rng.integers(0, count, 150)
+    parent = np.arange(count)
+    _union(parent, a, b)
+
+    expected = list(range(count))
+
+    def find(node):
+        while expected[node] != node:
+            node = expected[node]
+        return node
+
+    for x, y in zip(a.tolist(), b.tolist()):
+        expected[find(x)] = find(y)
+    roots = np.array([find(node) for node in range(count)])
+    actual = np.array([parent[node] for node in range(count)])
+    while not np.array_equal(parent[actual], actual):
+        actual = parent[actual]
+    for node in range(count):
+        assert (roots == roots[node]).tolist() == (actual == actual[node]).tolist()
+
+
+def _separated_blobs(rng):
+    # Four blobs of different sizes and spreads, 12 sigma from the origin,
+    # plus uniform background points; one column on a much larger scale.
+    sizes, spreads = [800, 400, 150, 60], [1.0, 0.5, 0.8, 0.3]
+    centers = rng.normal(size=(len(sizes), 6))
+    centers *= 12 / np.linalg.norm(centers, axis=1, keepdims=True)
+    points = np.vstack(
+        [
+            center + rng.normal(scale=spread, size=(size, 6))
+            for center, spread, size in zip(centers, spreads, sizes)
+        ]
+    )
+    background = rng.uniform(points.min(axis=0), points.max(axis=0), size=(40, 6))
+    points = np.vstack([points, background])
+    points[:, 0] *= 100
+    truth = np.concatenate([np.repeat(np.arange(len(sizes)), sizes), np.full(40, -1)])
+    return points, truth
+
+
+@pytest.mark.parametrize("max_points", [20000, 600])
+@pytest.mark.parametrize("seed", range(8))
+def test_k_distance_eps_recovers_separated_blobs(seed, max_points):
+    points, truth = _separated_blobs(np.random.default_rng(seed))
+    clusters = cluster_embeddings(points, 12, max_points=max_points, seed=seed)
+    labels = _labels(clusters, len(points))
+
+    found = set()
+    for blob in range(truth.max() + 1):
+        ids, counts = np.unique(labels[truth == blob], return_counts=True)
+        cluster_id = ids[np.argmax(counts)]
+        # Each blob is one cluster, and that cluster is that blob
+        assert cluster_id != NOISE_LABEL
+        assert counts.max() >= 0.95 * (truth == blob).sum()
+        assert (truth[labels == cluster_id] == blob).mean() >= 0.95
+        found.add(cluster_id)
+    assert found == set(clusters) - {NOISE_LABEL}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_k_distance_eps_keeps_one_blob_whole(seed):
+    points = np.random.default_rng(seed).normal(size=(3000, 6))
+    clusters = cluster_embeddings(points, 12)
+
+    assert set(clusters) - {NOISE_LABEL} == {0}
+    assert len(clusters[0]) >= 0.9 * len(points)
@@ -0,0 +1,170 @@
+import math
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from backend.core.clustering.embed import (
+    _BASE,
+    _CHAR_SALT,
+    _WORD_SALT,
+    EmbeddingConfig,
+    _fit_svd,
+    _random_projection,
+    embed_texts,
+    hash_ngrams,
+)
+
+MASK = (1 << 64) - 1
+WORDS = ["Alpha", "beta", "GAMMA", "delta_x", "café", "straße", "日本", "x1", "ß", "Über"]
+PUNCTUATION = [" ", "  ", ", ", ". ", "\n", " - ", "\t", "!? ", " \U0001f600 "]
+
+
+def _mix(value):
+    value ^= value >> 30
+    value = (value * 0xBF58476D1CE4E5B9) & MASK
+    value ^= value >> 27
+    value = (value * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def _horner(values, start=0):
+    for value in values:
+        start = (start * _BASE + value) & MASK
+    return start
+
+
+def _is_word(char):
+    return ord(char) < 0xFFFF and (char.isalnum() or char == "_")
+
+
+def _words(text):
+    words, current = [], []
+    for char in text + " ":
+        if _is_word(char):
+            current.append(ord(char))
+        elif current:
+            words.append(current)
+            current = []
+    return words
+
+
+def _reference_ngram_hashes(text, config):
+    # Every word and character n-gram hash of one text, by direct loops
+    text = text.lower()
+    hashes = []
+    if config.word_ngrams is not None:
+        words = [_mix(_horner(word)) for word in _words(text)]
+        for n in range(config.word_ngrams[0], config.word_ngrams[1] + 1):
+            for start in range(len(words) - n + 1):
+                hashes.append(_mix(_horner(words[start:start + n], _WORD_SALT + n)))
+    if config.char_ngrams is not None:
+        codes = [ord(char) for char in text]
+        for n in range(config.char_ngrams[0], config.char_ngrams[1] + 1):
+            for start in range(len(codes) - n + 1):
+                hashes.append(_mix((_horner(codes[start:start + n]) + _CHAR_SALT + n) & MASK))
+    return hashes
+
+
+def _reference_counts(texts, config):
+    # Dense signed bucket counts, and which cells any n-gram touched
+    counts = np.zeros((len(texts), config.n_features))
+    touched = defaultdict(set)
+    for row, text in enumerate(texts):
+        for value in _reference_ngram_hashes(text, config):
+            bucket = value & (config.n_features - 1)
+            counts[row, bucket] += -1 if value >> 63 else 1
+            touched[row].add(bucket)
+    return counts, touched
+
+
+def _texts(rng, count):
+    return [
+        "".join(rng.choice(WORDS) + rng.choice(PUNCTUATION) for _ in range(rng.randint(0, 25)))
+        for _ in range(count)
+    ]
+
+
+def _idf(texts, config):
+    # Texts with any n-gram in each bucket, even if their signs cancel
+    _, touched = _reference_counts(texts, config)
+    frequencies = np.zeros(config.n_features)
+    for buckets in touched.values():
+        frequencies[list(buckets)] += 1
+    return np.log((1 + len(texts)) / (1 + frequencies)) + 1
+
+
+def _weighted(texts, config):
+    counts, _ = _reference_counts(texts, config)
+    return counts * _idf(texts, config) if config.tfidf else counts
+
+
+def _normalized(rows):
+    return rows / np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+
+
+CONFIGS = [
+    EmbeddingConfig(n_features=1 << 10, word_ngrams=(1, 2)),
+    EmbeddingConfig(n_features=1 << 6, word_ngrams=(1, 3), char_ngrams=(2, 4)),
+    EmbeddingConfig(n_features=1 << 12, word_ngrams=None, char_ngrams=(3, 3), block_size=3),
+]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("config", CONFIGS)
+def test_hashed_counts_match_direct_ngram_loops(seed, config):
+    texts = _texts(random.Random(seed), 12)
+    counts, touched = _reference_counts(texts, config)
+
+    indptr, indices, data = hash_ngrams(texts, config)
+    for row in range(len(texts)):
+        columns = indices[indptr[row]:indptr[row + 1]]
+        assert columns.tolist() == sorted(touched[row])
+        np.testing.assert_array_equal(data[indptr[row]:indptr[row + 1]], counts[row, columns])
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("config", CONFIGS)
+def test_svd_embeddings_match_a_dense_svd(seed, config):
+    # With fewer texts than the randomized SVD's sketch width (dim + 8),
+    # the sketch spans the whole row space and the fit is exact.
+    config = replace(config, dim=4)
+    texts = _texts(random.Random(seed), 12)
+    weighted = _weighted(texts, config)
+
+    _, singular, right = np.linalg.svd(_normalized(weighted), full_matrices=False)
+    if singular[3] - singular[4] < 1e-3 * singular[0]:
+        pytest.skip("top four singular vectors not unique")
+    idf = _idf(texts, config).astype(np.float32) if config.tfidf else None
+    components = _fit_svd(texts, idf, config)
+    # Same directions up to sign
+    np.testing.assert_allclose(np.abs(components @ right[:4].T), np.eye(4), atol=1e-4)
+
+    signs = np.sign(np.sum(components * right[:4], axis=1))
+    expected = _normalized(weighted @ (right[:4].T * signs))
+    np.testing.assert_allclose(embed_texts(texts, config), expected, atol=1e-4)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_random_projection_matches_a_dense_product(config):
+    config = replace(config, reduction="random", dim=16)
+    texts = _texts(random.Random(7), 30)
+    projection = _random_projection(config.n_features, config.dim, config.seed)
+
+    expected = _normalized(_weighted(texts, config) @ projection.T)
+    np.testing.assert_allclose(embed_texts(texts, config), expected, atol=1e-5)
+
+
+def test_blocks_and_executor_do_not_change_embeddings():
+    texts = _texts(random.Random(3), 50)
+    config = EmbeddingConfig(n_features=1 << 10, char_ngrams=(3, 4))
+    expected = embed_texts(texts, config)
+
+    small = replace(config, block_size=7)
+    np.testing.assert_allclose(embed_texts(texts, small), expected, atol=1e-5)
+    with ThreadPoolExecutor(3) as executor:
+        np.testing.assert_allclose(embed_texts(texts, small, executor, 3), expected, atol=1e-5)
+    assert math.isclose(np.linalg.norm(expected[0]), 1.0, rel_tol=1e-5)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from backend.core.features.cache import FeatureCache
+from backend.core.pipeline import FEATURES_VERSION, _build_features, _chunk_shard
+from benchmarks.corpus import generate_corpus
+
+
+@pytest.fixture(scope="module")
+def chunks():
+    # Repeated documents, so chunk texts repeat within a run
+    documents = generate_corpus(20)
+    return _chunk_shard(documents + documents[:5])
+
+
+@pytest.fixture(scope="module")
+def uncached(chunks):
+    return _build_features(chunks)
+
+
+@pytest.mark.parametrize("max_entries", [0, 3, 100_000])
+def test_cached_rows_equal_extracted_rows(chunks, uncached, tmp_path, max_entries):
+    path = tmp_path / "features.sqlite"
+    cache = FeatureCache(FEATURES_VERSION, max_entries=max_entries, path=path)
+    distinct = len(set(chunks.texts()))
+
+    np.testing.assert_array_equal(_build_features(chunks, cache), uncached)
+    assert (cache.hits, cache.misses) == (0, distinct)
+    np.testing.assert_array_equal(_build_features(chunks, cache), uncached)
+    assert (cache.hits, cache.misses) == (distinct, distinct)
+    cache.close()
+
+    # A new process starts with an empty memory tier over the same file
+    reopened = FeatureCache(FEATURES_VERSION, max_entries=max_entries, path=path)
+    np.testing.assert_array_equal(_build_features(chunks, reopened), uncached)
+    assert (reopened.hits, reopened.misses) == (distinct, 0)
+    reopened.close()
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = FeatureCache(FEATURES_VERSION, max_entries=2)
+    a, b, c = (cache.key(text) for text in "abc")
+    cache.put_many([a, b], np.eye(2))
+    assert list(cache.get_many([a])) == [a]
+    cache.put_many([c], np.ones((1, 2)))
+
+    assert set(cache.get_many([a, b, c])) == {a, c}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_version_change_misses(tmp_path):
+    path = tmp_path / "features.sqlite"
+    old = FeatureCache("0.1.0", path=path)
+    old.put_many([old.key("text")], np.ones((1, 3)))
+    old.close()
+
+    new = FeatureCache("0.2.0", path=path)
+    assert new.key("text") != old.key("text")
+    assert new.get_many([new.key("text")]) == {}
+    new.close()
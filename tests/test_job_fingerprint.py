@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from storage.database import _queued_job_row, job_fingerprint, pipeline_options
+from workers.analysis_job import _pipeline_settings
+
+
+def _row(options=None):
+    job = {"subject_id": "s", "documents": [], "options": options}
+    return _queued_job_row(job, datetime.now(timezone.utc), pipeline_options())
+
+
+def test_fingerprint_is_stable():
+    assert job_fingerprint("s", "[]", None) == job_fingerprint("s", "[]", None)
+    assert job_fingerprint("s", "[]", None) != job_fingerprint("s", "[]", "{}")
+    assert _row()[5] == _row()[5]
+    assert _row({"language": "en"})[5] == _row('{"language":"en"}')[5]
+    assert _row({"language": "en"})[5] != _row()[5]
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    [
+        ("AUTOMATA_ORDER", "2"),
+        ("AUTOMATA_MAX_CONTEXTS", "64"),
+        ("AUTOMATA_INTERVALS", "1"),
+        ("AUTOMATA_MERGE_ALPHA", "0.05"),
+        ("AUTOMATA_MAX_STATES", "12"),
+        ("TEXT_EMBEDDING_DIM", "32"),
+        ("TEXT_EMBEDDING_REDUCTION", "random"),
+    ],
+)
+def test_fingerprint_covers_pipeline_settings(monkeypatch, name, value):
+    monkeypatch.delenv(name, raising=False)
+    before = _row()[5]
+    monkeypatch.setenv(name, value)
+    assert _row()[5] != before
+
+
+def test_diagnostics_do_not_change_the_fingerprint(monkeypatch):
+    monkeypatch.delenv("PIPELINE_DIAGNOSTICS", raising=False)
+    before = _row()[5]
+    monkeypatch.setenv("PIPELINE_DIAGNOSTICS", "1")
+    assert _row()[5] == before
+
+
+def test_worker_runs_with_the_settings_stored_at_enqueue(monkeypatch):
+    monkeypatch.setenv("AUTOMATA_ORDER", "2")
+    monkeypatch.setenv("TEXT_EMBEDDING_DIM", "32")
+    options = _row({"language": "en"})[4]
+    assert json.loads(options)["language"] == "en"
+
+    # The worker's own environment differs from the API's
+    monkeypatch.setenv("AUTOMATA_ORDER", "3")
+    monkeypatch.delenv("TEXT_EMBEDDING_DIM")
+    settings = _pipeline_settings(options)
+    assert settings.automata_order == 2
+    assert settings.text_embedding_dim == 32
+    assert _pipeline_settings(json.loads(options)) == settings
+    # Jobs enqueued without stored settings use the worker's
+    assert _pipeline_settings(None) is None
+    assert _pipeline_settings('{"language":"en"}') is None
@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+
+from backend.core.ingestion.json_stream import iter_json_documents
+
+DOCUMENTS = [
+    {"content": "first", "n": 12345, "ok": True},
+    {"content": "café \U0001f600 \"quoted\"", "tags": [1.5e3, None, False]},
+    {"content": "", "nested": {"documents": [{"x": 1}]}},
+]
+
+
+class _CountingStream(io.StringIO):
+    # Records how much of the input the reader has consumed.
+    def __init__(self, text):
+        super().__init__(text)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed += len(data)
+        return data
+
+
+def _documents(text, read_size):
+    return list(iter_json_documents(io.StringIO(text), read_size=read_size))
+
+
+def _ndjson(documents):
+    return "\n".join(json.dumps(document) for document in documents) + "\n"
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (json.dumps(DOCUMENTS), DOCUMENTS),
+        # \u escapes and surrogate pairs split by the read window
+        (json.dumps(DOCUMENTS, ensure_ascii=True), DOCUMENTS),
+        (json.dumps(DOCUMENTS, indent=2), DOCUMENTS),
+        (json.dumps({"documents": DOCUMENTS}), DOCUMENTS),
+        (json.dumps({"documents": DOCUMENTS, "meta": {"a": [1, {"b": "}"}]}, "n": 1}), DOCUMENTS),
+        (json.dumps({"meta": 1, "documents": DOCUMENTS}), DOCUMENTS),
+        (_ndjson(DOCUMENTS), DOCUMENTS),
+        (json.dumps(DOCUMENTS[:1]) + "\n" + json.dumps(DOCUMENTS[1:]), DOCUMENTS),
+        (
+            json.dumps({"documents": DOCUMENTS[:1]})
+            + "\n"
+            + json.dumps({"documents": DOCUMENTS[1:]}),
+            DOCUMENTS,
+        ),
+        (json.dumps({"documents": DOCUMENTS[:2], "x": 0}) + json.dumps(DOCUMENTS[2]), DOCUMENTS),
+        ("", []),
+        ("  \n ", []),
+        ("[]", []),
+        ('{"documents": []}', []),
+    ],
+)
+def test_iter_json_documents(text, expected, read_size):
+    assert _documents(text, read_size) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[1]",
+        '[{"a": 1}, "b"]',
+        '{"documents": [{"a": 1}, 2]}',
+        '{"a": 1}\n3\n',
+        '{"a": 1}\n{"documents": [[]]}\n',
+    ],
+)
+def test_rejects_non_object_documents(text):
+    with pytest.raises(ValueError):
+        _documents(text, 4)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '[{"a": 1}] x',
+        '[{"a": 1}',
+        '{"documents": [{"a": 1}], "b"',
+        '{"documents": [{"a": 1}], 1: 2}',
+        '{"a": 1}}',
+        '{"a": tru}',
+    ],
+)
+def test_rejects_malformed_input(text):
+    with pytest.raises(ValueError):
+        _documents(text, 4)
+
+
+def test_syntax_error_does_not_buffer_the_rest_of_the_input():
+    text = '[{"a": 1}, {"a": 1,, "b": 2}, ' + ", ".join(['{"a": 1}'] * 100_000) + "]"
+    stream = _CountingStream(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_documents(stream, read_size=1024))
+    assert stream.consumed <= 4096
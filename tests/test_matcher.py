@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+from backend.core.features import linguistic
+from backend.core.features.lexicons import Lexicon
+from backend.core.features.linguistic import (
+    FEATURE_LEXICONS,
+    default_matcher,
+    extract_linguistic_features_batch,
+)
+from backend.core.features.matcher import PhraseMatcher, tokenize
+from backend.core.schemas import FEATURE_FIELDS
+from benchmarks.corpus import generate_corpus
+
+WORDS = ["a", "b", "c", "d", "it", "seems", "that", "don't", "x"]
+
+
+def _naive_scan(lexicons, texts):
+    # Every phrase tried at every word position
+    words = np.zeros(len(texts), dtype=np.int64)
+    matches = np.zeros((len(texts), len(lexicons)), dtype=np.int64)
+    covered = np.zeros((len(texts), len(lexicons)), dtype=np.int64)
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        words[row] = len(tokens)
+        for column, lexicon in enumerate(lexicons):
+            phrases = {tuple(tokenize(phrase)) for phrase in lexicon.phrases} - {()}
+            inside = set()
+            for start in range(len(tokens)):
+                for phrase in phrases:
+                    if tuple(tokens[start:start + len(phrase)]) == phrase:
+                        matches[row, column] += 1
+                        inside.update(range(start, start + len(phrase)))
+            covered[row, column] = len(inside)
+    return words, matches, covered
+
+
+def _lexicons(rng):
+    def phrase():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+    return [
+        Lexicon(f"lexicon_{index}", "1", tuple(phrase() for _ in range(rng.randint(0, 8))))
+        for index in range(rng.randint(1, 4))
+    ]
+
+
+def _texts(rng, count):
+    separators = [" ", ", ", ". ", "\n", " - ", "_"]
+    return [
+        "".join(
+            rng.choice(WORDS).capitalize() + rng.choice(separators)
+            for _ in range(rng.randint(0, 30))
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_scan_matches_a_naive_scan(seed):
+    rng = random.Random(seed)
+    lexicons = _lexicons(rng)
+    texts = _texts(rng, rng.randint(1, 20))
+
+    scanned = PhraseMatcher(lexicons).scan(texts)
+    for actual, expected in zip(scanned, _naive_scan(lexicons, texts)):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_default_lexicons_match_a_naive_scan():
+    texts = [document["content"] for document in generate_corpus(30)]
+    texts += ["It seems that, perhaps, we should consider it.", "", "1. First\n2. then"]
+    lexicons = default_matcher().lexicons
+
+    scanned = default_matcher().scan(texts)
+    for actual, expected in zip(scanned, _naive_scan(lexicons, texts)):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_features_are_covered_shares(monkeypatch):
+    # Small scan blocks, so texts are split over several scans
+    monkeypatch.setattr(linguistic, "SCAN_BLOCK", 7)
+    texts = [document["content"] for document in generate_corpus(10)]
+    texts += ["1. First step", "No markers here at all", ""]
+    words, matches, covered = _naive_scan(default_matcher().lexicons, texts)
+
+    matrix = extract_linguistic_features_batch(texts)
+    for column, field in enumerate(FEATURE_LEXICONS):
+        np.testing.assert_allclose(
+            matrix[:, FEATURE_FIELDS.index(field)], covered[:, column] / np.maximum(words, 1)
+        )
+    listed = [linguistic._has_list_item(text) for text in texts]
+    np.testing.assert_array_equal(
+        matrix[:, FEATURE_FIELDS.index("ordering_strength")], (matches[:, -1] > 0) | listed
+    )
+    assert listed[-3:] == [True, False, False]
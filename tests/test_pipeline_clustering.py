@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from backend.core.automata.transitions import AutomataConfig
+from backend.core.clustering.cluster import _pairwise_sq_distances
+from backend.core.features.cache import FeatureCache
+from backend.core.pipeline import FEATURE_MIN_SAMPLES, FEATURES_VERSION, run_pipeline
+from benchmarks.corpus import generate_corpus
+
+
+def _clustered_rows(documents):
+    # Standardized feature rows and cluster labels (-1 for noise) per chunk
+    captured = {}
+
+    def keep(chunks, rows):
+        captured["ids"] = chunks.chunk_ids(range(len(chunks)))
+        captured["rows"] = np.array(rows)
+
+    with pytest.MonkeyPatch.context() as patch:
+        # Cluster the feature rows, not text embeddings
+        patch.delenv("TEXT_EMBEDDING_DIM", raising=False)
+        report = run_pipeline(
+            "reference",
+            generate_corpus(documents),
+            enable_interpretation=False,
+            feature_cache=FeatureCache(FEATURES_VERSION),
+            automata_config=AutomataConfig(),
+            on_features=keep,
+        )
+    rows = captured["rows"]
+    scale = rows.std(axis=0)
+    scale[scale == 0] = 1.0
+    position = {chunk_id: row for row, chunk_id in enumerate(captured["ids"])}
+    labels = np.full(len(rows), -1)
+    for cluster_id, pattern in enumerate(report.patterns):
+        labels[[position[chunk_id] for chunk_id in pattern.member_chunks]] = cluster_id
+    return (rows - rows.mean(axis=0)) / scale, labels
+
+
+def _silhouettes(points, labels):
+    # Mean silhouette per cluster over the clustered points
+    points, labels = points[labels >= 0], labels[labels >= 0]
+    clusters, sizes = np.unique(labels, return_counts=True)
+    sums = np.zeros((len(points), len(clusters)))
+    for first in range(0, len(points), 512):
+        distances = np.sqrt(_pairwise_sq_distances(points[first:first + 512], points))
+        for index, cluster in enumerate(clusters):
+            sums[first:first + 512, index] = distances[:, labels == cluster].sum(axis=1)
+    own = np.searchsorted(clusters, labels)
+    rows = np.arange(len(points))
+    within = sums[rows, own] / np.maximum(sizes[own] - 1, 1)
+    means = sums / sizes
+    means[rows, own] = np.inf
+    nearest = means.min(axis=1)
+    silhouette = (nearest - within) / np.maximum(nearest, within)
+    return {cluster: silhouette[labels == cluster].mean() for cluster in clusters.tolist()}
+
+
+# 300 documents (2104 chunks) is the reference corpus of the benchmarks;
+# from about 1000 documents the ordering_strength levels separate.
+@pytest.mark.parametrize("documents", [300, 1000])
+def test_reference_corpus_clusters_are_separated(documents):
+    points, labels = _clustered_rows(documents)
+    clusters, sizes = np.unique(labels[labels >= 0], return_counts=True)
+
+    assert len(clusters)
+    # No micro-clusters carved out of a denser region
+    assert sizes.min() >= FEATURE_MIN_SAMPLES
+    if len(clusters) > 1:
+        # Members are closer to their own cluster than to any other
+        assert min(_silhouettes(points, labels).values()) > 0
@@ -0,0 +1,43 @@
+import pytest
+
+from backend.core.automata.transitions import AutomataConfig
+from backend.core.clustering.embed import EmbeddingConfig
+from backend.core.features.cache import FeatureCache
+from backend.core.pipeline import FEATURES_VERSION, run_pipeline, run_pipeline_many
+from benchmarks.corpus import CorpusConfig, generate_corpus
+
+
+def _subjects():
+    # Uneven subjects, one too small to analyse, with shared documents
+    shared = generate_corpus(8, CorpusConfig(seed=99))
+    return {
+        f"subject_{seed}": generate_corpus(count, CorpusConfig(seed=seed)) + shared[:seed]
+        for seed, count in enumerate([40, 1, 15, 70, 3, 25])
+    }
+
+
+@pytest.mark.parametrize("batch_chunks", [1, 300, 10**9])
+@pytest.mark.parametrize(
+    "embedding_config", [None, EmbeddingConfig(dim=4)], ids=["features", "embeddings"]
+)
+def test_reports_equal_run_pipeline(batch_chunks, embedding_config):
+    subjects = _subjects()
+    options = dict(
+        enable_interpretation=True,
+        automata_config=AutomataConfig(order=2, intervals=True),
+        embedding_config=embedding_config,
+    )
+    expected = [
+        run_pipeline(subject_id, documents, **options)
+        for subject_id, documents in subjects.items()
+    ]
+
+    reports = run_pipeline_many(
+        subjects,
+        feature_cache=FeatureCache(FEATURES_VERSION),
+        batch_chunks=batch_chunks,
+        **options,
+    )
+    assert list(reports) == expected
+    # Only subject_1 is too small to analyse
+    assert [bool(report.patterns) for report in expected] == [True, False] + [True] * 4
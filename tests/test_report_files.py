@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from backend.storage.files import (
+    COMPRESS_THRESHOLD,
+    REPORT_SUFFIX,
+    ReportFile,
+    load_report,
+    persist_report,
+)
+
+
+def _report(patterns):
+    return {
+        "subject_id": "subject",
+        "patterns": patterns,
+        "primary_cluster_id": patterns[0]["cluster_id"] if patterns else None,
+        "automata": {"states": [], "transitions": [{"from": "a", "to": "b", "probability": 1.0}]},
+        "interpretation": None,
+        "confidence": {"overall": 0.5, "notes": "n"},
+        "version": {
+            "features": "0.3.0",
+            "clustering": "0.1.0",
+            "automata": "0.2.0",
+            "interpretation": "0.1.0",
+        },
+        "diagnostics": None,
+    }
+
+
+def _cluster(cluster_id, members):
+    return {
+        "cluster_id": cluster_id,
+        "label": cluster_id,
+        "member_chunks": members,
+        "coherence_score": 0.5,
+    }
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    [
+        [],
+        [_cluster("cluster_0", [])],
+        [_cluster("cluster_0", []), _cluster("cluster_1", ["d:0"]), _cluster("cluster_2", [])],
+        [_cluster("cluster_0", [f"doc-{i}:{i % 7}" for i in range(COMPRESS_THRESHOLD)])],
+        # Not representable as a NUL-separated column; stays inside the JSON
+        [_cluster("cluster_0", ["a\0b", "c"])],
+    ],
+)
+def test_report_round_trip(tmp_path, patterns):
+    report = _report(patterns)
+    path = persist_report("job", report, tmp_path)
+
+    assert path.name == f"job{REPORT_SUFFIX}"
+    assert load_report("job", directory=tmp_path) == report
+    assert load_report("job", ["automata", "patterns"], tmp_path) == {
+        "automata": report["automata"],
+        "patterns": report["patterns"],
+    }
+    with ReportFile(path) as stored:
+        assert stored.sections == list(report)
+
+
+def test_load_report_skips_unknown_sections(tmp_path):
+    persist_report("job", _report([]), tmp_path)
+    assert load_report("job", ["confidence", "missing"], tmp_path) == {
+        "confidence": {"overall": 0.5, "notes": "n"}
+    }
+
+
+def test_legacy_json_fallback(tmp_path):
+    report = _report([_cluster("cluster_0", []), _cluster("cluster_1", ["d:1", "d:2"])])
+    (tmp_path / "legacy.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    assert load_report("legacy", directory=tmp_path) == report
+    assert load_report("legacy", ["patterns", "missing"], tmp_path) == {
+        "patterns": report["patterns"]
+    }
+
+
+def test_binary_report_wins_over_legacy_json(tmp_path):
+    (tmp_path / "job.json").write_text(json.dumps(_report([])), encoding="utf-8")
+    report = _report([_cluster("cluster_0", ["d:0"])])
+    persist_report("job", report, tmp_path)
+    assert load_report("job", directory=tmp_path) == report
+
+
+def test_missing_report_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_report("absent", directory=tmp_path)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / f"job{REPORT_SUFFIX}"
+    path.write_bytes(b"not a report at all")
+    with pytest.raises(ValueError):
+        ReportFile(path)
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import backend.api.v1.results as results
+
+JOBS = {
+    "done": {"status": "completed", "report": json.dumps({"subject_id": "s"})},
+    "busy": {"status": "running", "report": None},
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fetch_status(analysis_id):
+        job = JOBS.get(analysis_id)
+        return None if job is None else {"analysis_id": analysis_id, "status": job["status"]}
+
+    async def fetch_report(analysis_id):
+        return JOBS.get(analysis_id)
+
+    monkeypatch.setattr(results, "fetch_job_status_async", fetch_status)
+    monkeypatch.setattr(results, "fetch_report_json_async", fetch_report)
+    monkeypatch.setattr(results, "_report_cache", results._ReportCache(1 << 20))
+    app = FastAPI()
+    app.include_router(results.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("query", ["", "?sections=automata"])
+def test_matching_etag_is_304_without_a_lookup(client, monkeypatch, query):
+    async def unreachable(analysis_id):
+        raise AssertionError("database queried")
+
+    monkeypatch.setattr(results, "fetch_job_status_async", unreachable)
+    monkeypatch.setattr(results, "fetch_report_json_async", unreachable)
+    etag = results._etag("done", None if not query else ["automata"])
+    response = client.get(f"/reports/done{query}", headers={"If-None-Match": f'"x", W/{etag}'})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("analysis_id", ["missing", "busy"])
+def test_unknown_or_unfinished_report_is_404(client, analysis_id):
+    assert client.get(f"/reports/{analysis_id}").status_code == 404
+    response = client.get(f"/reports/{analysis_id}", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 404
+
+
+def test_completed_report_carries_its_etag(client):
+    etag = results._etag("done")
+    response = client.get("/reports/done")
+    assert response.headers["ETag"] == etag
+    assert response.json() == {"subject_id": "s"}
+    # A different tag gets the body again, from the cache now
+    again = client.get("/reports/done", headers={"If-None-Match": '"x"'})
+    assert again.content == response.content
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from backend.core.features.sequential import (
+    SEQUENCE_INPUTS,
+    extract_sequence_inputs,
+    sequential_features,
+)
+from backend.core.schemas import FEATURE_FIELDS
+
+DRIFT = FEATURE_FIELDS.index("topic_drift")
+ORDERING = FEATURE_FIELDS.index("ordering_strength")
+
+
+def _direct(rows, window):
+    # One explicit window per chunk
+    width = len(FEATURE_FIELDS)
+    features = rows[:, :width].copy()
+    for index in range(len(rows)):
+        marks = rows[max(index - window + 1, 0):index + 1, ORDERING]
+        features[index, ORDERING] = marks.mean()
+
+        centroid = rows[max(index - window, 0):index, width:].sum(axis=0)
+        current = rows[index, width:]
+        norms = np.linalg.norm(centroid) * np.linalg.norm(current)
+        similarity = centroid @ current / norms if norms > 0 else 1.0
+        features[index, DRIFT] = min(max(1.0 - similarity, 0.0), 1.0)
+    return features
+
+
+def _rows(rng, count):
+    rows = rng.random((count, len(FEATURE_FIELDS) + SEQUENCE_INPUTS))
+    rows[:, ORDERING] = rng.random(count) < 0.3
+    signatures = rows[:, len(FEATURE_FIELDS):]
+    signatures -= 0.5
+    # Chunks without words have all-zero signatures
+    signatures[rng.random(count) < 0.2] = 0.0
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("window", [1, 3, 8, 50])
+@pytest.mark.parametrize("block", [1, 7, 65_536])
+def test_window_pass_matches_direct_windows(seed, window, block):
+    rows = _rows(np.random.default_rng(seed), 120)
+    np.testing.assert_allclose(
+        sequential_features(rows, window, block), _direct(rows, window), rtol=0, atol=1e-9
+    )
+
+
+def test_signatures_of_the_pipeline():
+    texts = ["alpha beta", "alpha beta", "gamma delta epsilon", "", "alpha beta", "1. 2."]
+    rows = np.hstack([np.zeros((len(texts), len(FEATURE_FIELDS))), extract_sequence_inputs(texts)])
+    features = sequential_features(rows, window=2)
+
+    np.testing.assert_allclose(features, _direct(rows, 2), rtol=0, atol=1e-9)
+    assert features[0, DRIFT] == 0.0
+    assert features[1, DRIFT] == pytest.approx(0.0)
+    assert features[3, DRIFT] == 0.0
+    assert features[2, DRIFT] > 0.5
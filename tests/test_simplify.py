@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+import pytest
+
+from backend.core.automata.simplify import merge_states
+from backend.core.automata.transitions import TransitionCounts
+
+
+def _assert_equal_counts(actual, expected):
+    assert actual.states == expected.states
+    for name in ("state_counts", "sources", "targets", "counts"):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+    assert (actual.first, actual.last) == (expected.first, expected.last)
+
+
+def _planted(rng, length):
+    # Two-state Markov chain; each visit is labelled with one of several
+    # aliases drawn independently, so aliases of a state are
+    # indistinguishable and merging should recover the two states.
+    aliases = {"a": ["a1", "a2"], "b": ["b1", "b2", "b3"]}
+    state, sequence = "a", []
+    for _ in range(length):
+        sequence.append(rng.choice(aliases[state]))
+        if rng.random() < 0.1:
+            state = "b" if state == "a" else "a"
+    return sequence
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("alpha, max_states", [(0.05, None), (None, 2), (0.5, 3), (1e-6, 1)])
+def test_merged_counts_equal_counts_of_the_merged_sequence(seed, alpha, max_states):
+    rng = random.Random(seed)
+    alphabet = [f"s{index}" for index in range(rng.randint(1, 15))]
+    sequence = [rng.choice(alphabet[: rng.randint(1, len(alphabet))]) for _ in range(300)]
+    counts = TransitionCounts.from_sequence(sequence)
+
+    merged, mapping = merge_states(counts, alpha, max_states)
+
+    # Relabel every chunk with its merged state's name and count again
+    index = {state: code for code, state in enumerate(counts.states)}
+    relabelled = [merged.states[mapping[index[state]]] for state in sequence]
+    _assert_equal_counts(merged, TransitionCounts.from_sequence(relabelled))
+    if max_states is not None:
+        assert len(merged.states) <= max_states
+    # A merged state is named after its first-appearing member
+    assert merged.states == [state for state in counts.states if state in merged.states]
+
+
+def test_nothing_merges_without_alpha_or_budget():
+    counts = TransitionCounts.from_sequence(list("abcabcaab"))
+    merged, mapping = merge_states(counts, None, None)
+    _assert_equal_counts(merged, counts)
+    np.testing.assert_array_equal(mapping, np.arange(3))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_indistinguishable_aliases_merge(seed):
+    counts = TransitionCounts.from_sequence(_planted(random.Random(seed), 5000))
+    merged, mapping = merge_states(counts, alpha=0.05)
+
+    groups = {}
+    for state, block in zip(counts.states, mapping.tolist()):
+        groups.setdefault(block, set()).add(state[0])
+    assert len(merged.states) == 2
+    assert sorted(groups.values(), key=sorted) == [{"a"}, {"b"}]
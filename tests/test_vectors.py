@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+import storage.vectors as vectors
+from storage.vectors import VectorIndex
+
+
+@pytest.fixture
+def small_training(monkeypatch):
+    monkeypatch.setattr(vectors, "TRAIN_MIN_VECTORS", 64)
+
+
+def _ids(start, count):
+    return [f"v{row}" for row in range(start, start + count)]
+
+
+def _exact(points, query, k):
+    distances = np.sqrt(((points - query) ** 2).sum(axis=1))
+    return [f"v{row}" for row in np.argsort(distances, kind="stable")[:k]]
+
+
+def test_insert_does_not_train(tmp_path, small_training):
+    index = VectorIndex(tmp_path)
+    points = np.random.default_rng(0).normal(size=(200, 4)).astype(np.float32)
+    index.insert(_ids(0, 200), points)
+
+    assert index.needs_training()
+    assert not list(tmp_path.glob("centroids-*"))
+    assert [item for item, _ in index.search(points[3], 5)] == _exact(points, points[3], 5)
+
+
+def test_train_assigns_rows_inserted_before_commit(tmp_path, small_training, monkeypatch):
+    index = VectorIndex(tmp_path)
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(300, 4)).astype(np.float32)
+    index.insert(_ids(0, 200), points[:200])
+
+    kmeans = vectors._kmeans
+
+    def insert_during_training(sample, lists, seed=0):
+        # Another insert lands while k-means runs outside the insert lock
+        index.insert(_ids(200, 100), points[200:])
+        return kmeans(sample, lists, seed)
+
+    monkeypatch.setattr(vectors, "_kmeans", insert_during_training)
+    assert index.train()
+    assert not index.needs_training()
+    assert not index.train()
+
+    lists = np.fromfile(tmp_path / "lists-1.i32", dtype=np.int32)
+    centroids = np.fromfile(tmp_path / "centroids-1.f32", dtype=np.float32).reshape(-1, 4)
+    assert len(lists) == 300
+    np.testing.assert_array_equal(lists, vectors._nearest(points, centroids))
+    # Probing every list is exact
+    found = [item for item, _ in index.search(points[250], 5, nprobe=len(centroids))]
+    assert found == _exact(points, points[250], 5)
+
+
+def test_nearest_matches_full_distance_matrix(monkeypatch):
+    monkeypatch.setattr(vectors, "_ASSIGN_CELLS", 50)
+    rng = np.random.default_rng(2)
+    points = rng.normal(size=(301, 3)).astype(np.float32)
+    centroids = rng.normal(size=(7, 3)).astype(np.float32)
+    distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(vectors._nearest(points, centroids), distances.argmin(axis=1))
+
+
+def test_dimension_change_clears_index(tmp_path):
+    index = VectorIndex(tmp_path, track_ids=True)
+    index.insert(["a", "b"], np.ones((2, 3)))
+    index.insert(["c"], np.zeros((1, 5)))
+
+    assert len(index) == 1
+    assert index.vector("a") is None
+    assert index.search(np.zeros(5), 5) == [("c", 0.0)]
+
+
+def test_other_feature_version_reads_empty_and_is_cleared(tmp_path, monkeypatch):
+    index = VectorIndex(tmp_path)
+    index.insert(["a"], np.ones((1, 3)))
+
+    monkeypatch.setattr(vectors, "FEATURES_VERSION", "next")
+    assert len(VectorIndex(tmp_path)) == 0
+    index.insert(["b"], np.ones((1, 3)))
+    assert [item for item, _ in VectorIndex(tmp_path).search(np.ones(3), 5)] == ["b"]
+
+
+def test_vector_dir_is_absolute(monkeypatch, tmp_path):
+    monkeypatch.delenv("VECTOR_INDEX_DIR", raising=False)
+    monkeypatch.setenv("DATA_DIR", "relative")
+    assert vectors.vector_dir().is_absolute()
+    monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path))
+    assert vectors.vector_dir() == tmp_path
+
+
+def _standardized_exact(points, query, k):
+    scale = points.std(axis=0)
+    scale[scale == 0] = 1
+    return _exact(points / scale, query / scale, k)
+
+
+def test_standardized_search_matches_zscored_exact_search(tmp_path, small_training):
+    rng = np.random.default_rng(3)
+    # Columns with very different spreads, and one constant column
+    points = (rng.normal(size=(200, 4)) * [0.01, 1.0, 100.0, 0.0] + 5).astype(np.float32)
+    index = VectorIndex(tmp_path, standardize=True)
+    index.insert(_ids(0, 150), points[:150])
+    index.insert(_ids(150, 50), points[150:])
+
+    for row in (0, 42, 199):
+        found = [item for item, _ in index.search(points[row], 5)]
+        assert found == _standardized_exact(points, points[row], 5)
+
+    assert index.train()
+    lists = len(np.fromfile(tmp_path / "centroids-1.f32", dtype=np.float32)) // 4
+    found = [item for item, _ in index.search(points[42], 5, nprobe=lists)]
+    assert found == _standardized_exact(points, points[42], 5)
+
+
+@pytest.fixture
+def report_index(monkeypatch, tmp_path):
+    monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(vectors, "_indexes", {})
+    return vectors.open_index(vectors.REPORT_INDEX)
+
+
+def test_similar_subjects_widens_past_repeated_reports(report_index):
+    rng = np.random.default_rng(4)
+    report_index.insert(["query"], np.zeros((1, 4)))
+    # Many reports of one subject, all nearer than any other subject
+    report_index.insert(["repeated"] * 40, rng.normal(scale=0.01, size=(40, 4)))
+    report_index.insert([f"other{n}" for n in range(5)], rng.normal(size=(5, 4)) + 3)
+
+    found = vectors.similar_subjects("query", k=3)
+    assert [match["subject_id"] for match in found][:1] == ["repeated"]
+    assert len({match["subject_id"] for match in found}) == 3
+
+    found = vectors.similar_subjects("query", k=10)
+    assert len(found) == 6
+
+
+def test_similar_subjects_widens_probes(report_index, small_training):
+    rng = np.random.default_rng(5)
+    report_index.insert([f"s{n}" for n in range(300)], rng.normal(size=(300, 4)))
+    assert report_index.train()
+
+    found = vectors.similar_subjects("s0", k=100, nprobe=1)
+    assert len(found) == 100
+    assert "s0" not in {match["subject_id"] for match in found}
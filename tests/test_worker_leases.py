@@ -0,0 +1,75 @@
+import threading
+import time
+
+import workers.analysis_job as analysis_job
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_lease_keeper_extends_running_jobs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(analysis_job, "extend_job_leases", lambda ids: calls.append(list(ids)))
+    leases = analysis_job._LeaseKeeper(interval=0.01)
+    try:
+        leases.add("b")
+        leases.add("a")
+        assert _wait_for(lambda: ["a", "b"] in calls)
+        leases.discard("a")
+        leases.discard("b")
+        seen = len(calls)
+        time.sleep(0.05)
+        # Only jobs still running are extended; none are left.
+        assert all(ids for ids in calls)
+        assert len(calls) <= seen + 1
+    finally:
+        leases.close()
+
+
+def test_lease_keeper_survives_database_errors(monkeypatch):
+    beats = threading.Semaphore(0)
+
+    def extend(ids):
+        beats.release()
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(analysis_job, "extend_job_leases", extend)
+    leases = analysis_job._LeaseKeeper(interval=0.01)
+    try:
+        leases.add("a")
+        assert beats.acquire(timeout=2.0)
+        assert beats.acquire(timeout=2.0)
+    finally:
+        leases.close()
+
+
+def test_process_job_holds_the_lease_while_running(monkeypatch):
+    held = []
+
+    class Keeper:
+        jobs = set()
+
+        def add(self, analysis_id):
+            self.jobs.add(analysis_id)
+
+        def discard(self, analysis_id):
+            self.jobs.discard(analysis_id)
+
+    leases = Keeper()
+
+    def run_job(job, workers, executor, diagnostics):
+        held.append(set(leases.jobs))
+        return {}, {}
+
+    monkeypatch.setattr(analysis_job, "_run_job", run_job)
+    monkeypatch.setattr(analysis_job, "_complete_job", lambda job, report, vectors: None)
+    analysis_job._process_job({"analysis_id": "job-1"}, 1, None, leases=leases)
+
+    assert held == [{"job-1"}]
+    assert leases.jobs == set()
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import workers.analysis_job as analysis_job
+
+
+def test_api_process_does_not_export_worker_metrics():
+    script = (
+        "import backend.main\n"
+        "from backend.metrics import REGISTRY\n"
+        "print(sorted(REGISTRY._metrics))\n"
+    )
+    names = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    assert "cortex_queue_jobs" in names
+    assert "cortex_job_claim_seconds" not in names
+
+
+def test_claims_are_timed_by_the_worker(monkeypatch):
+    limits = []
+
+    def claim(limit):
+        limits.append(limit)
+        return [{"analysis_id": "job-1", "created_at": datetime.now(timezone.utc)}]
+
+    monkeypatch.setattr(analysis_job, "claim_next_jobs", claim)
+    before = analysis_job.CLAIM_SECONDS.render()
+
+    jobs = analysis_job._claim_jobs(2)
+    assert [job["analysis_id"] for job in jobs] == ["job-1"]
+    assert "queue_seconds" in jobs[0]
+    assert analysis_job._claim_jobs(0) == []
+    assert limits == [2]
+    assert analysis_job.CLAIM_SECONDS.render() != before
@@ -2,15 +2,54 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 import time
-from typing import Any, Dict, List
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from backend.core.pipeline import run_pipeline
-from storage.database import claim_next_job, init_db, update_job_status
-from storage.vectors import store_report_vectors
+from backend.config import Settings, load_settings, with_report_settings
+from backend.metrics import REGISTRY, counter, histogram, start_http_server
+from storage.database import (
+    JOB_HEARTBEAT_SECONDS,
+    JobListener,
+    claim_next_jobs,
+    close_pool,
+    extend_job_leases,
+    init_db_once,
+    open_pool,
+    refresh_queue_depth,
+    update_job_status,
+)
 
 logger = logging.getLogger(__name__)
 
+# First fallback poll delay after the queue runs dry; doubles up to poll_interval.
+MIN_POLL_INTERVAL = 0.25
+
+JOBS_TOTAL = counter("cortex_jobs_total", "Analysis jobs finished, by outcome.", ["status"])
+JOB_SECONDS = histogram(
+    "cortex_job_seconds", "Wall time from claim to completion of analysis jobs.", ["status"]
+)
+QUEUE_WAIT_SECONDS = histogram(
+    "cortex_job_queue_wait_seconds", "Time analysis jobs spent queued before being claimed."
+)
+# Registered here rather than in storage.database, so only the worker's
+# exporter serves it.
+CLAIM_SECONDS = histogram(
+    "cortex_job_claim_seconds",
+    "Round-trip time of claiming queued jobs.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+STAGE_SECONDS = histogram(
+    "cortex_pipeline_stage_seconds", "Wall time of pipeline stages per job.", ["stage"]
+)
+CHUNKS_TOTAL = counter("cortex_pipeline_chunks_total", "Chunks analysed by the pipeline.")
+CACHE_LOOKUPS = counter(
+    "cortex_feature_cache_lookups_total", "Feature cache lookups, by result.", ["result"]
+)
+
 
 def _parse_documents(raw_documents: Any) -> List[Dict[str, Any]]:
     if isinstance(raw_documents, str):
@@ -20,26 +59,361 @@ def _parse_documents(raw_documents: Any) -> List[Dict[str, Any]]:
     return []
 
 
-def run_worker_loop(poll_interval: float = 5.0) -> None:
-    init_db()
-    logger.info("Analysis worker started.")
-    while True:
-        job = claim_next_job()
-        if not job:
-            time.sleep(poll_interval)
-            continue
+def _pipeline_settings(raw_options: Any) -> Optional[Settings]:
+    # Pipeline settings stored with the job at enqueue time; jobs enqueued
+    # before they were stored run with this worker's settings.
+    options = json.loads(raw_options) if isinstance(raw_options, str) else raw_options
+    pipeline = (options or {}).get("pipeline")
+    if pipeline is None:
+        return None
+    return with_report_settings(load_settings(), pipeline)
+
+
+def _run_job(
+    job: Dict[str, Any],
+    workers: Optional[int] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+    diagnostics: bool = False,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Runs in-process or in a job subprocess; returns the report payload and
+    # the chunk feature vectors to index, job status and metrics are written
+    # by the loop. The pipeline (pydantic, NumPy) is imported on the first
+    # job, not at startup.
+    from backend.core.pipeline import run_pipeline
+
+    vectors: Dict[str, Any] = {}
+
+    def keep_vectors(chunks: Any, embeddings: Any) -> None:
+        vectors["chunk_ids"] = chunks.chunk_ids(range(len(chunks)))
+        vectors["chunk_vectors"] = embeddings
+
+    report = run_pipeline(
+        job.get("subject_id", "unknown"),
+        _parse_documents(job.get("documents")),
+        workers=workers,
+        executor=executor,
+        diagnostics=diagnostics,
+        on_features=keep_vectors,
+        settings=_pipeline_settings(job.get("options")),
+    )
+    return report.dict(by_alias=True), vectors
+
+
+def _claim_jobs(limit: int) -> List[Dict[str, Any]]:
+    if limit <= 0:
+        return []
+    started = time.perf_counter()
+    jobs = claim_next_jobs(limit)
+    CLAIM_SECONDS.observe(time.perf_counter() - started)
+    return _mark_claimed(jobs)
+
+
+def _mark_claimed(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    started = time.monotonic()
+    for job in jobs:
+        job["claimed_monotonic"] = started
+        created_at = job.get("created_at")
+        if created_at is not None:
+            job["queue_seconds"] = max((now - created_at).total_seconds(), 0.0)
+            QUEUE_WAIT_SECONDS.observe(job["queue_seconds"])
+    return jobs
+
+
+def _observe_job(job: Dict[str, Any], status: str) -> None:
+    JOBS_TOTAL.inc(status=status)
+    started = job.get("claimed_monotonic")
+    if started is not None:
+        JOB_SECONDS.observe(time.monotonic() - started, status=status)
+
+
+def _observe_diagnostics(diagnostics: Dict[str, Any]) -> None:
+    for stage, seconds in diagnostics.get("stage_seconds", {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    CHUNKS_TOTAL.inc(diagnostics.get("chunks") or 0)
+    if diagnostics.get("cache_hits") is not None:
+        CACHE_LOOKUPS.inc(diagnostics["cache_hits"], result="hit")
+        CACHE_LOOKUPS.inc(diagnostics["cache_misses"] or 0, result="miss")
+
+
+def _complete_job(
+    job: Dict[str, Any],
+    report_payload: Dict[str, Any],
+    vectors: Dict[str, Any],
+) -> None:
+    analysis_id = str(job["analysis_id"])
+    diagnostics = report_payload.get("diagnostics")
+    if diagnostics is not None:
+        # Queue wait is only known here, not in the process that ran the job.
+        diagnostics["queue_seconds"] = job.get("queue_seconds")
+        _observe_diagnostics(diagnostics)
+    update_job_status(analysis_id, "completed", report=report_payload)
+    try:
+        from backend.storage.files import persist_report
+
+        # Binary copy that the results API reads section by section
+        persist_report(analysis_id, report_payload)
+    except Exception:  # noqa: BLE001
+        logger.exception("Report file write failed for analysis job %s", analysis_id)
+    try:
+        from storage.vectors import store_report_vectors
+
+        store_report_vectors(job.get("subject_id", "unknown"), report_payload, **vectors)
+    except Exception:  # noqa: BLE001
+        # The report is already saved; a failed index insert must not fail the job.
+        logger.exception("Vector indexing failed for analysis job %s", analysis_id)
+    _observe_job(job, "completed")
+    logger.info("Completed analysis job %s", analysis_id)
+
+
+def _fail_job(job: Dict[str, Any], exc: BaseException) -> None:
+    analysis_id = str(job["analysis_id"])
+    logger.error("Failed analysis job %s", analysis_id, exc_info=exc)
+    update_job_status(analysis_id, "failed", error=str(exc))
+    _observe_job(job, "failed")
+
+
+class _Wakeup:
+    """
+    Future resolved by the LISTEN thread so it can be waited on together
+    with running jobs.
+    """
 
-        analysis_id = str(job["analysis_id"])
-        subject_id = job.get("subject_id", "unknown")
-        documents = _parse_documents(job.get("documents"))
-        logger.info("Processing analysis job %s for subject %s", analysis_id, subject_id)
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.future: Future = Future()
 
+    def set(self) -> None:
+        with self._lock:
+            if not self.future.done():
+                self.future.set_result(None)
+
+    def reset(self) -> None:
+        with self._lock:
+            if self.future.done():
+                self.future = Future()
+
+
+class _LeaseKeeper:
+    """
+    Extends the leases of the jobs this worker is running every interval
+    seconds from a daemon thread, so a job that runs past JOB_LEASE_SECONDS
+    is not requeued and run a second time.
+    """
+
+    def __init__(self, interval: float = JOB_HEARTBEAT_SECONDS) -> None:
+        self._lock = threading.Lock()
+        self._jobs: Set[str] = set()
+        self._stop = threading.Event()
+        self._interval = interval
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, analysis_id: str) -> None:
+        with self._lock:
+            self._jobs.add(analysis_id)
+
+    def discard(self, analysis_id: str) -> None:
+        with self._lock:
+            self._jobs.discard(analysis_id)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self._interval)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            with self._lock:
+                jobs = sorted(self._jobs)
+            if not jobs:
+                continue
+            try:
+                extend_job_leases(jobs)
+            except Exception:  # noqa: BLE001
+                # Retried on the next beat; the lease outlasts several misses.
+                logger.exception("Could not extend the leases of %d job(s)", len(jobs))
+
+
+def _listen(
+    listener: JobListener,
+    wakeup: _Wakeup,
+    stop: threading.Event,
+    poll_interval: float,
+) -> None:
+    while not stop.is_set():
+        if listener.wait(poll_interval):
+            wakeup.set()
+
+
+def run_worker_loop(
+    poll_interval: float = 5.0,
+    workers: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> None:
+    """
+    Processes queued jobs until interrupted.
+    Idle workers block on LISTEN and pick up a new job as soon as it is
+    enqueued; claims are still retried with exponential backoff, from
+    MIN_POLL_INTERVAL up to poll_interval, in case a notification is missed.
+    With concurrency > 1, up to that many jobs run at once, each in its own
+    subprocess; otherwise jobs run one at a time in this process, with
+    `workers` pipeline processes shared across jobs.
+    The leases of running jobs are extended every JOB_HEARTBEAT_SECONDS.
+    When METRICS_PORT is set, job and pipeline metrics are served on it.
+    """
+    settings = load_settings()
+    if workers is None:
+        workers = settings.pipeline_workers
+    if concurrency is None:
+        concurrency = settings.worker_concurrency
+    diagnostics = settings.pipeline_diagnostics
+    # Only this process talks to the database; job subprocesses do not.
+    open_pool(settings.db_pool_min_size, settings.db_pool_max_size)
+    try:
+        init_db_once()
+        if settings.metrics_port is not None:
+            REGISTRY.add_collector(refresh_queue_depth)
+            start_http_server(settings.metrics_port)
+            logger.info("Serving worker metrics on port %d.", settings.metrics_port)
+        leases = _LeaseKeeper()
         try:
-            report = run_pipeline(documents)
-            report_payload = report.dict(by_alias=True)
-            update_job_status(analysis_id, "completed", report=report_payload)
-            store_report_vectors(subject_id, report_payload)
-            logger.info("Completed analysis job %s", analysis_id)
-        except Exception as exc:
-            logger.exception("Failed analysis job %s", analysis_id)
-            update_job_status(analysis_id, "failed", error=str(exc))
+            if concurrency > 1:
+                logger.info("Analysis worker started with %d job slot(s).", concurrency)
+                _poll_jobs_concurrently(poll_interval, concurrency, diagnostics, leases)
+                return
+
+            logger.info("Analysis worker started with %d pipeline worker(s).", workers)
+            # One pool for the life of the loop instead of one per job
+            executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            try:
+                _poll_jobs(poll_interval, workers, executor, diagnostics, leases)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        finally:
+            leases.close()
+    finally:
+        close_pool()
+
+
+def _poll_jobs(
+    poll_interval: float,
+    workers: int,
+    executor: Optional[ProcessPoolExecutor],
+    diagnostics: bool = False,
+    leases: Optional[_LeaseKeeper] = None,
+) -> None:
+    listener = JobListener()
+    delay = MIN_POLL_INTERVAL
+    try:
+        while True:
+            jobs = _claim_jobs(1)
+            if not jobs:
+                listener.wait(delay)
+                delay = min(delay * 2, poll_interval)
+                continue
+            delay = MIN_POLL_INTERVAL
+            _process_job(jobs[0], workers, executor, diagnostics, leases)
+    finally:
+        listener.close()
+
+
+def _process_job(
+    job: Dict[str, Any],
+    workers: int,
+    executor: Optional[ProcessPoolExecutor],
+    diagnostics: bool = False,
+    leases: Optional[_LeaseKeeper] = None,
+) -> None:
+    logger.info(
+        "Processing analysis job %s for subject %s",
+        job["analysis_id"],
+        job.get("subject_id", "unknown"),
+    )
+    analysis_id = str(job["analysis_id"])
+    if leases is not None:
+        leases.add(analysis_id)
+    try:
+        report_payload, vectors = _run_job(job, workers, executor, diagnostics)
+    except Exception as exc:
+        _fail_job(job, exc)
+    else:
+        _complete_job(job, report_payload, vectors)
+    finally:
+        if leases is not None:
+            leases.discard(analysis_id)
+
+
+def _poll_jobs_concurrently(
+    poll_interval: float,
+    concurrency: int,
+    diagnostics: bool = False,
+    leases: Optional[_LeaseKeeper] = None,
+) -> None:
+    executor = ProcessPoolExecutor(max_workers=concurrency)
+    running: Dict[Future, Dict[str, Any]] = {}
+    listener = JobListener()
+    wakeup = _Wakeup()
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=_listen, args=(listener, wakeup, stop, poll_interval), daemon=True
+    )
+    watcher.start()
+    delay = MIN_POLL_INTERVAL
+    try:
+        while True:
+            # Reset before claiming so a notification racing the claim still
+            # wakes the wait below.
+            wakeup.reset()
+            # Backpressure: never claim more jobs than there are free slots.
+            claimed = _claim_jobs(concurrency - len(running))
+            for job in claimed:
+                logger.info(
+                    "Processing analysis job %s for subject %s",
+                    job["analysis_id"],
+                    job.get("subject_id", "unknown"),
+                )
+                running[executor.submit(_run_job, job, None, None, diagnostics)] = job
+                if leases is not None:
+                    leases.add(str(job["analysis_id"]))
+
+            waiting = set(running)
+            timeout = None
+            if len(running) < concurrency:
+                # Free slots: also wake on a notification or the backoff delay.
+                delay = MIN_POLL_INTERVAL if claimed else min(delay * 2, poll_interval)
+                waiting.add(wakeup.future)
+                timeout = delay
+            done, _ = wait(waiting, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            broken = False
+            for future in done:
+                if future not in running:
+                    continue
+                job = running.pop(future)
+                try:
+                    report_payload, vectors = future.result()
+                except BrokenProcessPool as exc:
+                    broken = True
+                    _fail_job(job, exc)
+                except Exception as exc:
+                    _fail_job(job, exc)
+                else:
+                    _complete_job(job, report_payload, vectors)
+                if leases is not None:
+                    leases.discard(str(job["analysis_id"]))
+
+            if broken:
+                # A crashed subprocess takes the pool and its other jobs down.
+                for job in running.values():
+                    _fail_job(job, BrokenProcessPool("job subprocess pool terminated"))
+                    if leases is not None:
+                        leases.discard(str(job["analysis_id"]))
+                running.clear()
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=concurrency)
+    finally:
+        stop.set()
+        executor.shutdown()
+        watcher.join(timeout=poll_interval)
+        listener.close()